@@ -285,6 +285,50 @@ class TestingApp(RequestHandler):
         data = b"1" * length
         return Response(data, headers=[("Content-Type", "application/octet-stream")])
 
+    def range(self, request):
+        """ Serve ``length`` bytes with an ETag, or one range of them.
+
+        With ``change``, the resource changes after a HEAD request. With
+        ``fail``, the first response to each range, or to the whole
+        resource, stops halfway.
+        """
+        length = int(request.params.get("length", 1000))
+        data = bytes(bytearray(i % 251 for i in range(length)))
+        etag = '"v1"'
+        if request.params.get("change") and request.method != "HEAD":
+            etag = '"v2"'
+        headers = [
+            ("Content-Type", "application/octet-stream"),
+            ("Accept-Ranges", "bytes"),
+            ("ETag", etag),
+            ("Last-Modified", "Tue, 15 Nov 1994 12:45:26 GMT"),
+        ]
+
+        status = "200 OK"
+        first, last = 0, length - 1
+        byte_range = request.headers.get("Range")
+        if byte_range and request.headers.get("If-Range") in (None, etag):
+            status = "206 Partial Content"
+            first, last = byte_range[len("bytes=") :].split("-")
+            first, last = int(first), min(int(last or length - 1), length - 1)
+            data = data[first : last + 1]
+            headers.append(("Content-Range", "bytes %d-%d/%d" % (first, last, length)))
+
+        fail = request.params.get("fail")
+        if fail and request.method != "HEAD":
+            # Asking again for the rest of the range doesn't fail.
+            key = (fail, last)
+            RETRY_TEST_NAMES[key] += 1
+            if RETRY_TEST_NAMES[key] == 1:
+                headers.append(("Content-Length", str(len(data))))
+                data = data[: len(data) // 2]
+        return Response(data, status=status, headers=headers)
+
+    def cache_control(self, request):
+        """ Reply with the ``Cache-Control`` header given in ``value``. """
+        value = request.params.get("value", b"").decode("utf-8")
+        return Response("Cached!", headers=[("Cache-Control", value)])
+
     def status(self, request):
         status = request.params.get("status", "200 OK")
 
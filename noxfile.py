@@ -4,7 +4,7 @@ import shutil
 import nox
 
 
-def tests_impl(session, extras="socks,secure,brotli"):
+def tests_impl(session, extras="socks,secure,brotli,h2"):
     # Install deps and the package itself.
     session.install("-r", "dev-requirements.txt")
     session.install(".[{extras}]".format(extras=extras))
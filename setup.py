@@ -83,5 +83,6 @@ setup(
             "ipaddress; python_version=='2.7'",
         ],
         "socks": ["PySocks>=1.5.6,<2.0,!=1.5.7"],
+        "h2": ["h2>=3.0.0,<5"],
     },
 )
@@ -0,0 +1,303 @@
+from __future__ import absolute_import
+import collections
+import logging
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import QObject
+
+from .connectionpool import port_by_scheme
+from .exceptions import LocationParseError
+from .packages.six.moves import queue
+from .util.timeout import current_time
+from .util.url import parse_url
+
+
+__all__ = ["BatchResult", "HostSummary", "RequestBatch"]
+
+
+log = logging.getLogger(__name__)
+
+
+#: The outcome of one request made by :meth:`PoolManager.request_many`.
+#: ``index`` is the position of the request in the input, ``host`` is the
+#: ``scheme://host:port`` it was sent to. Exactly one of ``response`` and
+#: ``error`` is set. ``elapsed`` is the wall clock time the request took, in
+#: seconds, including retries and redirects.
+BatchResult = collections.namedtuple(
+    "BatchResult", ["index", "method", "url", "host", "response", "error", "elapsed"]
+)
+
+
+def _host_key(url):
+    try:
+        u = parse_url(url)
+    except LocationParseError:
+        return url
+
+    scheme = (u.scheme or "http").lower()
+    port = u.port or port_by_scheme.get(scheme, 80)
+    return "%s://%s:%s" % (scheme, (u.host or "").lower(), port)
+
+
+class HostSummary(QObject):
+    """
+    Latency and error counts for the requests of a :class:`RequestBatch`
+    which went to one host.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.min_time = None
+        self.max_time = None
+
+    @property
+    def mean_time(self):
+        if not self.requests:
+            return None
+        return self.total_time / self.requests
+
+    def add(self, result):
+        self.requests += 1
+        if result.error is not None:
+            self.errors += 1
+        self.total_time += result.elapsed
+        if self.min_time is None or result.elapsed < self.min_time:
+            self.min_time = result.elapsed
+        if self.max_time is None or result.elapsed > self.max_time:
+            self.max_time = result.elapsed
+
+    def __repr__(self):
+        return (
+            "{cls}(host={self.host!r}, requests={self.requests}, "
+            "errors={self.errors}, mean_time={self.mean_time!r})"
+        ).format(cls=type(self).__name__, self=self)
+
+
+class _RequestJob(QtCore.QRunnable):
+    """
+    Make one request of a batch on a worker thread, and hand the
+    :class:`BatchResult` back through ``results``.
+    """
+
+    def __init__(self, manager, results, index, method, url, host, kw):
+        QtCore.QRunnable.__init__(self)
+        self.manager = manager
+        self.results = results
+        self.index = index
+        self.method = method
+        self.url = url
+        self.host = host
+        self.kw = kw
+
+    def run(self):
+        response = error = None
+        start = current_time()
+        try:
+            response = self.manager.request(self.method, self.url, **self.kw)
+        except Exception as e:
+            error = e
+        elapsed = current_time() - start
+
+        self.results.put(
+            BatchResult(
+                self.index, self.method, self.url, self.host, response, error, elapsed
+            )
+        )
+
+
+class RequestBatch(QObject):
+    """
+    Iterator over the results of a batch of requests, which are made
+    concurrently on worker threads as the batch is consumed. Returned by
+    :meth:`urllib3.poolmanager.PoolManager.request_many`.
+
+    Requests are started in input order, as long as fewer than
+    ``max_concurrency`` are in flight overall and fewer than ``per_host`` are
+    in flight to their host. Requests to a host which is at its limit wait
+    without holding up requests to other hosts.
+
+    :param manager:
+        The :class:`~urllib3.poolmanager.PoolManager` making the requests.
+
+    :param requests:
+        Iterable of ``(method, url)`` or ``(method, url, kwargs)`` tuples.
+        ``kwargs`` are passed on to :meth:`~urllib3.request.RequestMethods.request`
+        on top of ``request_kw``. The iterable is consumed lazily.
+
+    :param max_concurrency:
+        Maximum number of requests in flight at a time. With ``ordered``,
+        results held back until those before them are yielded count towards
+        it too, so that they can't pile up.
+
+    :param per_host:
+        Maximum number of requests in flight to a single host. Defaults to,
+        and can't exceed, the ``maxsize`` of the manager's pools so that no
+        request waits for, or throws away, a connection.
+
+    :param ordered:
+        If True, results are yielded in input order. Otherwise, they are
+        yielded as soon as they complete.
+
+    :param request_kw:
+        Keyword arguments for every request.
+    """
+
+    def __init__(
+        self,
+        manager,
+        requests,
+        max_concurrency=10,
+        per_host=None,
+        ordered=False,
+        request_kw=None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+
+        maxsize = manager.connection_pool_kw.get("maxsize", 1)
+        if per_host is None or per_host > maxsize:
+            per_host = maxsize
+
+        self.manager = manager
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.ordered = ordered
+        self.request_kw = request_kw or {}
+
+        #: :class:`HostSummary` for each host, keyed by ``scheme://host:port``,
+        #: covering the requests which have completed so far.
+        self.summary = {}
+
+        self._requests = enumerate(requests)
+        self._exhausted = False
+        self._closed = False
+        self._in_flight = 0
+        self._in_flight_by_host = collections.defaultdict(int)
+        self._waiting = collections.OrderedDict()
+        self._num_waiting = 0
+        self._completed = {}
+        self._next_index = 0
+        self._results = queue.Queue()
+        self._threads = QtCore.QThreadPool()
+        self._threads.setMaxThreadCount(max_concurrency)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            if self.ordered and self._next_index in self._completed:
+                self._next_index += 1
+                return self._completed.pop(self._next_index - 1)
+
+            self._schedule()
+            if not self._in_flight:
+                raise StopIteration
+
+            result = self._receive()
+            if not self.ordered:
+                return result
+            self._completed[result.index] = result
+
+    next = __next__  # Python 2
+
+    def close(self):
+        """
+        Stop starting new requests, and wait for those in flight to finish.
+        Their results still count towards :attr:`summary`, but are not
+        yielded.
+        """
+        self._closed = True
+        self._threads.waitForDone()
+        while self._in_flight:
+            self._receive()
+        self._waiting.clear()
+        self._completed.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        # Return False to re-raise any potential exceptions
+        return False
+
+    def _schedule(self):
+        if self._closed:
+            return
+
+        # Requests which were waiting for their host go first.
+        for host in list(self._waiting):
+            jobs = self._waiting[host]
+            while jobs and self._can_start(host, jobs[0].index):
+                self._num_waiting -= 1
+                self._start(jobs.popleft())
+            if not jobs:
+                del self._waiting[host]
+
+        # Don't read arbitrarily far ahead while every host we've seen is busy,
+        # or while results are held back behind an earlier request.
+        while (
+            not self._exhausted
+            and self._in_flight + len(self._completed) < self.max_concurrency
+            and self._num_waiting < self.max_concurrency
+        ):
+            try:
+                index, request = next(self._requests)
+            except StopIteration:
+                self._exhausted = True
+                break
+
+            job = self._new_job(index, request)
+            if job.host not in self._waiting and self._can_start(job.host, index):
+                self._start(job)
+            else:
+                self._waiting.setdefault(job.host, collections.deque()).append(job)
+                self._num_waiting += 1
+
+    def _can_start(self, host, index):
+        # In ordered mode, completed results waiting to be yielded count
+        # towards max_concurrency, except for the request they're waiting on.
+        held = self._in_flight + len(self._completed)
+        if held >= self.max_concurrency and not (
+            index == self._next_index and self._in_flight < self.max_concurrency
+        ):
+            return False
+        return self._in_flight_by_host[host] < self.per_host
+
+    def _new_job(self, index, request):
+        method, url = request[:2]
+        kw = self.request_kw.copy()
+        if len(request) > 2:
+            kw.update(request[2])
+
+        return _RequestJob(
+            self.manager, self._results, index, method, url, _host_key(url), kw
+        )
+
+    def _start(self, job):
+        self._in_flight += 1
+        self._in_flight_by_host[job.host] += 1
+        self._threads.start(job)
+
+    def _receive(self):
+        result = self._results.get()
+        self._in_flight -= 1
+        self._in_flight_by_host[result.host] -= 1
+
+        if result.error is not None:
+            log.debug(
+                "Batched request %s %s failed: %r",
+                result.method,
+                result.url,
+                result.error,
+            )
+
+        summary = self.summary.get(result.host)
+        if summary is None:
+            summary = self.summary[result.host] = HostSummary(result.host)
+        summary.add(result)
+        return result
@@ -0,0 +1,868 @@
+from __future__ import absolute_import
+import collections
+import errno
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from io import BytesIO
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import QObject
+
+try:
+    import sqlite3
+except ImportError:  # Python built without sqlite.
+    sqlite3 = None
+
+from ._collections import HTTPHeaderDict
+from .response import HTTPResponse, _O_BINARY, _parse_http_date
+from .util.response import is_fp_closed
+
+
+__all__ = ["CacheEntry", "MemoryCache", "DiskCache"]
+
+
+log = logging.getLogger(__name__)
+
+
+#: Statuses which may be cached without explicit freshness information
+#: (RFC 7231, Section 6.1, and RFC 7538 for 308).
+CACHEABLE_BY_DEFAULT = frozenset(
+    [200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501]
+)
+
+#: Statuses which are cached when they have explicit freshness information.
+#: Partial content and 304s are not stored on their own.
+CACHEABLE_STATUSES = CACHEABLE_BY_DEFAULT | frozenset([302, 307])
+
+#: Headers of a 304 response which don't replace those of the stored
+#: response, because they describe the empty 304 body itself.
+_NOT_UPDATED_BY_304 = frozenset(["content-length", "transfer-encoding"])
+
+#: Temporary body files older than this, in seconds, were left behind by
+#: responses which were never read to the end, or by crashed processes.
+_STALE_TEMP_FILE_AGE = 24 * 60 * 60
+
+
+def parse_cache_control(headers):
+    """
+    Parse the ``Cache-Control`` header of ``headers`` into a dictionary of
+    its directives, in lowercase, mapping to their value, or to None for
+    directives without one.
+    """
+    if not isinstance(headers, HTTPHeaderDict):
+        headers = HTTPHeaderDict(headers)
+    directives = {}
+    for value in headers.get_all("cache-control"):
+        for directive in value.split(","):
+            name, _, argument = directive.partition("=")
+            name = name.strip().lower()
+            if name:
+                directives[name] = argument.strip().strip('"') or None
+    return directives
+
+
+def _seconds(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _vary(headers):
+    names = []
+    for value in headers.get_all("vary"):
+        names.extend(name.strip().lower() for name in value.split(","))
+    return [name for name in names if name]
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        # Already evicted by another process, or still mapped on Windows.
+        pass
+
+
+def is_cacheable(request_headers, response):
+    """
+    Whether ``response`` to a ``GET`` request with ``request_headers`` may be
+    stored by a private cache (RFC 7234, Section 3).
+    """
+    if response.status not in CACHEABLE_STATUSES:
+        return False
+
+    request_cc = parse_cache_control(request_headers)
+    response_cc = parse_cache_control(response.headers)
+    if "no-store" in request_cc or "no-store" in response_cc:
+        return False
+    if "*" in _vary(response.headers):
+        return False
+
+    explicit = (
+        "max-age" in response_cc
+        or "expires" in response.headers
+        or "public" in response_cc
+    )
+    return explicit or response.status in CACHEABLE_BY_DEFAULT
+
+
+class CacheEntry(QObject):
+    """
+    A response stored by a :class:`~urllib3.poolmanager.CachingPoolManager`:
+    its status, headers and raw body, when it was requested and received,
+    and the values of the request headers it varies on. While the body is
+    still being received, ``body`` is None.
+
+    Times are in seconds since the epoch, as in ``time.time()``.
+    """
+
+    def __init__(
+        self,
+        url,
+        status,
+        headers,
+        body,
+        request_time,
+        response_time,
+        reason=None,
+        version=11,
+        vary=None,
+    ):
+        self.url = url
+        self.status = status
+        self.headers = HTTPHeaderDict(headers)
+        self.body = body
+        self.request_time = request_time
+        self.response_time = response_time
+        self.reason = reason
+        self.version = version
+        self.vary = vary or {}
+        self.cache_control = parse_cache_control(self.headers)
+
+    @classmethod
+    def from_response(
+        cls, url, request_headers, response, body, request_time, response_time
+    ):
+        """ Make an entry of ``response`` to a request with ``request_headers``,
+        whose raw body is ``body``. """
+        request_headers = HTTPHeaderDict(request_headers)
+        vary = dict(
+            (name, request_headers.get(name)) for name in _vary(response.headers)
+        )
+        return cls(
+            url,
+            response.status,
+            response.headers,
+            body,
+            request_time,
+            response_time,
+            reason=response.reason,
+            version=response.version,
+            vary=vary,
+        )
+
+    @property
+    def size(self):
+        """ The size of the body, in bytes. """
+        return len(self.body)
+
+    def matches(self, request_headers):
+        """ Whether this entry can answer a request with ``request_headers``,
+        which have the same values of the headers it varies on. """
+        request_headers = HTTPHeaderDict(request_headers)
+        return all(
+            request_headers.get(name) == value for name, value in self.vary.items()
+        )
+
+    def _date(self):
+        date = _parse_http_date(self.headers.get("date"))
+        return self.response_time if date is None else date
+
+    def current_age(self, now):
+        """ The age of the response at ``now`` (RFC 7234, Section 4.2.3). """
+        apparent_age = max(0, self.response_time - self._date())
+        age_value = _seconds(self.headers.get("age")) or 0
+        response_delay = self.response_time - self.request_time
+        corrected_initial_age = max(apparent_age, age_value + response_delay)
+        return corrected_initial_age + now - self.response_time
+
+    def freshness_lifetime(self):
+        """ How long the response is fresh for, in seconds (RFC 7234,
+        Section 4.2.1), using the heuristic of Section 4.2.2 when the server
+        didn't say. """
+        if "max-age" in self.cache_control:
+            return _seconds(self.cache_control["max-age"]) or 0
+
+        if "expires" in self.headers:
+            # An invalid date means it has already expired.
+            expires = _parse_http_date(self.headers["expires"])
+            return 0 if expires is None else max(0, expires - self._date())
+
+        last_modified = _parse_http_date(self.headers.get("last-modified"))
+        if last_modified is not None and (
+            self.status in CACHEABLE_BY_DEFAULT or "public" in self.cache_control
+        ):
+            return max(0, (self._date() - last_modified) / 10.0)
+        return 0
+
+    def is_fresh(self, request_headers, now):
+        """ Whether the entry can be used at ``now`` without revalidating
+        it, for a request with ``request_headers``. """
+        request_headers = HTTPHeaderDict(request_headers)
+        request_cc = parse_cache_control(request_headers)
+        if not request_cc and "no-cache" in request_headers.get("pragma", ""):
+            request_cc = {"no-cache": None}
+        if "no-cache" in request_cc or "no-cache" in self.cache_control:
+            return False
+
+        age = self.current_age(now)
+        lifetime = self.freshness_lifetime()
+        max_age = _seconds(request_cc.get("max-age"))
+        if max_age is not None and age > max_age:
+            return False
+        lifetime -= _seconds(request_cc.get("min-fresh")) or 0
+        if age < lifetime:
+            return True
+
+        if "max-stale" in request_cc and "must-revalidate" not in self.cache_control:
+            max_stale = _seconds(request_cc["max-stale"])
+            return max_stale is None or age - lifetime <= max_stale
+        return False
+
+    def is_useful(self):
+        """ Whether the entry can ever answer a request, by being fresh for a
+        while or by having a validator to revalidate it with. """
+        return bool(self.freshness_lifetime() or self.validators())
+
+    def validators(self):
+        """ The conditional request headers to revalidate the entry with. """
+        headers = {}
+        if "etag" in self.headers:
+            headers["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+    def updated(self, response, request_time, response_time):
+        """ Return the entry refreshed by a ``304 Not Modified`` ``response``
+        (RFC 7234, Section 4.3.4). """
+        headers = self.headers.copy()
+        for name in set(response.headers):
+            if name.lower() not in _NOT_UPDATED_BY_304:
+                headers.discard(name)
+                for value in response.headers.get_all(name):
+                    headers.add(name, value)
+
+        return type(self)(
+            self.url,
+            self.status,
+            headers,
+            self.body,
+            request_time,
+            response_time,
+            reason=self.reason,
+            version=self.version,
+            vary=self.vary,
+        )
+
+    def open_body(self):
+        """ Return a file object to read the raw body from. """
+        return BytesIO(self.body)
+
+    def to_response(self, now, **response_kw):
+        """
+        Return a new :class:`~urllib3.response.HTTPResponse` of the entry,
+        with an ``Age`` header of its age at ``now``. ``response_kw`` are
+        passed to it, as by a connection pool.
+        """
+        headers = self.headers.copy()
+        headers["Age"] = str(int(self.current_age(now)))
+        return HTTPResponse(
+            body=self.open_body(),
+            headers=headers,
+            status=self.status,
+            version=self.version,
+            reason=self.reason,
+            request_method="GET",
+            **response_kw
+        )
+
+    def __repr__(self):
+        return "%s(%r, status=%d)" % (type(self).__name__, self.url, self.status)
+
+
+class MemoryCache(QObject):
+    """
+    Store of :class:`CacheEntry` objects in memory, for a
+    :class:`~urllib3.poolmanager.CachingPoolManager`. Once the bodies of the
+    entries add up to more than ``max_size`` bytes, the least recently used
+    entries are dropped.
+
+    Stores are used by many threads at once, and map keys, which are URLs,
+    to entries with :meth:`get`, :meth:`set` and :meth:`delete`. Responses
+    are written to them as they're read, through a :meth:`writer`.
+
+    :param max_size:
+        The most bytes of bodies to keep.
+
+    :param max_entry_size:
+        The largest body to keep, in bytes. Defaults to a tenth of
+        ``max_size``, so that one response can't push out everything else.
+    """
+
+    def __init__(self, max_size=64 * 2 ** 20, max_entry_size=None):
+        self.max_size = max_size
+        if max_entry_size is None:
+            max_entry_size = max_size // 10
+        self.max_entry_size = min(max_entry_size, max_size)
+
+        #: The total size of the bodies kept, in bytes.
+        self.size = 0
+
+        self._lock = QtCore.QMutex()
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        with QtCore.QMutexLocker(self._lock):
+            return len(self._entries)
+
+    def get(self, key):
+        """ Return the entry for ``key``, or None. """
+        with QtCore.QMutexLocker(self._lock):
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                # Most recently used go last.
+                self._entries[key] = entry
+            return entry
+
+    def set(self, key, entry):
+        """ Keep ``entry`` for ``key``, unless it's too large. """
+        if entry.size > self.max_entry_size:
+            self.delete(key)
+            return
+
+        with QtCore.QMutexLocker(self._lock):
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old.size
+            self._entries[key] = entry
+            self.size += entry.size
+
+            while self.size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+                log.debug("Evicted %r from the cache", evicted)
+
+    def writer(self, key, entry):
+        """
+        Return an object to write the body of ``entry``, whose ``body`` is
+        None, to with ``write(data)``. Its ``commit()`` keeps the entry for
+        ``key``, and its ``abort()`` throws it away. Writing more than
+        ``max_entry_size`` bytes aborts it.
+        """
+        return _MemoryCacheWriter(self, key, entry)
+
+    def delete(self, key):
+        """ Forget the entry for ``key``, if there is one. """
+        with QtCore.QMutexLocker(self._lock):
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old.size
+
+    def clear(self):
+        """ Forget every entry. """
+        with QtCore.QMutexLocker(self._lock):
+            self._entries.clear()
+            self.size = 0
+
+
+class _MemoryCacheWriter(QObject):
+    def __init__(self, cache, key, entry):
+        self.cache = cache
+        self.key = key
+        self.entry = entry
+        self.size = 0
+        self.done = False
+        self._chunks = []
+
+    def write(self, data):
+        if self.done:
+            return
+        self.size += len(data)
+        if self.size > self.cache.max_entry_size:
+            self.abort()
+            return
+        self._chunks.append(data)
+
+    def commit(self):
+        if self.done:
+            return
+        self.done = True
+        self.entry.body = b"".join(self._chunks)
+        self._chunks = None
+        self.cache.set(self.key, self.entry)
+
+    def abort(self):
+        self.done = True
+        self._chunks = None
+
+
+class _CacheFiller(QObject):
+    """
+    Wrap the file object of a response, and write the raw body to a cache
+    writer as it's read. The entry is committed at the end of the body,
+    when ``length`` bytes, or all of a body of unknown length, were read,
+    and aborted if reading fails or the response is closed before the end.
+    """
+
+    def __init__(self, fp, writer, length=None):
+        self._fp = fp
+        self.writer = writer
+        self.length = length
+
+    def _filled(self, data, end):
+        if self.writer.done:
+            return
+        if data:
+            self.writer.write(data)
+        if end or (self.length is not None and self.writer.size >= self.length):
+            if self.length is None or self.writer.size == self.length:
+                self.writer.commit()
+            else:
+                self.writer.abort()
+
+    def read(self, amt=None):
+        try:
+            data = self._fp.read() if amt is None else self._fp.read(amt)
+        except Exception:
+            self.writer.abort()
+            raise
+        self._filled(data, amt is None or (amt != 0 and not data))
+        return data
+
+    def readinto(self, b):
+        try:
+            n = self._fp.readinto(b)
+        except Exception:
+            self.writer.abort()
+            raise
+        self._filled(bytes(b[:n]), n == 0 and len(b) > 0)
+        return n
+
+    def isclosed(self):
+        closed = is_fp_closed(self._fp)
+        if closed and not self.writer.done:
+            # httplib closes itself at the end of a chunked body, which
+            # may come without an empty read.
+            self._filled(b"", True)
+        return closed
+
+    @property
+    def closed(self):
+        return self.isclosed()
+
+    def close(self):
+        self._fp.close()
+        self.writer.abort()
+
+    def fileno(self):
+        return self._fp.fileno()
+
+    def flush(self):
+        if hasattr(self._fp, "flush"):
+            return self._fp.flush()
+
+
+class _MappedFile(io.RawIOBase):
+    """
+    Read-only file object over a memory map of a body file, shared by all
+    the responses of an entry. ``readinto`` copies straight from the
+    mapping, without reading the file into a buffer first.
+    """
+
+    def __init__(self, view, size):
+        self._view = view
+        self._size = size
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def read(self, amt=None):
+        end = self._size
+        if amt is not None and amt >= 0:
+            end = min(self._position + amt, self._size)
+        data = bytes(self._view[self._position : end]) if self._view else b""
+        self._position = end
+        return data
+
+    def readinto(self, b):
+        n = min(len(b), self._size - self._position)
+        if n > 0:
+            b[:n] = self._view[self._position : self._position + n]
+            self._position += n
+        return n
+
+
+def _map(path):
+    """ Map the file at ``path`` for reading, and return a view of it. """
+    fd = os.open(path, os.O_RDONLY | _O_BINARY)
+    try:
+        if os.fstat(fd).st_size == 0:
+            # Empty files can't be mapped.
+            return None
+        mapping = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    try:
+        return memoryview(mapping)
+    except TypeError:
+        # Python 2's mmap objects can't be viewed, but slice the same.
+        return mapping
+
+
+class _MappedCacheEntry(CacheEntry):
+    """ An entry of a :class:`DiskCache`, whose body is a mapped file. """
+
+    digest = None
+    body_size = 0
+    view = None
+
+    @property
+    def size(self):
+        return self.body_size
+
+    def open_body(self):
+        return _MappedFile(self.view, self.body_size)
+
+    def updated(self, response, request_time, response_time):
+        entry = super(_MappedCacheEntry, self).updated(
+            response, request_time, response_time
+        )
+        entry.digest = self.digest
+        entry.body_size = self.body_size
+        entry.view = self.view
+        return entry
+
+
+def _dump_entry(entry):
+    return json.dumps(
+        {
+            "url": entry.url,
+            "status": entry.status,
+            "headers": list(entry.headers.iteritems()),
+            "request_time": entry.request_time,
+            "response_time": entry.response_time,
+            "reason": entry.reason,
+            "version": entry.version,
+            "vary": entry.vary,
+        }
+    )
+
+
+def _load_entry(meta, digest, size, view):
+    meta = json.loads(meta)
+    entry = _MappedCacheEntry(
+        meta["url"],
+        meta["status"],
+        meta["headers"],
+        None,
+        meta["request_time"],
+        meta["response_time"],
+        reason=meta["reason"],
+        version=meta["version"],
+        vary=meta["vary"],
+    )
+    entry.digest = digest
+    entry.body_size = size
+    entry.view = view
+    return entry
+
+
+class DiskCache(QObject):
+    """
+    Store of :class:`CacheEntry` objects on disk, which any number of
+    processes can share, for a :class:`~urllib3.poolmanager.CachingPoolManager`.
+
+    Bodies are kept in files named by the SHA-256 of their content, so a
+    body served at several URLs is only kept once, and are mapped into
+    memory to be read, so responses from the cache read straight from the
+    page cache. They're written to a temporary file as the response is read,
+    and moved into place at the end. An sqlite database in the directory
+    indexes them, and its locking keeps the processes out of each other's
+    way. Once the bodies add up to more than ``max_size`` bytes, the
+    entries used least recently by any process are dropped.
+
+    :param directory:
+        Where to keep the index and the bodies. It's created if needed.
+
+    :param max_size:
+        The most bytes of bodies to keep.
+
+    :param max_entry_size:
+        The largest body to keep, in bytes. Defaults to a tenth of
+        ``max_size``.
+
+    :param timeout:
+        How many seconds to wait for another process to finish with the
+        index before giving up.
+    """
+
+    _db = None
+    _pid = None
+
+    def __init__(self, directory, max_size=2 ** 30, max_entry_size=None, timeout=30):
+        if sqlite3 is None:
+            raise ImportError("DiskCache needs Python to be built with sqlite3.")
+
+        self.directory = directory
+        self.max_size = max_size
+        if max_entry_size is None:
+            max_entry_size = max_size // 10
+        self.max_entry_size = min(max_entry_size, max_size)
+        self.timeout = timeout
+
+        self._lock = QtCore.QMutex()
+        self._bodies = os.path.join(directory, "bodies")
+        self._temp = os.path.join(directory, "tmp")
+        _makedirs(self._bodies)
+        _makedirs(self._temp)
+        self._remove_stale_temp_files()
+
+    def _remove_stale_temp_files(self):
+        now = time.time()
+        for name in os.listdir(self._temp):
+            path = os.path.join(self._temp, name)
+            try:
+                if now - os.path.getmtime(path) > _STALE_TEMP_FILE_AGE:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _connect(self):
+        # Connections can't be used by a forked process, so each process
+        # opens its own.
+        if self._db is None or self._pid != os.getpid():
+            db = sqlite3.connect(
+                os.path.join(self.directory, "index.sqlite"),
+                timeout=self.timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            try:
+                # Lets processes read while another one writes.
+                db.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.DatabaseError:
+                pass
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, digest TEXT NOT NULL, "
+                "size INTEGER NOT NULL, meta TEXT NOT NULL, used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+            self._db = db
+            self._pid = os.getpid()
+        return self._db
+
+    @contextmanager
+    def _transaction(self):
+        with QtCore.QMutexLocker(self._lock):
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def _body_path(self, digest):
+        return os.path.join(self._bodies, digest[:2], digest)
+
+    def _release(self, db, digest, size):
+        """ Remove the body ``digest`` if no entry uses it any more, and
+        return how many bytes that freed. """
+        row = db.execute(
+            "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if row is not None:
+            return 0
+        _remove(self._body_path(digest))
+        return size
+
+    def _evict(self, db, keep):
+        total = db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM "
+            "(SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        rows = db.execute(
+            "SELECT key, digest, size FROM entries WHERE key != ? ORDER BY used",
+            (keep,),
+        ).fetchall()
+        for key, digest, size in rows:
+            if total <= self.max_size:
+                break
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= self._release(db, digest, size)
+            log.debug("Evicted %s from the cache", key)
+
+    def _store(self, db, key, entry, digest, size):
+        old = db.execute(
+            "SELECT digest, size FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+            (key, digest, size, _dump_entry(entry), time.time()),
+        )
+        if old is not None and old[0] != digest:
+            self._release(db, old[0], old[1])
+        self._evict(db, key)
+
+    def _commit(self, key, entry, path, digest, size):
+        body_path = self._body_path(digest)
+        # Under the index's lock, so that no other process evicts the body
+        # between it being moved into place and the entry using it.
+        with self._transaction() as db:
+            if os.path.exists(body_path):
+                _remove(path)
+            else:
+                _makedirs(os.path.dirname(body_path))
+                os.rename(path, body_path)
+            self._store(db, key, entry, digest, size)
+
+    @property
+    def size(self):
+        """ The total size of the bodies kept, in bytes. """
+        with QtCore.QMutexLocker(self._lock):
+            return (
+                self._connect()
+                .execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM "
+                    "(SELECT DISTINCT digest, size FROM entries)"
+                )
+                .fetchone()[0]
+            )
+
+    def __len__(self):
+        with QtCore.QMutexLocker(self._lock):
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, key):
+        """ Return the entry for ``key``, or None. """
+        with QtCore.QMutexLocker(self._lock):
+            db = self._connect()
+            row = db.execute(
+                "SELECT digest, size, meta FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE entries SET used = ? WHERE key = ?", (time.time(), key))
+
+        digest, size, meta = row
+        try:
+            view = _map(self._body_path(digest))
+        except (OSError, ValueError):
+            # Evicted by another process since the lookup.
+            return None
+        return _load_entry(meta, digest, size, view)
+
+    def set(self, key, entry):
+        """ Keep ``entry`` for ``key``, unless it's too large. """
+        if entry.size > self.max_entry_size:
+            self.delete(key)
+        elif isinstance(entry, _MappedCacheEntry):
+            # Only the headers changed, the body is kept already.
+            with self._transaction() as db:
+                self._store(db, key, entry, entry.digest, entry.size)
+        else:
+            writer = self.writer(key, entry)
+            writer.write(entry.body)
+            writer.commit()
+
+    def writer(self, key, entry):
+        """ Return an object to write the body of ``entry`` to, as for
+        :meth:`MemoryCache.writer`. """
+        return _DiskCacheWriter(self, key, entry)
+
+    def delete(self, key):
+        """ Forget the entry for ``key``, if there is one. """
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT digest, size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._release(db, row[0], row[1])
+
+    def clear(self):
+        """ Forget every entry. """
+        with self._transaction() as db:
+            rows = db.execute("SELECT DISTINCT digest FROM entries").fetchall()
+            db.execute("DELETE FROM entries")
+            for (digest,) in rows:
+                _remove(self._body_path(digest))
+
+
+class _DiskCacheWriter(QObject):
+    def __init__(self, cache, key, entry):
+        self.cache = cache
+        self.key = key
+        self.entry = entry
+        self.size = 0
+        self.done = False
+        self._hash = hashlib.sha256()
+        self._file = None
+        self._path = None
+
+    def _open(self):
+        fd, self._path = tempfile.mkstemp(dir=self.cache._temp)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data):
+        if self.done:
+            return
+        self.size += len(data)
+        if self.size > self.cache.max_entry_size:
+            self.abort()
+            return
+        if self._file is None:
+            self._open()
+        self._file.write(data)
+        self._hash.update(data)
+
+    def commit(self):
+        if self.done:
+            return
+        self.done = True
+        if self._file is None:
+            self._open()
+        self._file.close()
+        self.cache._commit(
+            self.key, self.entry, self._path, self._hash.hexdigest(), self.size
+        )
+
+    def abort(self):
+        if self.done:
+            return
+        self.done = True
+        if self._file is not None:
+            self._file.close()
+            _remove(self._path)
@@ -1,8 +1,10 @@
 from __future__ import absolute_import
 import datetime
+import io
 import logging
 import os
 import socket
+from stat import S_ISREG
 from socket import error as SocketError, timeout as SocketTimeout
 import warnings
 from .packages import six
@@ -47,6 +49,7 @@ from .util.ssl_ import (
 
 
 from .util import connection
+from .util.timeout import current_time
 
 from ._collections import HTTPHeaderDict
 
@@ -54,6 +57,9 @@ log = logging.getLogger(__name__)
 
 port_by_scheme = {"http": 80, "https": 443}
 
+# Linux only.
+_TCP_CORK = getattr(socket, "TCP_CORK", None)
+
 # When it comes time to update this value as a part of regular maintenance
 # (ie test_recent_date is failing) update it to ~6 months before the current date.
 RECENT_DATE = datetime.date(2019, 1, 1)
@@ -87,6 +93,8 @@ class HTTPConnection(_HTTPConnection, QObject):
             ]
 
         Or you may want to disable the defaults by passing an empty list (e.g., ``[]``).
+
+      - ``chunked_frame_size``: See :attr:`chunked_frame_size`.
     """
 
     default_port = port_by_scheme["http"]
@@ -98,6 +106,19 @@ class HTTPConnection(_HTTPConnection, QObject):
     #: Whether this connection verifies the host's certificate.
     is_verified = False
 
+    #: The :class:`~urllib3.util.timing.RequestTimings` of the request being
+    #: made, which connecting adds to. Set by the pool.
+    timings = None
+
+    #: Bytes sent over this connection.
+    bytes_sent = 0
+
+    #: When sending a body with chunked encoding, gather the items the body
+    #: yields into chunks of at least this many bytes, instead of sending
+    #: each item as a chunk of its own. This saves a system call and a few
+    #: bytes of framing for every item when a generator yields small pieces.
+    chunked_frame_size = None
+
     def __init__(self, *args, **kw):
         if six.PY3:
             kw.pop("strict", None)
@@ -109,6 +130,8 @@ class HTTPConnection(_HTTPConnection, QObject):
         #: provided, we use the default options.
         self.socket_options = kw.pop("socket_options", self.default_socket_options)
 
+        self.chunked_frame_size = kw.pop("chunked_frame_size", self.chunked_frame_size)
+
         _HTTPConnection.__init__(self, *args, **kw)
 
     @property
@@ -154,7 +177,10 @@ class HTTPConnection(_HTTPConnection, QObject):
 
         try:
             conn = connection.create_connection(
-                (self._dns_host, self.port), self.timeout, **extra_kw
+                (self._dns_host, self.port),
+                self.timeout,
+                timings=self.timings,
+                **extra_kw
             )
 
         except SocketTimeout:
@@ -184,10 +210,92 @@ class HTTPConnection(_HTTPConnection, QObject):
         conn = self._new_conn()
         self._prepare_conn(conn)
 
+    def send(self, data):
+        _HTTPConnection.send(self, data)
+        if isinstance(data, (bytes, bytearray)):
+            self.bytes_sent += len(data)
+
+    def request(self, method, url, body=None, headers=None, **kwargs):
+        """
+        Send a request, like :meth:`httplib.HTTPConnection.request`.
+
+        When ``body`` is a regular file opened in binary mode and the
+        connection isn't encrypted, the file is sent straight from the
+        kernel with :meth:`socket.socket.sendfile`, from its current position
+        to the end, rather than being copied through Python block by block.
+        """
+        if headers is None:
+            headers = {}
+        length = self._sendfile_length(body)
+        if length is not None and self.sock is None and self.auto_open:
+            self.connect()
+        if length is None or not self._can_sendfile():
+            return _HTTPConnection.request(self, method, url, body, headers, **kwargs)
+
+        headers = HTTPHeaderDict(headers)
+        if "transfer-encoding" in headers:
+            return _HTTPConnection.request(self, method, url, body, headers, **kwargs)
+        if "content-length" in headers:
+            length = int(headers["content-length"])
+
+        self.putrequest(
+            method,
+            url,
+            skip_accept_encoding="accept-encoding" in headers,
+            skip_host="host" in headers,
+        )
+        for header, value in headers.items():
+            self.putheader(header, value)
+        if "content-length" not in headers:
+            self.putheader("Content-Length", str(length))
+
+        corked = self._set_cork(True)
+        try:
+            self.endheaders()
+            if length:
+                self.bytes_sent += self.sock.sendfile(body, body.tell(), length)
+        finally:
+            if corked:
+                self._set_cork(False)
+
+    def _sendfile_length(self, body):
+        """
+        Return how many bytes of ``body`` are left to send, if it can be sent
+        with :meth:`socket.socket.sendfile`, and None otherwise.
+        """
+        if (
+            not hasattr(os, "sendfile")
+            or isinstance(self, HTTPSConnection)
+            or not isinstance(body, (io.BufferedIOBase, io.RawIOBase))
+        ):
+            return None
+        try:
+            stat = os.fstat(body.fileno())
+            position = body.tell()
+        except (AttributeError, OSError, ValueError):
+            # Not a real file, or it's closed.
+            return None
+        if not S_ISREG(stat.st_mode):
+            return None
+        return max(0, stat.st_size - position)
+
+    def _can_sendfile(self):
+        """
+        Whether the connected socket is one :meth:`socket.socket.sendfile`
+        can write to directly, rather than a TLS or other wrapped socket.
+        """
+        return isinstance(self.sock, socket.socket) and not (
+            ssl is not None and isinstance(self.sock, ssl.SSLSocket)
+        )
+
     def request_chunked(self, method, url, body=None, headers=None):
         """
         Alternative to the common request method, which sends the
         body with chunked encoding and not as one block
+
+        Each chunk goes out in a single write, together with its framing. On
+        Linux, the socket is corked until the whole request is written, so
+        the headers and small chunks share TCP segments.
         """
         headers = HTTPHeaderDict(headers if headers is not None else {})
         skip_accept_encoding = "accept-encoding" in headers
@@ -199,25 +307,83 @@ class HTTPConnection(_HTTPConnection, QObject):
             self.putheader(header, value)
         if "transfer-encoding" not in headers:
             self.putheader("Transfer-Encoding", "chunked")
-        self.endheaders()
-
-        if body is not None:
-            stringish_types = six.string_types + (bytes,)
-            if isinstance(body, stringish_types):
-                body = (body,)
-            for chunk in body:
-                if not chunk:
-                    continue
-                if not isinstance(chunk, bytes):
-                    chunk = chunk.encode("utf8")
-                len_str = hex(len(chunk))[2:]
-                self.send(len_str.encode("utf-8"))
-                self.send(b"\r\n")
-                self.send(chunk)
-                self.send(b"\r\n")
-
-        # After the if clause, to always have a closed body
-        self.send(b"0\r\n\r\n")
+
+        if self.sock is None and self.auto_open:
+            self.connect()
+        corked = self._set_cork(True)
+        try:
+            self.endheaders()
+
+            frame = []
+            frame_length = 0
+            if body is not None:
+                stringish_types = six.string_types + (bytes,)
+                if isinstance(body, stringish_types):
+                    body = (body,)
+                for chunk in body:
+                    if not chunk:
+                        continue
+                    if not isinstance(chunk, bytes):
+                        chunk = chunk.encode("utf8")
+                    frame.append(chunk)
+                    frame_length += len(chunk)
+                    if (
+                        self.chunked_frame_size is None
+                        or frame_length >= self.chunked_frame_size
+                    ):
+                        self._send_chunk(frame)
+                        frame = []
+                        frame_length = 0
+
+            # After the if clause, to always have a closed body
+            self._send_chunk(frame, last=True)
+        finally:
+            if corked:
+                self._set_cork(False)
+
+    def _send_chunk(self, frame, last=False):
+        """
+        Send the items in ``frame`` as one chunk, followed by the last chunk
+        if ``last`` is true.
+        """
+        buffers = []
+        if frame:
+            data = frame[0] if len(frame) == 1 else b"".join(frame)
+            buffers += [("%x\r\n" % len(data)).encode("ascii"), data, b"\r\n"]
+        if last:
+            buffers.append(b"0\r\n\r\n")
+
+        sendmsg = getattr(self.sock, "sendmsg", None)
+        if (
+            sendmsg is None
+            or self.debuglevel > 0
+            or (ssl is not None and isinstance(self.sock, ssl.SSLSocket))
+        ):
+            # TLS sockets can't gather, so copy the chunk into one buffer.
+            self.send(b"".join(buffers))
+            return
+
+        self.bytes_sent += sum(len(buf) for buf in buffers)
+        while buffers:
+            sent = sendmsg(buffers)
+            while buffers and sent >= len(buffers[0]):
+                sent -= len(buffers.pop(0))
+            if sent:
+                buffers[0] = memoryview(buffers[0])[sent:]
+
+    def _set_cork(self, enabled):
+        """
+        Set ``TCP_CORK`` on the socket, where the platform has it. Return
+        whether it could be set.
+        """
+        if _TCP_CORK is None or self.sock is None:
+            return False
+        try:
+            self.sock.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, int(enabled))
+        except (AttributeError, SocketError):
+            # pyOpenSSL and SecureTransport sockets don't have options.
+            return False
+        return True
 
 
 class HTTPSConnection(HTTPConnection):
@@ -225,6 +391,10 @@ class HTTPSConnection(HTTPConnection):
 
     ssl_version = None
 
+    #: Protocols offered to the server with ALPN when this connection builds
+    #: its own SSL context, e.g. ``["h2", "http/1.1"]``.
+    alpn_protocols = None
+
     def __init__(
         self,
         host,
@@ -263,6 +433,7 @@ class HTTPSConnection(HTTPConnection):
             self.ssl_context = create_urllib3_context(
                 ssl_version=resolve_ssl_version(self.ssl_version),
                 cert_reqs=resolve_cert_reqs(self.cert_reqs),
+                alpn_protocols=self.alpn_protocols,
             )
 
         # Try to load OS default certs if none are given.
@@ -276,6 +447,7 @@ class HTTPSConnection(HTTPConnection):
         ):
             context.load_default_certs()
 
+        start = current_time()
         self.sock = ssl_wrap_socket(
             sock=conn,
             keyfile=self.key_file,
@@ -284,6 +456,8 @@ class HTTPSConnection(HTTPConnection):
             ssl_context=self.ssl_context,
             server_hostname=self.server_hostname,
         )
+        if self.timings is not None:
+            self.timings.add("tls", current_time() - start)
 
 
 class VerifiedHTTPSConnection(HTTPSConnection):
@@ -368,6 +542,7 @@ class VerifiedHTTPSConnection(HTTPSConnection):
             self.ssl_context = create_urllib3_context(
                 ssl_version=resolve_ssl_version(self.ssl_version),
                 cert_reqs=resolve_cert_reqs(self.cert_reqs),
+                alpn_protocols=self.alpn_protocols,
             )
 
         context = self.ssl_context
@@ -383,6 +558,7 @@ class VerifiedHTTPSConnection(HTTPSConnection):
         ):
             context.load_default_certs()
 
+        start = current_time()
         self.sock = ssl_wrap_socket(
             sock=conn,
             keyfile=self.key_file,
@@ -393,6 +569,8 @@ class VerifiedHTTPSConnection(HTTPSConnection):
             server_hostname=server_hostname,
             ssl_context=context,
         )
+        if self.timings is not None:
+            self.timings.add("tls", current_time() - start)
 
         if self.assert_fingerprint:
             assert_fingerprint(
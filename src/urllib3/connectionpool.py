@@ -1,6 +1,9 @@
 from __future__ import absolute_import
+import collections
 import errno
+import itertools
 import logging
+import re
 import sys
 import warnings
 
@@ -43,9 +46,11 @@ from .util.connection import is_connection_dropped
 from .util.request import set_file_position
 from .util.response import assert_header_parsing
 from .util.retry import Retry
-from .util.timeout import Timeout
+from .util.timeout import Timeout, current_time
+from .util.timing import RequestTimings
 from .util.url import get_host, Url, NORMALIZABLE_SCHEMES
 from .util.queue import LifoQueue
+from PyQt5 import QtCore
 from PyQt5.QtCore import QObject
 
 xrange = six.moves.xrange
@@ -64,6 +69,10 @@ class ConnectionPool(QObject):
 
     scheme = None
     QueueCls = LifoQueue
+    retry_budget = None
+    circuit_breaker = None
+    metrics = None
+    slow_request_hook = None
 
     def __init__(self, host, port=None):
         if not host:
@@ -142,6 +151,48 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
     :param retries:
         Retry configuration to use by default with requests in this pool.
 
+    :param retry_budget:
+        A :class:`~urllib3.util.retry.RetryBudget` limiting how many of the
+        requests made through this pool may be retried. It can be shared
+        with other pools.
+
+    :param minsize:
+        Turns on adaptive sizing: the pool starts with room for ``minsize``
+        connections and grows up to ``maxsize``. With ``block=True`` it grows
+        when a caller has waited :attr:`ADAPTIVE_GROW_WAIT` seconds for a
+        connection, and with ``block=False`` when a connection is returned to
+        a full pool. Every :attr:`ADAPTIVE_SHRINK_INTERVAL` seconds, room for
+        connections which weren't needed during the interval is released.
+
+    :param max_overflow:
+        Number of connections to keep, rather than close, when they're
+        returned to a pool which is full. They're reused before new
+        connections are made.
+
+    :param circuit_breaker:
+        A :class:`~urllib3.util.circuit.CircuitBreaker` which makes requests
+        fail fast while this pool's host is down. It can be shared with other
+        pools.
+
+    :param metrics:
+        A :class:`~urllib3.util.metrics.Metrics` registry to record this
+        pool's connections, requests and latencies in. It can be shared with
+        other pools.
+
+    :param slow_request_hook:
+        Called as ``slow_request_hook(pool, method, url, timings, exceeded)``
+        when an attempt at a request takes longer than allowed by
+        ``slow_request_thresholds``. ``timings`` is the attempt's
+        :class:`~urllib3.util.timing.RequestTimings`, and ``exceeded`` the
+        names of the thresholds it exceeded. It's checked once
+        :meth:`urlopen` has the response, so ``download`` only counts if the
+        body is preloaded.
+
+    :param slow_request_thresholds:
+        Dictionary of the most seconds each phase in
+        :attr:`RequestTimings.PHASES <urllib3.util.timing.RequestTimings.PHASES>`,
+        or ``total``, may take before ``slow_request_hook`` is called.
+
     :param _proxy:
         Parsed proxy URL, should not be used directly, instead, see
         :class:`urllib3.connectionpool.ProxyManager`"
@@ -159,6 +210,14 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
     ConnectionCls = HTTPConnection
     ResponseCls = HTTPResponse
 
+    #: Seconds a caller waits for a connection before an adaptive pool with
+    #: ``block=True`` grows.
+    ADAPTIVE_GROW_WAIT = 0.005
+
+    #: How often an adaptive pool releases room for connections it didn't
+    #: need, in seconds.
+    ADAPTIVE_SHRINK_INTERVAL = 30
+
     def __init__(
         self,
         host,
@@ -171,6 +230,13 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         retries=None,
         _proxy=None,
         _proxy_headers=None,
+        retry_budget=None,
+        circuit_breaker=None,
+        minsize=None,
+        max_overflow=0,
+        metrics=None,
+        slow_request_hook=None,
+        slow_request_thresholds=None,
         **conn_kw
     ):
         ConnectionPool.__init__(self, host, port)
@@ -186,20 +252,56 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
 
         self.timeout = timeout
         self.retries = retries
+        self.retry_budget = retry_budget
+        self.circuit_breaker = circuit_breaker
+        self.metrics = metrics
+
+        if slow_request_thresholds:
+            unknown = set(slow_request_thresholds) - set(
+                RequestTimings.PHASES + ("total",)
+            )
+            if unknown:
+                raise ValueError(
+                    "Unknown phases in slow_request_thresholds: %s"
+                    % ", ".join(sorted(unknown))
+                )
+        self.slow_request_hook = slow_request_hook
+        self.slow_request_thresholds = slow_request_thresholds or {}
+
+        if minsize is not None and not 1 <= minsize <= maxsize:
+            raise ValueError(
+                "minsize must be between 1 and maxsize (%d), got %r."
+                % (maxsize, minsize)
+            )
 
-        self.pool = self.QueueCls(maxsize)
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.max_overflow = max_overflow
+        self.pool = self.QueueCls(maxsize if minsize is None else minsize)
         self.block = block
 
         self.proxy = _proxy
         self.proxy_headers = _proxy_headers or {}
 
         # Fill the queue up so that doing get() on it will block properly
-        for _ in xrange(maxsize):
+        for _ in xrange(self.pool.maxsize):
             self.pool.put(None)
 
+        # Connections which were returned while the pool was full.
+        self._overflow = []
+
+        # Connections checked out, and the most checked out at once since the
+        # pool was last shrunk, for adaptive sizing.
+        self._size_lock = QtCore.QMutex()
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._shrunk_at = current_time()
+
         # These are mostly for testing and debugging purposes.
         self.num_connections = 0
         self.num_requests = 0
+        self.num_discarded = 0
+        self.wait_time = 0.0
         self.conn_kw = conn_kw
 
         if self.proxy:
@@ -229,7 +331,7 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         )
         return conn
 
-    def _get_conn(self, timeout=None):
+    def _get_conn(self, timeout=None, priority=0, deadline=None):
         """
         Get a connection. Will return a pooled connection if one is available.
 
@@ -240,10 +342,23 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             Seconds to wait before giving up and raising
             :class:`urllib3.exceptions.EmptyPoolError` if the pool is empty and
             :prop:`.block` is ``True``.
+
+        :param priority:
+            Callers waiting for a connection with a higher priority get one
+            first.
+
+        :param deadline:
+            The :func:`~urllib3.util.timeout.current_time` by which the caller
+            needs a connection. Among callers waiting with the same priority,
+            the earliest deadline goes first.
         """
         conn = None
+        start = current_time()
         try:
-            conn = self.pool.get(block=self.block, timeout=timeout)
+            if self.minsize is not None and self.block:
+                conn = self._wait_for_conn(timeout, priority, deadline)
+            else:
+                conn = self._pool_get(self.block, timeout, priority, deadline)
 
         except AttributeError:  # self.pool is None
             raise ClosedPoolError(self, "Pool is closed.")
@@ -256,6 +371,21 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
                 )
             pass  # Oh well, we'll create a new connection then
 
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.observe(self, "pool_wait_seconds", current_time() - start)
+
+        if self.minsize is not None:
+            with QtCore.QMutexLocker(self._size_lock):
+                self._in_use += 1
+                self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+        if conn is None and self._overflow:
+            try:
+                conn = self._overflow.pop()
+            except IndexError:  # Taken by another thread.
+                pass
+
         # If this is a persistent connection, check if it got disconnected
         if conn and is_connection_dropped(conn):
             log.debug("Resetting dropped connection: %s", self.host)
@@ -265,10 +395,15 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
                 # httplib._tunnel() and cannot be reused (since it would
                 # attempt to bypass the proxy)
                 conn = None
+            if metrics is not None:
+                metrics.inc(self, "connections_dropped")
+
+        if metrics is not None:
+            metrics.inc(self, "connections_reused" if conn else "connections_created")
 
         return conn or self._new_conn()
 
-    def _put_conn(self, conn):
+    def _put_conn(self, conn, checked_out=True):
         """
         Put a connection back into the pool.
 
@@ -276,25 +411,125 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             Connection object for the current host and port as returned by
             :meth:`._new_conn` or :meth:`._get_conn`.
 
-        If the pool is already full, the connection is closed and discarded
-        because we exceeded maxsize. If connections are discarded frequently,
-        then maxsize should be increased.
+        :param checked_out:
+            False when ``conn`` is a None put back after :meth:`._get_conn`
+            failed, so that it isn't counted as a connection coming back.
+
+        If the pool is already full, an adaptive pool grows to make room for
+        the connection. Otherwise it's kept in the overflow if there's room
+        for it there, or closed and discarded because we exceeded maxsize. If
+        connections are discarded frequently, then maxsize should be
+        increased.
 
         If the pool is closed, then the connection will be closed and discarded.
         """
         try:
-            self.pool.put(conn, block=False)
-            return  # Everything is dandy, done.
-        except AttributeError:
-            # self.pool is None.
-            pass
-        except queue.Full:
-            # This should never happen if self.block == True
-            log.warning("Connection pool is full, discarding connection: %s", self.host)
-
-        # Connection never got put back into the pool, close it.
-        if conn:
-            conn.close()
+            try:
+                self.pool.put(conn, block=False)
+                return  # Everything is dandy, done.
+            except AttributeError:
+                # self.pool is None.
+                pass
+            except queue.Full:
+                if conn and self.minsize is not None and self._grow(conn):
+                    return
+                if conn and len(self._overflow) < self.max_overflow:
+                    self._overflow.append(conn)
+                    return
+
+                # This should never happen if self.block == True
+                log.warning(
+                    "Connection pool is full, discarding connection: %s", self.host
+                )
+                self.num_discarded += 1
+                if self.metrics is not None:
+                    self.metrics.inc(self, "connections_discarded")
+
+            # Connection never got put back into the pool, close it.
+            if conn:
+                conn.close()
+
+        finally:
+            if self.minsize is not None and checked_out:
+                self._checked_in()
+
+    def _pool_get(self, block, timeout, priority, deadline):
+        """
+        Get a connection from :attr:`pool`. Only a
+        :class:`~urllib3.util.queue.LifoQueue` is given ``priority`` and
+        ``deadline``, so that other :attr:`QueueCls` still work.
+        """
+        if isinstance(self.pool, LifoQueue):
+            return self.pool.get(block, timeout, priority=priority, deadline=deadline)
+        return self.pool.get(block, timeout)
+
+    def _wait_for_conn(self, timeout, priority=0, deadline=None):
+        """
+        Get a connection from an adaptive pool with ``block=True``, growing
+        the pool if the wait is long.
+        """
+        start = current_time()
+        try:
+            if self.pool.maxsize < self.maxsize:
+                wait = self.ADAPTIVE_GROW_WAIT
+                if timeout is not None:
+                    wait = min(wait, timeout)
+                try:
+                    return self._pool_get(True, wait, priority, deadline)
+                except queue.Empty:
+                    self._grow()
+                    if timeout is not None:
+                        timeout = max(0, timeout - (current_time() - start))
+
+            return self._pool_get(True, timeout, priority, deadline)
+
+        finally:
+            with QtCore.QMutexLocker(self._size_lock):
+                self.wait_time += current_time() - start
+
+    def _grow(self, conn=None):
+        """
+        Make room for one more connection in an adaptive pool, holding
+        ``conn``. Returns False if the pool is already at ``maxsize``.
+        """
+        with QtCore.QMutexLocker(self._size_lock):
+            if self.pool is None or self.pool.maxsize >= self.maxsize:
+                return False
+            self.pool.grow(conn)
+            size = self.pool.maxsize
+
+        log.debug("Growing pool for %s to %d connections", self.host, size)
+        return True
+
+    def _checked_in(self):
+        """
+        Count a connection coming back to an adaptive pool, and release room
+        for the connections that weren't needed if it's time to.
+        """
+        removed = []
+        with QtCore.QMutexLocker(self._size_lock):
+            self._in_use -= 1
+            now = current_time()
+            if (
+                self.pool is None
+                or now - self._shrunk_at < self.ADAPTIVE_SHRINK_INTERVAL
+            ):
+                return
+
+            excess = self.pool.maxsize - max(self.minsize, self._peak_in_use)
+            if excess > 0:
+                removed = self.pool.shrink(excess)
+                removed.extend(self._overflow)
+                del self._overflow[:]
+            self._peak_in_use = self._in_use
+            self._shrunk_at = now
+            size = self.pool.maxsize
+
+        if removed:
+            log.debug("Shrinking pool for %s to %d connections", self.host, size)
+        for conn in removed:
+            if conn:
+                conn.close()
 
     def _validate_conn(self, conn):
         """
@@ -344,7 +579,14 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             )
 
     def _make_request(
-        self, conn, method, url, timeout=_Default, chunked=False, **httplib_request_kw
+        self,
+        conn,
+        method,
+        url,
+        timeout=_Default,
+        chunked=False,
+        timings=None,
+        **httplib_request_kw
     ):
         """
         Perform a request on a given urllib connection object taken from our
@@ -359,9 +601,17 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             the socket connect and the socket read, or an instance of
             :class:`urllib3.util.Timeout`, which gives you more fine-grained
             control over your timeouts.
+
+        :param timings:
+            :class:`~urllib3.util.timing.RequestTimings` to record how long
+            connecting and waiting for the response took in.
         """
         self.num_requests += 1
 
+        if timings is None:
+            timings = RequestTimings()
+        conn.timings = timings
+
         timeout_obj = self._get_timeout(timeout)
         timeout_obj.start_connect()
         conn.timeout = timeout_obj.connect_timeout
@@ -374,6 +624,10 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             self._raise_timeout(err=e, url=url, timeout_value=conn.timeout)
             raise
 
+        bytes_sent = getattr(conn, "bytes_sent", 0)
+        request_start = current_time()
+        setup = timings.setup
+
         # conn.request() calls httplib.*.request, not the method in
         # urllib3.request. It also calls makefile (recv) on the socket.
         if chunked:
@@ -381,6 +635,10 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         else:
             conn.request(method, url, **httplib_request_kw)
 
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.inc(self, "bytes_sent", getattr(conn, "bytes_sent", 0) - bytes_sent)
+
         # Reset the timeout for the recv() on the socket
         read_timeout = timeout_obj.read_timeout
 
@@ -417,6 +675,19 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             self._raise_timeout(err=e, url=url, timeout_value=read_timeout)
             raise
 
+        # Plain HTTP connections connect while sending the request.
+        timings.ttfb = current_time() - request_start - (timings.setup - setup)
+        if metrics is not None:
+            metrics.record_timings(self, timings)
+
+        self._log_response(conn, method, url, httplib_response)
+        return httplib_response
+
+    def _log_response(self, conn, method, url, httplib_response):
+        """
+        Log a response which has just been received, and warn about any
+        headers which couldn't be parsed.
+        """
         # AppEngine doesn't have a version attr.
         http_version = getattr(conn, "_http_vsn_str", "HTTP/?")
         log.debug(
@@ -441,8 +712,6 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
                 exc_info=True,
             )
 
-        return httplib_response
-
     def _absolute_url(self, path):
         return Url(scheme=self.scheme, host=self.host, port=self.port, path=path).url
 
@@ -464,6 +733,9 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         except queue.Empty:
             pass  # Done.
 
+        while self._overflow:
+            self._overflow.pop().close()
+
     def is_same_host(self, url):
         """
         Check if the given ``url`` is a member of the same host as this
@@ -499,6 +771,7 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         release_conn=None,
         chunked=False,
         body_pos=None,
+        priority=0,
         **response_kw
     ):
         """
@@ -587,6 +860,14 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             redirect. Typically this won't need to be set because urllib3 will
             auto-populate the value when needed.
 
+        :param int priority:
+            If the pool is set to block=True and all its connections are in
+            use, requests with a higher priority get the next free connection
+            first. Among requests with the same priority, the one with the
+            earliest deadline goes first, from the total ``timeout`` or else
+            ``pool_timeout``. Requests which wait long enough get served whatever
+            their priority.
+
         :param \\**response_kw:
             Additional parameters are passed to
             :meth:`urllib3.response.HTTPResponse.from_httplib`
@@ -600,23 +881,6 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         if release_conn is None:
             release_conn = response_kw.get("preload_content", True)
 
-        # Check host
-        if assert_same_host and not self.is_same_host(url):
-            raise HostChangedError(self, url, retries)
-
-        conn = None
-
-        # Track whether `conn` needs to be released before
-        # returning/raising/recursing. Update this variable if necessary, and
-        # leave `release_conn` constant throughout the function. That way, if
-        # the function recurses, the original value of `release_conn` will be
-        # passed down into the recursive call, and its value will be respected.
-        #
-        # See issue #651 [1] for details.
-        #
-        # [1] <https://github.com/shazow/urllib3/issues/651>
-        release_this_conn = release_conn
-
         # Merge the proxy headers. Only do this in HTTP. We have to copy the
         # headers dict so we can safely change it without those changes being
         # reflected in anyone else's copy.
@@ -624,137 +888,118 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             headers = headers.copy()
             headers.update(self.proxy_headers)
 
-        # Must keep the exception bound to a separate variable or else Python 3
-        # complains about UnboundLocalError.
-        err = None
-
-        # Keep track of whether we cleanly exited the except block. This
-        # ensures we do proper cleanup in finally.
-        clean_exit = False
+        if self.retry_budget is not None:
+            self.retry_budget.deposit()
+
+        # Each retry or redirect is another trip around this loop, rather than
+        # a recursive call, so that the stack doesn't grow with the number of
+        # attempts.
+        while True:
+            # Check host
+            if assert_same_host and not self.is_same_host(url):
+                raise HostChangedError(self, url, retries)
+
+            conn = None
+
+            # Track whether `conn` needs to be released before
+            # returning/raising/retrying. Update this variable if necessary,
+            # and leave `release_conn` constant throughout the function. That
+            # way, the original value of `release_conn` is respected by every
+            # attempt.
+            #
+            # See issue #651 [1] for details.
+            #
+            # [1] <https://github.com/shazow/urllib3/issues/651>
+            release_this_conn = release_conn
+
+            # Must keep the exception bound to a separate variable or else
+            # Python 3 complains about UnboundLocalError.
+            err = None
+
+            # Keep track of whether we cleanly exited the except block. This
+            # ensures we do proper cleanup in finally.
+            clean_exit = False
 
-        # Rewind body position, if needed. Record current position
-        # for future rewinds in the event of a redirect/retry.
-        body_pos = set_file_position(body, body_pos)
+            # Rewind body position, if needed. Record current position
+            # for future rewinds in the event of a redirect/retry.
+            body_pos = set_file_position(body, body_pos)
 
-        try:
-            # Request a connection from the queue.
-            timeout_obj = self._get_timeout(timeout)
-            conn = self._get_conn(timeout=pool_timeout)
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.before_request(self, url)
 
-            conn.timeout = timeout_obj.connect_timeout
+            attempt_start = current_time()
+            timings = RequestTimings()
+            checked_out = False
 
-            is_new_proxy_conn = self.proxy is not None and not getattr(
-                conn, "sock", None
-            )
-            if is_new_proxy_conn:
-                self._prepare_proxy(conn)
-
-            # Make the request on the httplib connection object.
-            httplib_response = self._make_request(
-                conn,
-                method,
-                url,
-                timeout=timeout_obj,
-                body=body,
-                headers=headers,
-                chunked=chunked,
-            )
+            try:
+                # Request a connection from the queue.
+                timeout_obj = self._get_timeout(timeout)
+                deadline = None
+                if timeout_obj.total is not None:
+                    deadline = attempt_start + timeout_obj.total
+                elif pool_timeout is not None:
+                    deadline = attempt_start + pool_timeout
+                conn = self._get_conn(
+                    timeout=pool_timeout, priority=priority, deadline=deadline
+                )
+                checked_out = True
+                timings.pool_wait = current_time() - attempt_start
 
-            # If we're going to release the connection in ``finally:``, then
-            # the response doesn't need to know about the connection. Otherwise
-            # it will also try to release it and we'll have a double-release
-            # mess.
-            response_conn = conn if not release_conn else None
-
-            # Pass method to Response for length checking
-            response_kw["request_method"] = method
-
-            # Import httplib's response into our own wrapper object
-            response = self.ResponseCls.from_httplib(
-                httplib_response,
-                pool=self,
-                connection=response_conn,
-                retries=retries,
-                **response_kw
-            )
+                conn.timeout = timeout_obj.connect_timeout
+                conn.timings = timings
 
-            # Everything went great!
-            clean_exit = True
+                is_new_proxy_conn = self.proxy is not None and not getattr(
+                    conn, "sock", None
+                )
+                if is_new_proxy_conn:
+                    self._prepare_proxy(conn)
+
+                # Make the request on the httplib connection object.
+                httplib_response = self._make_request(
+                    conn,
+                    method,
+                    url,
+                    timeout=timeout_obj,
+                    body=body,
+                    headers=headers,
+                    chunked=chunked,
+                    timings=timings,
+                )
 
-        except queue.Empty:
-            # Timed out by queue.
-            raise EmptyPoolError(self, "No pool connections are available.")
-
-        except (
-            TimeoutError,
-            HTTPException,
-            SocketError,
-            ProtocolError,
-            BaseSSLError,
-            SSLError,
-            CertificateError,
-        ) as e:
-            # Discard the connection for these exceptions. It will be
-            # replaced during the next _get_conn() call.
-            clean_exit = False
-            if isinstance(e, (BaseSSLError, CertificateError)):
-                e = SSLError(e)
-            elif isinstance(e, (SocketError, NewConnectionError)) and self.proxy:
-                e = ProxyError("Cannot connect to proxy.", e)
-            elif isinstance(e, (SocketError, HTTPException)):
-                e = ProtocolError("Connection aborted.", e)
-
-            retries = retries.increment(
-                method, url, error=e, _pool=self, _stacktrace=sys.exc_info()[2]
-            )
-            retries.sleep()
+                if self.metrics is not None:
+                    self.metrics.observe(
+                        self, "request_seconds", current_time() - attempt_start
+                    )
+
+                # If we're going to release the connection in ``finally:``,
+                # then the response doesn't need to know about the connection.
+                # Otherwise it will also try to release it and we'll have a
+                # double-release mess.
+                response_conn = conn if not release_conn else None
+
+                # Pass method to Response for length checking
+                response_kw["request_method"] = method
+                if response_kw.get("resumable"):
+                    # What the response needs to ask for the rest of its body.
+                    response_kw["resume_request"] = (method, url, headers, timeout)
+
+                # Import httplib's response into our own wrapper object
+                response = self.ResponseCls.from_httplib(
+                    httplib_response,
+                    pool=self,
+                    connection=response_conn,
+                    retries=retries,
+                    timings=timings,
+                    **response_kw
+                )
 
-            # Keep track of the error for the retry warning.
-            err = e
+                # Everything went great!
+                clean_exit = True
 
-        finally:
-            if not clean_exit:
-                # We hit some kind of exception, handled or otherwise. We need
-                # to throw the connection away unless explicitly told not to.
-                # Close the connection, set the variable to None, and make sure
-                # we put the None back in the pool to avoid leaking it.
-                conn = conn and conn.close()
-                release_this_conn = True
-
-            if release_this_conn:
-                # Put the connection back to be reused. If the connection is
-                # expired then it will be None, which will get replaced with a
-                # fresh connection during _get_conn.
-                self._put_conn(conn)
-
-        if not conn:
-            # Try again
-            log.warning(
-                "Retrying (%r) after connection " "broken by '%r': %s",
-                retries,
-                err,
-                url,
-            )
-            return self.urlopen(
-                method,
-                url,
-                body,
-                headers,
-                retries,
-                redirect,
-                assert_same_host,
-                timeout=timeout,
-                pool_timeout=pool_timeout,
-                release_conn=release_conn,
-                body_pos=body_pos,
-                **response_kw
-            )
+            except queue.Empty:
+                # Timed out by queue.
+                raise EmptyPoolError(self, "No pool connections are available.")
 
-        def drain_and_release_conn(response):
-            try:
-                # discard any remaining response body, the connection will be
-                # released back to the pool once the entire response is read
-                response.read()
             except (
                 TimeoutError,
                 HTTPException,
@@ -762,79 +1007,391 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
                 ProtocolError,
                 BaseSSLError,
                 SSLError,
-            ):
-                pass
+                CertificateError,
+            ) as e:
+                # Discard the connection for these exceptions. It will be
+                # replaced during the next _get_conn() call.
+                clean_exit = False
+                e = self._normalize_error(e)
+
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.after_request(self, error=e)
+
+                retries = retries.increment(
+                    method,
+                    url,
+                    error=e,
+                    _pool=self,
+                    _stacktrace=sys.exc_info()[2],
+                    _elapsed=current_time() - attempt_start,
+                    _timings=timings,
+                )
+                retries.sleep()
+
+                # Keep track of the error for the retry warning.
+                err = e
+
+            finally:
+                if not clean_exit:
+                    # We hit some kind of exception, handled or otherwise. We
+                    # need to throw the connection away unless explicitly told
+                    # not to. Close the connection, set the variable to None,
+                    # and make sure we put the None back in the pool to avoid
+                    # leaking it.
+                    conn = conn and conn.close()
+                    release_this_conn = True
+
+                if release_this_conn:
+                    # Put the connection back to be reused. If the connection
+                    # is expired then it will be None, which will get replaced
+                    # with a fresh connection during _get_conn.
+                    self._put_conn(conn, checked_out=checked_out)
+
+            if not conn:
+                # Try again
+                log.warning(
+                    "Retrying (%r) after connection " "broken by '%r': %s",
+                    retries,
+                    err,
+                    url,
+                )
+                continue
+
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.after_request(
+                    self, response, status_forcelist=retries.status_forcelist
+                )
+            self._check_slow_request(method, url, timings)
 
-        # Handle redirect?
+            # Handle redirect or retry?
+            try:
+                next_request = self._next_request(
+                    method,
+                    url,
+                    response,
+                    retries,
+                    redirect,
+                    elapsed=current_time() - attempt_start,
+                )
+            except MaxRetryError:
+                # Drain and release the connection for this response, since
+                # we're not returning it to be released manually.
+                _drain_and_release_conn(response)
+                raise
+
+            if next_request is None:
+                return response
+
+            # drain and return the connection to the pool before retrying
+            _drain_and_release_conn(response)
+
+            method, next_url, retries, is_redirect = next_request
+            if is_redirect:
+                retries.sleep_for_retry(response)
+                log.debug("Redirecting %s -> %s", url, next_url)
+            else:
+                retries.sleep(response)
+                log.debug("Retry: %s", url)
+            url = next_url
+
+    def _check_slow_request(self, method, url, timings):
+        """
+        Call :attr:`slow_request_hook` if ``timings`` exceed any of the
+        :attr:`slow_request_thresholds`.
+        """
+        if self.slow_request_hook is None:
+            return
+        exceeded = timings.exceeded(self.slow_request_thresholds)
+        if exceeded:
+            self.slow_request_hook(self, method, url, timings, exceeded)
+
+    def _normalize_error(self, e):
+        """
+        Convert a low-level exception raised while making a request into the
+        urllib3 exception it should be retried or raised as.
+        """
+        if isinstance(e, (BaseSSLError, CertificateError)):
+            return SSLError(e)
+        if isinstance(e, (SocketError, NewConnectionError)) and self.proxy:
+            return ProxyError("Cannot connect to proxy.", e)
+        if isinstance(e, (SocketError, HTTPException)):
+            return ProtocolError("Connection aborted.", e)
+        return e
+
+    def _next_request(self, method, url, response, retries, redirect, elapsed=None):
+        """
+        Decide whether a response is to be followed by a redirect or a retry.
+
+        Returns None if ``response`` should be returned to the caller.
+        Otherwise returns the ``(method, url, retries, is_redirect)`` of the
+        next request, which should be made once ``response`` has been drained.
+        Raises :class:`~urllib3.exceptions.MaxRetryError` if the retries are
+        exhausted and should be raised.
+
+        ``elapsed`` is the time the attempt which got ``response`` took, which
+        is recorded in the retry history.
+        """
         redirect_location = redirect and response.get_redirect_location()
         if redirect_location:
             if response.status == 303:
                 method = "GET"
 
             try:
-                retries = retries.increment(method, url, response=response, _pool=self)
+                retries = retries.increment(
+                    method, url, response=response, _pool=self, _elapsed=elapsed
+                )
             except MaxRetryError:
                 if retries.raise_on_redirect:
-                    # Drain and release the connection for this response, since
-                    # we're not returning it to be released manually.
-                    drain_and_release_conn(response)
                     raise
-                return response
+                return None
 
-            # drain and return the connection to the pool before recursing
-            drain_and_release_conn(response)
-
-            retries.sleep_for_retry(response)
-            log.debug("Redirecting %s -> %s", url, redirect_location)
-            return self.urlopen(
-                method,
-                redirect_location,
-                body,
-                headers,
-                retries=retries,
-                redirect=redirect,
-                assert_same_host=assert_same_host,
-                timeout=timeout,
-                pool_timeout=pool_timeout,
-                release_conn=release_conn,
-                body_pos=body_pos,
-                **response_kw
-            )
+            return method, redirect_location, retries, True
 
         # Check if we should retry the HTTP response.
         has_retry_after = bool(response.getheader("Retry-After"))
         if retries.is_retry(method, response.status, has_retry_after):
             try:
-                retries = retries.increment(method, url, response=response, _pool=self)
+                retries = retries.increment(
+                    method, url, response=response, _pool=self, _elapsed=elapsed
+                )
             except MaxRetryError:
                 if retries.raise_on_status:
-                    # Drain and release the connection for this response, since
-                    # we're not returning it to be released manually.
-                    drain_and_release_conn(response)
                     raise
-                return response
+                return None
+
+            return method, url, retries, False
 
-            # drain and return the connection to the pool before recursing
-            drain_and_release_conn(response)
-
-            retries.sleep(response)
-            log.debug("Retry: %s", url)
-            return self.urlopen(
-                method,
-                url,
-                body,
-                headers,
-                retries=retries,
-                redirect=redirect,
-                assert_same_host=assert_same_host,
-                timeout=timeout,
-                pool_timeout=pool_timeout,
-                release_conn=release_conn,
-                body_pos=body_pos,
-                **response_kw
+        return None
+
+    def pipeline(
+        self,
+        requests,
+        headers=None,
+        retries=None,
+        assert_same_host=True,
+        timeout=_Default,
+        pool_timeout=None,
+        depth=10,
+        **response_kw
+    ):
+        """
+        Send several idempotent requests over one connection using HTTP/1.1
+        pipelining, and return their responses in the order they were given.
+
+        Up to ``depth`` requests are written to the socket before any of the
+        responses are read back, which saves a round trip per request. The
+        responses are always preloaded, since a response can only be parsed
+        once the body of the one before it has been consumed.
+
+        If the server closes the connection part way through the pipeline
+        (because it limits the number of requests per connection, or doesn't
+        support pipelining at all), the requests which didn't get a response
+        are sent again on a fresh connection. This only counts against
+        ``retries`` when the broken connection produced no response at all.
+
+        :param requests:
+            Iterable of ``(method, url)`` or ``(method, url, headers)`` tuples.
+            Only methods in :attr:`Retry.DEFAULT_METHOD_WHITELIST` can be
+            pipelined, and the requests can't have a body.
+
+        :param headers:
+            Headers for the requests which don't provide their own. If None,
+            pool headers are used.
+
+        :param retries:
+            Same as for :meth:`urlopen`, except that redirects are never
+            followed.
+
+        :param assert_same_host:
+            Same as for :meth:`urlopen`.
+
+        :param timeout:
+            Same as for :meth:`urlopen`, applied to each connection used.
+
+        :param pool_timeout:
+            Same as for :meth:`urlopen`.
+
+        :param depth:
+            Maximum number of requests in flight on the connection at once.
+
+        :param \\**response_kw:
+            Additional parameters are passed to
+            :meth:`urllib3.response.HTTPResponse.from_httplib`
+
+        :return: A list of :class:`urllib3.response.HTTPResponse`.
+        """
+        if headers is None:
+            headers = self.headers
+
+        if not isinstance(retries, Retry):
+            retries = Retry.from_int(retries, redirect=False, default=self.retries)
+
+        if depth < 1:
+            raise ValueError("Pipeline depth must be at least 1, got %r." % depth)
+
+        pending = collections.deque()
+        for request in requests:
+            method, url = request[0].upper(), request[1]
+            request_headers = request[2] if len(request) > 2 else headers
+
+            if method not in Retry.DEFAULT_METHOD_WHITELIST:
+                raise ValueError("Can't pipeline non-idempotent method %r." % method)
+
+            if assert_same_host and not self.is_same_host(url):
+                raise HostChangedError(self, url, retries)
+
+            if self.scheme == "http":
+                request_headers = request_headers.copy()
+                request_headers.update(self.proxy_headers)
+
+            _validate_pipelined_request(method, url, request_headers)
+            pending.append((method, url, request_headers))
+
+        if self.retry_budget is not None:
+            self.retry_budget.deposit(len(pending))
+
+        response_kw["preload_content"] = True
+        responses = []
+
+        while pending:
+            batch = list(itertools.islice(pending, depth))
+            received = []
+            reusable = False
+            err = None
+            conn = None
+            checked_out = False
+
+            try:
+                conn = self._get_conn(timeout=pool_timeout)
+                checked_out = True
+                reusable = self._pipeline_batch(
+                    conn, batch, timeout, retries, received, response_kw
+                )
+
+            except queue.Empty:
+                # Timed out by queue.
+                raise EmptyPoolError(self, "No pool connections are available.")
+
+            except (
+                TimeoutError,
+                HTTPException,
+                SocketError,
+                ProtocolError,
+                BaseSSLError,
+                SSLError,
+                CertificateError,
+            ) as e:
+                e = self._normalize_error(e)
+
+                # The server hung up after answering part of the batch: send
+                # the rest again on a new connection without spending a retry.
+                if not received:
+                    method, url = batch[0][:2]
+                    retries = retries.increment(
+                        method, url, error=e, _pool=self, _stacktrace=sys.exc_info()[2]
+                    )
+                    retries.sleep()
+                err = e
+
+            finally:
+                if not reusable:
+                    conn = conn and conn.close()
+                self._put_conn(conn, checked_out=checked_out)
+
+            responses.extend(received)
+            for _ in received:
+                pending.popleft()
+
+            if pending and err is not None:
+                log.warning(
+                    "Retrying (%r) pipeline after connection broken by '%r': %s",
+                    retries,
+                    err,
+                    pending[0][1],
+                )
+
+        return responses
+
+    def _pipeline_batch(self, conn, batch, timeout, retries, received, response_kw):
+        """
+        Write every request in ``batch`` to ``conn``, then read the responses
+        back into ``received``.
+
+        Stops early if the server announces it will close the connection.
+        Returns whether ``conn`` can be put back into the pool for reuse.
+        """
+        url = batch[0][1]
+        timeout_obj = self._get_timeout(timeout)
+        timeout_obj.start_connect()
+        conn.timeout = timeout_obj.connect_timeout
+
+        try:
+            self._validate_conn(conn)
+        except (SocketTimeout, BaseSSLError) as e:
+            self._raise_timeout(err=e, url=url, timeout_value=conn.timeout)
+            raise
+
+        if not getattr(conn, "sock", None):
+            conn.connect()
+
+        self.num_requests += len(batch)
+        conn.sock.sendall(
+            b"".join(
+                _encode_pipelined_request(conn, method, request_url, headers)
+                for method, request_url, headers in batch
             )
+        )
+
+        read_timeout = timeout_obj.read_timeout
+        if read_timeout == 0:
+            raise ReadTimeoutError(
+                self, url, "Read timed out. (read timeout=%s)" % read_timeout
+            )
+        if read_timeout is Timeout.DEFAULT_TIMEOUT:
+            conn.sock.settimeout(socket.getdefaulttimeout())
+        else:  # None or a value
+            conn.sock.settimeout(read_timeout)
+
+        fp = conn.sock.makefile("rb")
+        try:
+            reader = _PipelineReader(fp)
+            for method, request_url, _ in batch:
+                httplib_response = conn.response_class(reader, method=method)
+                try:
+                    httplib_response.begin()
+                except (SocketTimeout, BaseSSLError, SocketError) as e:
+                    self._raise_timeout(
+                        err=e, url=request_url, timeout_value=read_timeout
+                    )
+                    raise
+
+                log.debug(
+                    '%s://%s:%s "%s %s (pipelined)" %s %s',
+                    self.scheme,
+                    self.host,
+                    self.port,
+                    method,
+                    request_url,
+                    httplib_response.status,
+                    httplib_response.length,
+                )
 
-        return response
+                received.append(
+                    self.ResponseCls.from_httplib(
+                        httplib_response,
+                        pool=self,
+                        retries=retries,
+                        request_method=method,
+                        **response_kw
+                    )
+                )
+
+                if httplib_response.will_close:
+                    return False
+        finally:
+            fp.close()
+
+        return True
 
 
 class HTTPSConnectionPool(HTTPConnectionPool):
@@ -1021,6 +1578,22 @@ def connection_from_url(url, **kw):
         return HTTPConnectionPool(host, port=port, **kw)
 
 
+def _drain_and_release_conn(response):
+    try:
+        # discard any remaining response body, the connection will be
+        # released back to the pool once the entire response is read
+        response.read()
+    except (
+        TimeoutError,
+        HTTPException,
+        SocketError,
+        ProtocolError,
+        BaseSSLError,
+        SSLError,
+    ):
+        pass
+
+
 def _normalize_host(host, scheme):
     """
     Normalize hosts for comparisons and use with sockets.
@@ -1037,3 +1610,82 @@ def _normalize_host(host, scheme):
     if scheme in NORMALIZABLE_SCHEMES:
         host = normalize_host(host)
     return host
+
+
+# The same checks httplib applies in putrequest() and putheader(), which the
+# pipelined requests bypass.
+_DISALLOWED_METHOD_CHARS = re.compile(u"[\x00-\x1f]")
+_DISALLOWED_URL_CHARS = re.compile(u"[\x00-\x20\x7f]")
+_LEGAL_HEADER_NAME = re.compile(u"[^:\\s][^:\r\n]*\\Z")
+_ILLEGAL_HEADER_VALUE = re.compile(u"\n(?![ \t])|\r(?![ \t\n])")
+
+
+def _validate_pipelined_request(method, url, headers):
+    """
+    Reject a method, URL or header that would let a pipelined request inject
+    extra headers or requests into the stream.
+    """
+    if _DISALLOWED_METHOD_CHARS.search(method):
+        raise ValueError("Method can't contain control characters: %r" % method)
+    if _DISALLOWED_URL_CHARS.search(url):
+        raise ValueError("URL can't contain control characters: %r" % url)
+
+    for name, value in headers.items():
+        if isinstance(name, six.binary_type):
+            name = name.decode("latin-1")
+        if isinstance(value, six.binary_type):
+            value = value.decode("latin-1")
+        if not _LEGAL_HEADER_NAME.match(name):
+            raise ValueError("Invalid header name %r" % name)
+        if _ILLEGAL_HEADER_VALUE.search(six.text_type(value)):
+            raise ValueError("Invalid header value %r" % value)
+
+
+def _encode_pipelined_request(conn, method, url, headers):
+    """
+    Serialize a request without a body the same way
+    :meth:`httplib.HTTPConnection.request` would, so that several of them can
+    be written to the socket back to back.
+    """
+    header_names = set(name.lower() for name in headers)
+    lines = ["%s %s HTTP/1.1" % (method, url)]
+
+    if "host" not in header_names:
+        host = conn.host
+        if ":" in host:
+            host = "[%s]" % host
+        if conn.port and conn.port != conn.default_port:
+            host = "%s:%s" % (host, conn.port)
+        lines.append("Host: %s" % host)
+
+    if "accept-encoding" not in header_names:
+        lines.append("Accept-Encoding: identity")
+
+    for name, value in headers.items():
+        if isinstance(value, six.binary_type):
+            value = value.decode("latin-1")
+        lines.append("%s: %s" % (name, value))
+
+    lines.append("\r\n")
+    return "\r\n".join(lines).encode("latin-1")
+
+
+class _PipelineReader(QObject):
+    """
+    Stands in for the socket of every response read back from a pipeline, so
+    they all share one buffered reader: bytes read ahead while parsing one
+    response are still there for the next one. Closing the reader is left to
+    :meth:`HTTPConnectionPool.pipeline`.
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+    def makefile(self, *args, **kwargs):
+        return self
+
+    def close(self):
+        pass
@@ -0,0 +1,1229 @@
+"""
+This module provides an :mod:`asyncio` front-end to urllib3, for Python 3.5
+and newer. It talks HTTP/1.1 over asyncio streams, but otherwise uses the
+same machinery as the rest of urllib3: :class:`~urllib3.util.retry.Retry`,
+:class:`~urllib3.util.timeout.Timeout`, pool keys, redirect handling and
+content decoding all behave exactly as they do for
+:class:`~urllib3.poolmanager.PoolManager`.
+
+Every method which does I/O is a coroutine::
+
+    from urllib3.contrib.aio import AsyncPoolManager
+
+    async def main():
+        async with AsyncPoolManager() as http:
+            r = await http.request("GET", "http://example.com/")
+            print(r.status, r.data)
+
+Bodies can be streamed with ``async for``, by passing
+``preload_content=False`` and iterating over
+:meth:`AsyncHTTPResponse.stream`::
+
+    r = await http.request("GET", url, preload_content=False)
+    async for chunk in r.stream(2 ** 16):
+        handle(chunk)
+    r.release_conn()
+
+Connections are pooled in an :class:`asyncio.LifoQueue`, so with
+``block=True`` tasks wait for a free connection without blocking the event
+loop. Pools and managers are not thread-safe; use them from the thread
+running their event loop.
+
+Proxies are not supported.
+"""
+from __future__ import absolute_import
+
+import asyncio
+import io
+import logging
+import os
+import socket
+import sys
+import warnings
+from socket import error as SocketError, timeout as SocketTimeout
+
+from PyQt5.QtCore import QObject
+
+from ..connection import BaseSSLError, HTTPConnection, HTTPException, _match_hostname
+from ..connectionpool import (
+    HTTPConnectionPool,
+    HTTPSConnectionPool,
+    _Default,
+    _validate_pipelined_request,
+)
+from ..exceptions import (
+    ClosedPoolError,
+    ConnectTimeoutError,
+    EmptyPoolError,
+    HostChangedError,
+    MaxRetryError,
+    NewConnectionError,
+    ProtocolError,
+    ReadTimeoutError,
+    SSLError,
+    SubjectAltNameWarning,
+    TimeoutError,
+)
+from ..packages.six.moves import http_client as httplib
+from ..packages.ssl_match_hostname import CertificateError
+from ..batch import BatchResult, _host_key
+from ..poolmanager import BasePoolManager
+from ..response import HTTPResponse
+from ..util.request import set_file_position
+from ..util.retry import Retry
+from ..util.ssl_ import (
+    assert_fingerprint,
+    create_urllib3_context,
+    resolve_cert_reqs,
+    resolve_ssl_version,
+)
+from ..util.timeout import Timeout, current_time
+from ..util.timing import RequestTimings
+from ..util.url import parse_url
+
+try:
+    import ssl
+except ImportError:
+    ssl = None
+
+
+__all__ = [
+    "AsyncHTTPConnection",
+    "AsyncHTTPSConnection",
+    "AsyncHTTPResponse",
+    "AsyncHTTPConnectionPool",
+    "AsyncHTTPSConnectionPool",
+    "AsyncPoolManager",
+]
+
+log = logging.getLogger(__name__)
+
+# Same limits as http.client.
+_MAXLINE = 65536
+_MAXHEADERS = 100
+
+_METHODS_EXPECTING_BODY = {"PATCH", "POST", "PUT"}
+
+
+def _resolve_timeout(timeout):
+    if timeout is Timeout.DEFAULT_TIMEOUT:
+        return socket.getdefaulttimeout()
+    return timeout
+
+
+async def _with_timeout(coro, timeout):
+    """
+    Await ``coro``, raising :class:`socket.timeout` like a blocking socket
+    would if it takes longer than ``timeout`` seconds.
+    """
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        raise SocketTimeout("timed out")
+
+
+def _iter_body(body, blocksize=16384):
+    """
+    Turn any request body accepted by ``urlopen`` into an iterator of bytes.
+    """
+    if isinstance(body, (bytes, str)):
+        body = (body,)
+    elif hasattr(body, "read"):
+        body = iter(lambda: body.read(blocksize), b"")
+
+    for chunk in body:
+        if not chunk:
+            continue
+        if isinstance(chunk, str):
+            chunk = chunk.encode("iso-8859-1")
+        yield chunk
+
+
+class AsyncHTTPConnection(QObject):
+    """
+    An HTTP/1.1 connection over :func:`asyncio.open_connection`, with the
+    parts of the :class:`~urllib3.connection.HTTPConnection` interface that
+    :class:`AsyncHTTPConnectionPool` needs. Methods which do I/O are
+    coroutines.
+
+    ``timeout`` applies to connecting and sending the request, and
+    :attr:`read_timeout` to receiving the response.
+    """
+
+    default_port = 80
+    scheme = "http"
+
+    #: Disable Nagle's algorithm by default, like
+    #: :class:`~urllib3.connection.HTTPConnection`.
+    default_socket_options = HTTPConnection.default_socket_options
+
+    _http_vsn_str = "HTTP/1.1"
+
+    #: :class:`~urllib3.util.timing.RequestTimings` of the request being
+    #: made, which connecting adds to.
+    timings = None
+
+    def __init__(
+        self,
+        host,
+        port=None,
+        timeout=Timeout.DEFAULT_TIMEOUT,
+        strict=None,
+        source_address=None,
+        socket_options=None,
+    ):
+        self.host = host
+        self.port = port or self.default_port
+        self.timeout = timeout
+        self.source_address = source_address
+
+        #: The socket options to set once connected.
+        self.socket_options = (
+            self.default_socket_options if socket_options is None else socket_options
+        )
+
+        #: Seconds to wait for each part of the response, set by the pool.
+        self.read_timeout = None
+
+        #: Bytes sent over this connection.
+        self.bytes_sent = 0
+
+        self._reader = None
+        self._writer = None
+        self._method = None
+
+    @property
+    def sock(self):
+        """
+        The connected socket, or None.
+        """
+        if self._writer is None:
+            return None
+        return self._writer.get_extra_info("socket")
+
+    def is_dropped(self):
+        """
+        Whether the server has closed this idle connection, so it must be
+        reconnected before use.
+        """
+        return (
+            self._writer is None
+            or self._writer.is_closing()
+            or self._reader.at_eof()
+            or bool(self._reader._buffer)
+        )
+
+    def _open_connection_kw(self):
+        kw = {}
+        if self.source_address:
+            kw["local_addr"] = self.source_address
+        return kw
+
+    async def connect(self):
+        start = current_time()
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    self.host, self.port, limit=_MAXLINE, **self._open_connection_kw()
+                ),
+                _resolve_timeout(self.timeout),
+            )
+        except asyncio.TimeoutError:
+            raise ConnectTimeoutError(
+                self,
+                "Connection to %s timed out. (connect timeout=%s)"
+                % (self.host, self.timeout),
+            )
+        except (BaseSSLError, CertificateError):
+            raise
+        except SocketError as e:
+            raise NewConnectionError(
+                self, "Failed to establish a new connection: %s" % e
+            )
+
+        # Includes resolving the host name and the TLS handshake, which
+        # asyncio does as part of opening the connection.
+        if self.timings is not None:
+            self.timings.add("connect", current_time() - start)
+
+        sock = self.sock
+        if sock is not None:
+            for opt in self.socket_options:
+                sock.setsockopt(*opt)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    def _host_header(self):
+        host = self.host
+        if ":" in host:
+            host = "[%s]" % host
+        if self.port != self.default_port:
+            host = "%s:%s" % (host, self.port)
+        return host
+
+    async def request(self, method, url, body=None, headers=None, chunked=False):
+        """
+        Send a request. ``body`` may be bytes, str, a file-like object or an
+        iterable of bytes; the latter two are sent with chunked encoding
+        unless a Content-Length is given.
+        """
+        headers = dict(headers or {})
+        _validate_pipelined_request(method, url, headers)
+
+        if self._writer is None:
+            await self.connect()
+
+        names = set(name.lower() for name in headers)
+        if "host" not in names:
+            headers["Host"] = self._host_header()
+        if "accept-encoding" not in names:
+            headers["Accept-Encoding"] = "identity"
+
+        if isinstance(body, str):
+            body = body.encode("iso-8859-1")
+        if body is not None and not isinstance(body, bytes):
+            chunked = chunked or "content-length" not in names
+
+        if chunked:
+            if "transfer-encoding" not in names:
+                headers["Transfer-Encoding"] = "chunked"
+        elif "content-length" not in names:
+            if body is not None:
+                headers["Content-Length"] = str(len(body))
+            elif method.upper() in _METHODS_EXPECTING_BODY:
+                headers["Content-Length"] = "0"
+
+        lines = ["%s %s %s" % (method, url, self._http_vsn_str)]
+        for name, value in headers.items():
+            if isinstance(value, bytes):
+                value = value.decode("latin-1")
+            lines.append("%s: %s" % (name, value))
+        self._write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        self._method = method
+
+        if body is not None:
+            for chunk in _iter_body(body):
+                if chunked:
+                    chunk = b"%x\r\n%s\r\n" % (len(chunk), chunk)
+                self._write(chunk)
+                await self._drain()
+            if chunked:
+                self._write(b"0\r\n\r\n")
+
+        await self._drain()
+
+    def _write(self, data):
+        self._writer.write(data)
+        self.bytes_sent += len(data)
+
+    async def _drain(self):
+        await _with_timeout(self._writer.drain(), _resolve_timeout(self.timeout))
+
+    async def getresponse(self):
+        """
+        Read the status line and headers of the response, and return an
+        object with the interface of :class:`httplib.HTTPResponse` whose
+        ``read()`` is a coroutine.
+        """
+        while True:
+            status_line = await self._readline()
+            if not status_line:
+                raise httplib.RemoteDisconnected(
+                    "Remote end closed connection without response"
+                )
+
+            version, status, reason = _parse_status_line(status_line)
+
+            header_lines = []
+            while True:
+                line = await self._readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                header_lines.append(line)
+                if len(header_lines) > _MAXHEADERS:
+                    raise httplib.HTTPException(
+                        "got more than %d headers" % _MAXHEADERS
+                    )
+
+            # Skip interim responses, like http.client does.
+            if status != 100:
+                break
+
+        msg = httplib.parse_headers(io.BytesIO(b"".join(header_lines) + b"\r\n"))
+        return _RawResponse(self, self._method, version, status, reason, msg)
+
+    async def _readline(self):
+        try:
+            line = await _with_timeout(self._reader.readline(), self.read_timeout)
+        except ValueError:
+            raise httplib.LineTooLong("header line")
+        return line
+
+    async def _read(self, amt):
+        return await _with_timeout(self._reader.read(amt), self.read_timeout)
+
+    async def _readexactly(self, amt):
+        try:
+            return await _with_timeout(self._reader.readexactly(amt), self.read_timeout)
+        except asyncio.IncompleteReadError as e:
+            raise httplib.IncompleteRead(e.partial, amt - len(e.partial))
+
+
+def _parse_status_line(line):
+    try:
+        parts = line.decode("iso-8859-1").rstrip("\r\n").split(None, 2)
+    except UnicodeDecodeError:
+        raise httplib.BadStatusLine(line)
+
+    if len(parts) == 2:
+        parts.append("")
+    if len(parts) != 3 or not parts[0].startswith("HTTP/"):
+        raise httplib.BadStatusLine(line)
+
+    version, status, reason = parts
+    try:
+        status = int(status)
+    except ValueError:
+        raise httplib.BadStatusLine(line)
+    if not 100 <= status <= 999:
+        raise httplib.BadStatusLine(line)
+
+    version = 10 if version == "HTTP/1.0" else 11
+    return version, status, reason.strip()
+
+
+class _RawResponse(QObject):
+    """
+    The response to a request on an :class:`AsyncHTTPConnection`, framed
+    like :class:`httplib.HTTPResponse` frames it, except that :meth:`read` is
+    a coroutine. It is wrapped by :class:`AsyncHTTPResponse` like an
+    :class:`httplib.HTTPResponse` is wrapped by
+    :class:`~urllib3.response.HTTPResponse`.
+    """
+
+    strict = 0
+
+    def __init__(self, conn, method, version, status, reason, msg):
+        self._conn = conn
+        self._method = method
+        self.version = version
+        self.status = status
+        self.reason = reason
+        self.msg = msg
+
+        self.chunked = msg.get("transfer-encoding", "").lower() == "chunked"
+        self.will_close = _will_close(version, msg)
+        self._chunk_left = None
+
+        self.length = None
+        if not self.chunked:
+            try:
+                self.length = int(msg.get("content-length"))
+            except (TypeError, ValueError):
+                pass
+            else:
+                if self.length < 0:
+                    self.length = None
+
+        if status in (204, 304) or 100 <= status < 200 or method == "HEAD":
+            self.length = 0
+
+        if not self.will_close and not self.chunked and self.length is None:
+            self.will_close = True
+
+        self._closed = False
+        if self.length == 0:
+            self._finish()
+
+    def isclosed(self):
+        return self._closed
+
+    def close(self):
+        """
+        Stop reading the response. The connection can't be reused if the
+        response hasn't been read to the end.
+        """
+        if not self._closed:
+            self._closed = True
+            self._conn.close()
+
+    def _finish(self):
+        self._closed = True
+        if self.will_close:
+            self._conn.close()
+
+    async def read(self, amt=None):
+        if self._closed:
+            return b""
+
+        if self.chunked:
+            return await self._read_chunked(amt)
+
+        if self.length is None:
+            data = await self._conn._read(-1 if amt is None else amt)
+            if amt is None or not data:
+                self._finish()
+            return data
+
+        if amt is None or amt >= self.length:
+            data = await self._conn._readexactly(self.length)
+        else:
+            data = await self._conn._read(amt)
+            if not data:
+                raise httplib.IncompleteRead(b"", self.length)
+
+        self.length -= len(data)
+        if not self.length:
+            self._finish()
+        return data
+
+    async def _read_chunked(self, amt):
+        chunks = []
+        while amt is None or amt > 0:
+            if not self._chunk_left:
+                line = await self._conn._readline()
+                try:
+                    self._chunk_left = int(line.split(b";", 1)[0], 16)
+                except ValueError:
+                    self.close()
+                    raise httplib.IncompleteRead(b"".join(chunks))
+
+                if not self._chunk_left:
+                    # Last chunk: skip over any trailers.
+                    while line not in (b"\r\n", b"\n", b""):
+                        line = await self._conn._readline()
+                    self._finish()
+                    break
+
+            size = self._chunk_left if amt is None else min(amt, self._chunk_left)
+            chunks.append(await self._conn._readexactly(size))
+            self._chunk_left -= size
+            if amt is not None:
+                amt -= size
+            if not self._chunk_left:
+                await self._conn._readexactly(2)  # CRLF after the chunk
+
+        return b"".join(chunks)
+
+
+def _will_close(version, msg):
+    connection = msg.get("connection", "").lower()
+    if version == 11:
+        return "close" in connection
+    return "keep-alive" not in connection and not msg.get("keep-alive")
+
+
+class AsyncHTTPResponse(HTTPResponse):
+    """
+    :class:`~urllib3.response.HTTPResponse` whose body is read with
+    coroutines. Decoding and error handling are shared with
+    :class:`~urllib3.response.HTTPResponse`.
+
+    When the body isn't preloaded, :attr:`data` is None until the body has
+    been read with ``await response.read(cache_content=True)``.
+    """
+
+    @property
+    def data(self):
+        return self._body
+
+    async def read(self, amt=None, decode_content=None, cache_content=False):
+        """
+        Same as :meth:`urllib3.response.HTTPResponse.read`, as a coroutine.
+        """
+        self._init_decoder()
+        if decode_content is None:
+            decode_content = self.decode_content
+
+        if self._fp is None:
+            return
+
+        if amt is not None:
+            cache_content = False
+
+        start = current_time()
+        with self._error_catcher():
+            data = await self._fp.read(amt)
+        self.timings.add("download", current_time() - start)
+
+        # The raw response enforces Content-Length itself, and closes once it
+        # has returned the whole body.
+        flush_decoder = self._fp.isclosed()
+        if data or flush_decoder:
+            self._fp_bytes_read += len(data)
+            self._record_received(len(data))
+            if self.length_remaining is not None:
+                self.length_remaining -= len(data)
+
+            data = self._decode(data, decode_content, flush_decoder)
+
+            if cache_content:
+                self._body = data
+
+        return data
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        """
+        Asynchronous iterator over the body, in pieces of up to ``amt`` bytes.
+        Use with ``async for``.
+        """
+        return _ResponseStream(self, amt, decode_content)
+
+    async def drain_conn(self):
+        """
+        Read and discard the rest of the body, so that the connection can go
+        back to the pool.
+        """
+        try:
+            await self.read()
+        except (
+            TimeoutError,
+            HTTPException,
+            SocketError,
+            ProtocolError,
+            BaseSSLError,
+            SSLError,
+        ):
+            pass
+
+    async def _preload(self):
+        self._body = await self.read(decode_content=self.decode_content)
+
+    def __aiter__(self):
+        return self.stream()
+
+
+class _ResponseStream(QObject):
+    def __init__(self, response, amt, decode_content):
+        self._response = response
+        self._amt = amt
+        self._decode_content = decode_content
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._response.isclosed():
+            data = await self._response.read(
+                amt=self._amt, decode_content=self._decode_content
+            )
+            if data:
+                return data
+        raise StopAsyncIteration
+
+
+class AsyncHTTPSConnection(AsyncHTTPConnection):
+    """
+    :class:`AsyncHTTPConnection` over TLS, verified like
+    :class:`~urllib3.connection.VerifiedHTTPSConnection`.
+    """
+
+    default_port = 443
+    scheme = "https"
+
+    cert_reqs = None
+    ca_certs = None
+    ca_cert_dir = None
+    ssl_version = None
+    assert_hostname = None
+    assert_fingerprint = None
+
+    def __init__(
+        self,
+        host,
+        port=None,
+        key_file=None,
+        cert_file=None,
+        key_password=None,
+        strict=None,
+        timeout=Timeout.DEFAULT_TIMEOUT,
+        ssl_context=None,
+        server_hostname=None,
+        **kw
+    ):
+        AsyncHTTPConnection.__init__(
+            self, host, port, strict=strict, timeout=timeout, **kw
+        )
+
+        self.key_file = key_file
+        self.cert_file = cert_file
+        self.key_password = key_password
+        self.ssl_context = ssl_context
+        self.server_hostname = server_hostname
+        self.is_verified = False
+
+    def set_cert(
+        self,
+        key_file=None,
+        cert_file=None,
+        cert_reqs=None,
+        key_password=None,
+        ca_certs=None,
+        assert_hostname=None,
+        assert_fingerprint=None,
+        ca_cert_dir=None,
+    ):
+        """
+        This method should only be called once, before the connection is used.
+        """
+        if cert_reqs is None:
+            if self.ssl_context is not None:
+                cert_reqs = self.ssl_context.verify_mode
+            else:
+                cert_reqs = resolve_cert_reqs(None)
+
+        self.key_file = key_file
+        self.cert_file = cert_file
+        self.cert_reqs = cert_reqs
+        self.key_password = key_password
+        self.assert_hostname = assert_hostname
+        self.assert_fingerprint = assert_fingerprint
+        self.ca_certs = ca_certs and os.path.expanduser(ca_certs)
+        self.ca_cert_dir = ca_cert_dir and os.path.expanduser(ca_cert_dir)
+
+    def _get_ssl_context(self):
+        default_ssl_context = False
+        if self.ssl_context is None:
+            default_ssl_context = True
+            self.ssl_context = create_urllib3_context(
+                ssl_version=resolve_ssl_version(self.ssl_version),
+                cert_reqs=resolve_cert_reqs(self.cert_reqs),
+            )
+
+        context = self.ssl_context
+        context.verify_mode = resolve_cert_reqs(self.cert_reqs)
+
+        try:
+            if self.ca_certs or self.ca_cert_dir:
+                context.load_verify_locations(self.ca_certs, self.ca_cert_dir)
+            elif default_ssl_context and hasattr(context, "load_default_certs"):
+                context.load_default_certs()
+
+            if self.cert_file:
+                context.load_cert_chain(
+                    self.cert_file, self.key_file, password=self.key_password
+                )
+        except (IOError, OSError) as e:
+            raise SSLError(e)
+
+        return context
+
+    def _open_connection_kw(self):
+        kw = AsyncHTTPConnection._open_connection_kw(self)
+        kw["ssl"] = self._get_ssl_context()
+        kw["server_hostname"] = self.server_hostname or self.host
+        return kw
+
+    async def connect(self):
+        await AsyncHTTPConnection.connect(self)
+
+        context = self.ssl_context
+        ssl_object = self._writer.get_extra_info("ssl_object")
+        server_hostname = self.server_hostname or self.host
+
+        if self.assert_fingerprint:
+            assert_fingerprint(
+                ssl_object.getpeercert(binary_form=True), self.assert_fingerprint
+            )
+        elif (
+            context.verify_mode != ssl.CERT_NONE
+            and not getattr(context, "check_hostname", False)
+            and self.assert_hostname is not False
+        ):
+            cert = ssl_object.getpeercert()
+            if not cert.get("subjectAltName", ()):
+                warnings.warn(
+                    (
+                        "Certificate for {0} has no `subjectAltName`, falling back to check for a "
+                        "`commonName` for now. This feature is being removed by major browsers and "
+                        "deprecated by RFC 2818. (See https://github.com/shazow/urllib3/issues/497 "
+                        "for details.)".format(self.host)
+                    ),
+                    SubjectAltNameWarning,
+                )
+            _match_hostname(cert, self.assert_hostname or server_hostname)
+
+        self.is_verified = (
+            context.verify_mode == ssl.CERT_REQUIRED
+            or self.assert_fingerprint is not None
+        )
+
+
+class AsyncHTTPConnectionPool(HTTPConnectionPool):
+    """
+    :class:`~urllib3.connectionpool.HTTPConnectionPool` for asyncio. Takes
+    the same arguments, but :meth:`urlopen` and ``request()`` are coroutines.
+    """
+
+    ConnectionCls = AsyncHTTPConnection
+    ResponseCls = AsyncHTTPResponse
+
+    def __init__(self, *args, **kw):
+        super(AsyncHTTPConnectionPool, self).__init__(*args, **kw)
+
+        if self.proxy is not None:
+            raise ValueError("Proxies are not supported by %s." % type(self).__name__)
+        if self.minsize is not None:
+            raise ValueError(
+                "Adaptive sizing is not supported by %s." % type(self).__name__
+            )
+
+        # Swap the thread-safe queue for one which tasks can wait on.
+        maxsize = self.pool.maxsize
+        self.pool = asyncio.LifoQueue(maxsize)
+        for _ in range(maxsize):
+            self.pool.put_nowait(None)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        # Return False to re-raise any potential exceptions
+        return False
+
+    async def _get_conn(self, timeout=None):
+        """
+        Same as :meth:`urllib3.connectionpool.HTTPConnectionPool._get_conn`,
+        as a coroutine.
+        """
+        if self.pool is None:
+            raise ClosedPoolError(self, "Pool is closed.")
+
+        conn = None
+        start = current_time()
+        try:
+            if self.block:
+                conn = await asyncio.wait_for(self.pool.get(), timeout)
+            else:
+                conn = self.pool.get_nowait()
+        except asyncio.TimeoutError:
+            raise EmptyPoolError(
+                self, "Pool reached maximum size and no more connections are allowed."
+            )
+        except asyncio.QueueEmpty:
+            pass  # Oh well, we'll create a new connection then
+
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.observe(self, "pool_wait_seconds", current_time() - start)
+
+        # If this is a persistent connection, check if it got disconnected
+        if conn and conn.sock is not None and conn.is_dropped():
+            log.debug("Resetting dropped connection: %s", self.host)
+            conn.close()
+            if metrics is not None:
+                metrics.inc(self, "connections_dropped")
+
+        if metrics is not None:
+            metrics.inc(self, "connections_reused" if conn else "connections_created")
+
+        return conn or self._new_conn()
+
+    def _put_conn(self, conn):
+        if self.pool is not None:
+            try:
+                self.pool.put_nowait(conn)
+                return  # Everything is dandy, done.
+            except asyncio.QueueFull:
+                # This should never happen if self.block == True
+                log.warning(
+                    "Connection pool is full, discarding connection: %s", self.host
+                )
+                self.num_discarded += 1
+                if self.metrics is not None:
+                    self.metrics.inc(self, "connections_discarded")
+
+        # Connection never got put back into the pool, close it.
+        if conn:
+            conn.close()
+
+    def close(self):
+        """
+        Close all pooled connections and disable the pool.
+        """
+        if self.pool is None:
+            return
+        # Disable access to the pool
+        old_pool, self.pool = self.pool, None
+
+        while not old_pool.empty():
+            conn = old_pool.get_nowait()
+            if conn:
+                conn.close()
+
+    async def _make_request(
+        self,
+        conn,
+        method,
+        url,
+        timeout=_Default,
+        chunked=False,
+        timings=None,
+        **httplib_request_kw
+    ):
+        """
+        Same as :meth:`urllib3.connectionpool.HTTPConnectionPool._make_request`,
+        as a coroutine.
+        """
+        self.num_requests += 1
+
+        if timings is None:
+            timings = RequestTimings()
+        conn.timings = timings
+
+        timeout_obj = self._get_timeout(timeout)
+        timeout_obj.start_connect()
+        conn.timeout = timeout_obj.connect_timeout
+
+        if conn.sock is None:
+            await conn.connect()
+
+        # Trigger any extra validation we need to do.
+        self._validate_conn(conn)
+
+        bytes_sent = conn.bytes_sent
+        request_start = current_time()
+        await conn.request(method, url, chunked=chunked, **httplib_request_kw)
+
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.inc(self, "bytes_sent", conn.bytes_sent - bytes_sent)
+
+        read_timeout = timeout_obj.read_timeout
+        if read_timeout == 0:
+            raise ReadTimeoutError(
+                self, url, "Read timed out. (read timeout=%s)" % read_timeout
+            )
+        conn.read_timeout = _resolve_timeout(read_timeout)
+
+        # Receive the response from the server
+        try:
+            httplib_response = await conn.getresponse()
+        except (SocketTimeout, BaseSSLError, SocketError) as e:
+            self._raise_timeout(err=e, url=url, timeout_value=read_timeout)
+            raise
+
+        timings.ttfb = current_time() - request_start
+        if metrics is not None:
+            metrics.record_timings(self, timings)
+
+        self._log_response(conn, method, url, httplib_response)
+        return httplib_response
+
+    async def urlopen(
+        self,
+        method,
+        url,
+        body=None,
+        headers=None,
+        retries=None,
+        redirect=True,
+        assert_same_host=True,
+        timeout=_Default,
+        pool_timeout=None,
+        release_conn=None,
+        chunked=False,
+        body_pos=None,
+        priority=0,
+        **response_kw
+    ):
+        """
+        Same as :meth:`urllib3.connectionpool.HTTPConnectionPool.urlopen`,
+        as a coroutine returning an :class:`AsyncHTTPResponse`.
+
+        ``priority`` is accepted for compatibility, but tasks waiting for a
+        connection are served in the order they started waiting.
+        """
+        if headers is None:
+            headers = self.headers
+
+        if not isinstance(retries, Retry):
+            retries = Retry.from_int(retries, redirect=redirect, default=self.retries)
+
+        preload_content = response_kw.pop("preload_content", True)
+        if release_conn is None:
+            release_conn = preload_content
+
+        # Pass method to Response for length checking
+        response_kw["request_method"] = method
+
+        if self.retry_budget is not None:
+            self.retry_budget.deposit()
+
+        while True:
+            # Check host
+            if assert_same_host and not self.is_same_host(url):
+                raise HostChangedError(self, url, retries)
+
+            # Rewind body position, if needed. Record current position
+            # for future rewinds in the event of a redirect/retry.
+            body_pos = set_file_position(body, body_pos)
+
+            conn = None
+            response = None
+            release_this_conn = release_conn
+            clean_exit = False
+
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.before_request(self, url)
+
+            attempt_start = current_time()
+            timings = RequestTimings()
+
+            try:
+                timeout_obj = self._get_timeout(timeout)
+                conn = await self._get_conn(timeout=pool_timeout)
+                timings.pool_wait = current_time() - attempt_start
+                conn.timeout = timeout_obj.connect_timeout
+
+                httplib_response = await self._make_request(
+                    conn,
+                    method,
+                    url,
+                    timeout=timeout_obj,
+                    body=body,
+                    headers=headers,
+                    chunked=chunked,
+                    timings=timings,
+                )
+
+                if self.metrics is not None:
+                    self.metrics.observe(
+                        self, "request_seconds", current_time() - attempt_start
+                    )
+
+                # If we're going to release the connection below, then the
+                # response doesn't need to know about the connection.
+                response_conn = conn if not release_conn else None
+
+                response = self.ResponseCls.from_httplib(
+                    httplib_response,
+                    pool=self,
+                    connection=response_conn,
+                    retries=retries,
+                    preload_content=False,
+                    timings=timings,
+                    **response_kw
+                )
+                if preload_content:
+                    await response._preload()
+
+                clean_exit = True
+
+            except (
+                TimeoutError,
+                HTTPException,
+                SocketError,
+                ProtocolError,
+                BaseSSLError,
+                SSLError,
+                CertificateError,
+            ) as e:
+                # Discard the connection for these exceptions. It will be
+                # replaced during the next _get_conn() call.
+                e = self._normalize_error(e)
+
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.after_request(self, error=e)
+
+                retries = retries.increment(
+                    method,
+                    url,
+                    error=e,
+                    _pool=self,
+                    _stacktrace=sys.exc_info()[2],
+                    _elapsed=current_time() - attempt_start,
+                    _timings=timings,
+                )
+                log.warning(
+                    "Retrying (%r) after connection broken by '%r': %s",
+                    retries,
+                    e,
+                    url,
+                )
+
+            finally:
+                if not clean_exit:
+                    conn = conn and conn.close()
+                    release_this_conn = True
+
+                if release_this_conn:
+                    self._put_conn(conn)
+
+            if response is None:
+                await asyncio.sleep(retries.get_backoff_time())
+                continue
+
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.after_request(
+                    self, response, status_forcelist=retries.status_forcelist
+                )
+            self._check_slow_request(method, url, timings)
+
+            # Handle redirect or retry?
+            try:
+                next_request = self._next_request(
+                    method,
+                    url,
+                    response,
+                    retries,
+                    redirect,
+                    elapsed=current_time() - attempt_start,
+                )
+            except MaxRetryError:
+                await response.drain_conn()
+                raise
+
+            if next_request is None:
+                return response
+
+            await response.drain_conn()
+
+            method, next_url, retries, is_redirect = next_request
+            if is_redirect:
+                delay = retries.get_retry_after(response)
+                log.debug("Redirecting %s -> %s", url, next_url)
+            else:
+                delay = retries.get_sleep_time(response)
+                log.debug("Retry: %s", url)
+
+            if delay:
+                await asyncio.sleep(delay)
+
+            url = next_url
+            response_kw["request_method"] = method
+
+
+class AsyncHTTPSConnectionPool(AsyncHTTPConnectionPool, HTTPSConnectionPool):
+    """
+    :class:`~urllib3.connectionpool.HTTPSConnectionPool` for asyncio.
+    """
+
+    scheme = "https"
+    ConnectionCls = AsyncHTTPSConnection
+
+    def _prepare_conn(self, conn):
+        conn.set_cert(
+            key_file=self.key_file,
+            key_password=self.key_password,
+            cert_file=self.cert_file,
+            cert_reqs=self.cert_reqs,
+            ca_certs=self.ca_certs,
+            ca_cert_dir=self.ca_cert_dir,
+            assert_hostname=self.assert_hostname,
+            assert_fingerprint=self.assert_fingerprint,
+        )
+        conn.ssl_version = self.ssl_version
+        return conn
+
+
+pool_classes_by_scheme = {
+    "http": AsyncHTTPConnectionPool,
+    "https": AsyncHTTPSConnectionPool,
+}
+
+
+class AsyncPoolManager(BasePoolManager):
+    """
+    :class:`~urllib3.poolmanager.PoolManager` for asyncio, handing out
+    :class:`AsyncHTTPConnectionPool` and :class:`AsyncHTTPSConnectionPool`
+    instances. :meth:`urlopen`, ``request()`` and :meth:`request_many` are
+    coroutines.
+
+    Request coalescing and segmented downloads are only offered by the
+    blocking :class:`~urllib3.poolmanager.PoolManager`.
+    """
+
+    def __init__(self, num_pools=10, headers=None, **connection_pool_kw):
+        BasePoolManager.__init__(self, num_pools, headers, **connection_pool_kw)
+        self.pool_classes_by_scheme = pool_classes_by_scheme
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.clear()
+        # Return False to re-raise any potential exceptions
+        return False
+
+    async def request_many(self, requests, max_concurrency=10, per_host=None, **kw):
+        """
+        Same as :meth:`urllib3.poolmanager.PoolManager.request_many`, as a
+        coroutine running the requests as tasks on the event loop. Returns
+        the list of :class:`urllib3.batch.BatchResult` in input order once
+        every request has completed.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+
+        maxsize = self.connection_pool_kw.get("maxsize", 1)
+        if per_host is None or per_host > maxsize:
+            per_host = maxsize
+
+        overall = asyncio.Semaphore(max_concurrency)
+        by_host = {}
+
+        async def make_request(index, request):
+            method, url = request[:2]
+            request_kw = kw.copy()
+            if len(request) > 2:
+                request_kw.update(request[2])
+
+            host = _host_key(url)
+            if host not in by_host:
+                by_host[host] = asyncio.Semaphore(per_host)
+
+            async with by_host[host], overall:
+                response = error = None
+                start = current_time()
+                try:
+                    response = await self.request(method, url, **request_kw)
+                except Exception as e:
+                    error = e
+                elapsed = current_time() - start
+
+            return BatchResult(index, method, url, host, response, error, elapsed)
+
+        return await asyncio.gather(
+            *[make_request(index, request) for index, request in enumerate(requests)]
+        )
+
+    async def urlopen(self, method, url, redirect=True, **kw):
+        """
+        Same as :meth:`urllib3.poolmanager.PoolManager.urlopen`, as a
+        coroutine returning an :class:`AsyncHTTPResponse`.
+        """
+        kw["assert_same_host"] = False
+        kw["redirect"] = False
+
+        if "headers" not in kw:
+            kw["headers"] = self.headers.copy()
+
+        while True:
+            u = parse_url(url)
+            conn = self.connection_from_host(u.host, port=u.port, scheme=u.scheme)
+            attempt_start = current_time()
+            response = await conn.urlopen(method, u.request_uri, **kw)
+
+            next_request = self._next_request(
+                method,
+                url,
+                response,
+                conn,
+                redirect,
+                kw,
+                elapsed=current_time() - attempt_start,
+            )
+            if next_request is None:
+                return response
+
+            # Release the connection before following the redirect.
+            await response.drain_conn()
+
+            method, redirect_location = next_request
+            log.info("Redirecting %s -> %s", url, redirect_location)
+            url = redirect_location
@@ -127,6 +127,8 @@ class AppEngineManager(RequestMethods):
         self.urlfetch_retries = urlfetch_retries
 
         self.retries = retries or Retry.DEFAULT
+        self.retry_budget = None
+        self.metrics = None
 
     def __enter__(self):
         return self
@@ -0,0 +1,697 @@
+"""
+This module contains provisional support for HTTP/2 from within urllib3. It
+requires the `h2 <https://python-hyper.org/projects/h2/>`_ package; either
+install it directly or install urllib3 with the ``h2`` extra.
+
+:class:`HTTP2ConnectionPool` offers ``h2`` to the server with ALPN while
+connecting. When the server accepts, every request made through the pool,
+from any number of threads, is multiplexed onto that single TLS connection as
+its own HTTP/2 stream. Responses are returned as regular
+:class:`~urllib3.response.HTTPResponse` objects, and retries, redirects and
+timeouts behave exactly as they do for
+:class:`~urllib3.connectionpool.HTTPSConnectionPool`::
+
+    from urllib3.contrib.http2 import HTTP2ConnectionPool
+
+    pool = HTTP2ConnectionPool("example.com", 443)
+    r = pool.request("GET", "/")
+
+To use it for all HTTPS requests made by a
+:class:`~urllib3.poolmanager.PoolManager`, register it for the ``https``
+scheme::
+
+    manager = PoolManager()
+    manager.pool_classes_by_scheme = dict(
+        manager.pool_classes_by_scheme, https=HTTP2ConnectionPool
+    )
+
+If the server doesn't agree to speak HTTP/2, the pool falls back to HTTP/1.1
+and from then on behaves like a regular
+:class:`~urllib3.connectionpool.HTTPSConnectionPool`. Pools which go through
+a proxy always use HTTP/1.1.
+
+ .. note::
+    ALPN is only offered when urllib3 builds the SSL context itself. If you
+    pass your own ``ssl_context``, call ``set_alpn_protocols(["h2",
+    "http/1.1"])`` on it first.
+"""
+from __future__ import absolute_import
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+except ImportError:
+    import warnings
+    from ..exceptions import DependencyWarning
+
+    warnings.warn(
+        (
+            "HTTP/2 support in urllib3 requires the installation of optional "
+            "dependencies: specifically, h2. For more information, see "
+            "https://urllib3.readthedocs.io/en/latest/advanced-usage.html#http-2"
+        ),
+        DependencyWarning,
+    )
+    raise
+
+import collections
+import io
+import logging
+import socket
+from socket import error as SocketError, timeout as SocketTimeout
+
+from PyQt5 import QtCore
+
+from ..connection import BaseSSLError, VerifiedHTTPSConnection
+from ..connectionpool import HTTPSConnectionPool
+from ..exceptions import ClosedPoolError, ProtocolError
+from ..packages import six
+from ..packages.six.moves import http_client as httplib
+from ..packages.six.moves import queue
+from ..util.timeout import Timeout, current_time
+from ..util.wait import wait_for_read
+
+__all__ = ["HTTP2Connection", "HTTP2ConnectionPool"]
+
+log = logging.getLogger(__name__)
+
+# Headers which only make sense for a single HTTP/1.1 connection and must not
+# be sent over HTTP/2 (RFC 7540, Section 8.1.2.2). ``Host`` is turned into the
+# ``:authority`` pseudo-header instead.
+_CONNECTION_HEADERS = frozenset(
+    [
+        "connection",
+        "host",
+        "keep-alive",
+        "proxy-connection",
+        "transfer-encoding",
+        "upgrade",
+    ]
+)
+
+# RFC 7540, Section 7.
+_CANCEL = 0x8
+
+
+def _resolve_timeout(timeout):
+    if timeout is Timeout.DEFAULT_TIMEOUT:
+        return socket.getdefaulttimeout()
+    return timeout
+
+
+def _to_bytes(value):
+    if isinstance(value, six.text_type):
+        return value.encode("latin-1")
+    return six.binary_type(value)
+
+
+def _iter_body(body, blocksize):
+    """
+    Turn any request body accepted by ``urlopen`` into an iterator of bytes.
+    """
+    if body is None:
+        return
+    if isinstance(body, six.string_types + (six.binary_type,)):
+        body = (body,)
+    elif hasattr(body, "read"):
+        body = iter(lambda: body.read(blocksize), b"")
+
+    for chunk in body:
+        if not chunk:
+            continue
+        if not isinstance(chunk, six.binary_type):
+            chunk = chunk.encode("utf8")
+        yield chunk
+
+
+class _StreamState(QtCore.QObject):
+    """
+    Response data received so far on one HTTP/2 stream.
+    """
+
+    def __init__(self):
+        self.headers = None
+        self.chunks = collections.deque()
+        self.buffered = 0
+        self.ended = False
+        self.error = None
+
+
+class HTTP2Connection(VerifiedHTTPSConnection):
+    """
+    A TLS connection which offers ``h2`` to the server with ALPN.
+
+    If the server accepts, requests from any number of threads can be
+    multiplexed onto this connection as HTTP/2 streams, using
+    :meth:`open_stream` and friends. Otherwise :attr:`is_http2` stays
+    ``False`` and it can be used as an ordinary HTTP/1.1 connection.
+
+    Only one thread at a time waits on the socket for incoming frames, and
+    hands them out to the streams they belong to. All access to the TLS
+    socket itself happens under a lock, so reads and writes never overlap.
+    """
+
+    alpn_protocols = ["h2", "http/1.1"]
+
+    #: Maximum number of bytes read off the socket at a time.
+    blocksize = 65535
+
+    def __init__(self, *args, **kw):
+        VerifiedHTTPSConnection.__init__(self, *args, **kw)
+
+        #: Whether the server agreed to speak HTTP/2 on this connection.
+        self.is_http2 = False
+
+        self._h2 = None
+        self._streams = {}
+        self._error = None
+        self._closing = False
+        self._reading = False
+        self._lock = QtCore.QMutex()
+        self._changed = QtCore.QWaitCondition()
+
+    @property
+    def is_open(self):
+        """
+        Whether new streams can still be opened on this connection.
+        """
+        return self.sock is not None and self._error is None and not self._closing
+
+    def connect(self):
+        VerifiedHTTPSConnection.connect(self)
+
+        selected_alpn_protocol = getattr(self.sock, "selected_alpn_protocol", None)
+        if not selected_alpn_protocol or selected_alpn_protocol() != "h2":
+            return
+
+        self.is_http2 = True
+        self._h2 = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=True, header_encoding=None)
+        )
+        with QtCore.QMutexLocker(self._lock):
+            self._h2.initiate_connection()
+            self._flush()
+
+    def close(self):
+        if self._h2 is not None:
+            with QtCore.QMutexLocker(self._lock):
+                if self._error is None:
+                    try:
+                        self._h2.close_connection()
+                        self._flush()
+                    except ProtocolError:
+                        pass
+                    self._fail(ProtocolError("Connection closed."))
+
+        VerifiedHTTPSConnection.close(self)
+
+    def open_stream(self, method, url, headers, end_stream=False, timeout=None):
+        """
+        Send the headers of a request on a new stream, and return its ID.
+
+        Waits up to ``timeout`` seconds when the server's limit on
+        concurrent streams has been reached.
+        """
+        authority = self.host
+        if ":" in authority:
+            authority = "[%s]" % authority
+        if self.port and self.port != self.default_port:
+            authority = "%s:%s" % (authority, self.port)
+
+        fields = []
+        for name, value in headers.items():
+            name = name.lower()
+            if name == "host":
+                authority = value
+            elif name not in _CONNECTION_HEADERS:
+                fields.append((_to_bytes(name), _to_bytes(value)))
+
+        fields[:0] = [
+            (b":method", _to_bytes(method)),
+            (b":scheme", b"https"),
+            (b":authority", _to_bytes(authority)),
+            (b":path", _to_bytes(url)),
+        ]
+
+        with QtCore.QMutexLocker(self._lock):
+            self._wait(self._can_open_stream, timeout)
+            stream_id = self._h2.get_next_available_stream_id()
+            self._h2.send_headers(stream_id, fields, end_stream=end_stream)
+            self._streams[stream_id] = _StreamState()
+            self._flush()
+
+        return stream_id
+
+    def send_data(self, stream_id, data, end_stream=False, timeout=None):
+        """
+        Send part of a request body, respecting the server's flow control
+        window.
+        """
+        stream = self._streams[stream_id]
+        with QtCore.QMutexLocker(self._lock):
+            while data:
+                self._wait(
+                    lambda: self._h2.local_flow_control_window(stream_id) > 0,
+                    timeout,
+                    stream,
+                )
+                size = min(
+                    len(data),
+                    self._h2.local_flow_control_window(stream_id),
+                    self._h2.max_outbound_frame_size,
+                )
+                self._h2.send_data(stream_id, data[:size])
+                data = data[size:]
+                self._flush()
+
+            if end_stream:
+                self._h2.end_stream(stream_id)
+                self._flush()
+
+    def get_headers(self, stream_id, timeout=None):
+        """
+        Wait for the response headers on a stream, and return them as a list
+        of ``(name, value)`` byte string tuples.
+        """
+        stream = self._streams[stream_id]
+        with QtCore.QMutexLocker(self._lock):
+            self._wait(lambda: stream.headers is not None, timeout, stream)
+            return stream.headers
+
+    def read(self, stream_id, amt=None, timeout=None):
+        """
+        Read up to ``amt`` bytes of the response body on a stream, or all of
+        it if ``amt`` is None. Returns the data along with whether the end of
+        the stream has been reached.
+        """
+        stream = self._streams[stream_id]
+        with QtCore.QMutexLocker(self._lock):
+            self._wait(
+                lambda: stream.ended or (amt is not None and stream.buffered >= amt),
+                timeout,
+                stream,
+            )
+
+            chunks = []
+            wanted = stream.buffered if amt is None else min(amt, stream.buffered)
+            remaining = wanted
+            while remaining:
+                chunk = stream.chunks.popleft()
+                if len(chunk) > remaining:
+                    stream.chunks.appendleft(chunk[remaining:])
+                    chunk = chunk[:remaining]
+                chunks.append(chunk)
+                remaining -= len(chunk)
+            stream.buffered -= wanted
+
+            # Only open the flow control window back up once the application
+            # has taken the data, so that slow readers push back on the server.
+            if wanted and not stream.ended:
+                self._h2.acknowledge_received_data(wanted, stream_id)
+                self._flush()
+
+            return b"".join(chunks), stream.ended and not stream.buffered
+
+    def close_stream(self, stream_id):
+        """
+        Forget about a stream, cancelling it first if the server is still
+        sending the response.
+        """
+        with QtCore.QMutexLocker(self._lock):
+            stream = self._streams.pop(stream_id, None)
+            if stream is None or self._error is not None:
+                return
+
+            try:
+                if not stream.ended:
+                    self._h2.reset_stream(stream_id, error_code=_CANCEL)
+                if stream.buffered:
+                    self._h2.acknowledge_received_data(stream.buffered, stream_id)
+                self._flush()
+            except h2.exceptions.StreamClosedError:
+                pass
+            except ProtocolError:
+                pass
+
+    def _can_open_stream(self):
+        return (
+            self._h2.open_outbound_streams
+            < self._h2.remote_settings.max_concurrent_streams
+        )
+
+    def _wait(self, predicate, timeout, stream=None):
+        """
+        Block until ``predicate()`` is true, reading frames off the socket
+        unless another thread is already doing so. Must be called with the
+        lock held.
+        """
+        deadline = None if timeout is None else current_time() + timeout
+        while not predicate():
+            if stream is not None and stream.error is not None:
+                raise stream.error
+            if self._error is not None:
+                raise self._error
+
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - current_time()
+                if remaining <= 0:
+                    raise SocketTimeout("timed out")
+
+            if not self._reading:
+                self._read_frames(remaining)
+            elif remaining is None:
+                self._changed.wait(self._lock)
+            else:
+                self._changed.wait(self._lock, int(remaining * 1000) + 1)
+
+    def _read_frames(self, timeout):
+        """
+        Wait for the socket to become readable with the lock released, then
+        process whatever the server sent. Must be called with the lock held.
+        """
+        pending = getattr(self.sock, "pending", None)
+        readable = bool(pending and pending())
+
+        if not readable:
+            self._reading = True
+            self._lock.unlock()
+            try:
+                readable = wait_for_read(self.sock, timeout=timeout)
+            finally:
+                self._lock.lock()
+                self._reading = False
+                self._changed.wakeAll()
+
+        if not readable:
+            raise SocketTimeout("timed out")
+
+        if self.sock is None:
+            self._fail(ProtocolError("Connection closed."))
+            raise self._error
+
+        try:
+            data = self.sock.recv(self.blocksize)
+        except SocketTimeout:
+            raise
+        except (SocketError, BaseSSLError) as e:
+            self._fail(ProtocolError("Connection broken: %r" % e, e))
+            raise self._error
+
+        if not data:
+            self._fail(ProtocolError("Connection closed by the server."))
+            raise self._error
+
+        self._receive(data)
+
+    def _receive(self, data):
+        try:
+            events = self._h2.receive_data(data)
+        except h2.exceptions.ProtocolError as e:
+            self._fail(ProtocolError("Invalid HTTP/2 data received: %r" % e, e))
+            raise self._error
+
+        for event in events:
+            if isinstance(event, h2.events.ConnectionTerminated):
+                self._closing = True
+                error = ProtocolError(
+                    "Connection terminated by the server (error code %s)."
+                    % event.error_code
+                )
+                for stream_id, stream in self._streams.items():
+                    unprocessed = (
+                        event.last_stream_id is not None
+                        and stream_id > event.last_stream_id
+                    )
+                    if not stream.ended and (event.error_code or unprocessed):
+                        stream.error = error
+                continue
+
+            stream = self._streams.get(getattr(event, "stream_id", None))
+
+            if isinstance(event, h2.events.DataReceived):
+                if stream is None:
+                    # Data for a stream we already gave up on.
+                    self._h2.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id
+                    )
+                    continue
+                stream.chunks.append(event.data)
+                stream.buffered += len(event.data)
+                padding = event.flow_controlled_length - len(event.data)
+                if padding:
+                    self._h2.acknowledge_received_data(padding, event.stream_id)
+
+            elif stream is None:
+                continue
+
+            elif isinstance(event, h2.events.ResponseReceived):
+                stream.headers = event.headers
+
+            elif isinstance(event, h2.events.StreamEnded):
+                stream.ended = True
+
+            elif isinstance(event, h2.events.StreamReset):
+                stream.error = ProtocolError(
+                    "Stream reset by the server (error code %s)." % event.error_code
+                )
+
+        self._flush()
+        self._changed.wakeAll()
+
+    def _flush(self):
+        data = self._h2.data_to_send()
+        if not data:
+            return
+
+        try:
+            self.sock.sendall(data)
+        except (SocketError, BaseSSLError, AttributeError) as e:
+            # AttributeError: self.sock is None.
+            self._fail(ProtocolError("Connection broken: %r" % e, e))
+            raise self._error
+
+    def _fail(self, error):
+        """
+        Mark the connection as broken, and every stream still waiting on it.
+        """
+        self._error = error
+        for stream in self._streams.values():
+            if not stream.ended and stream.error is None:
+                stream.error = error
+        self._changed.wakeAll()
+
+
+class HTTP2Stream(QtCore.QObject):
+    """
+    A single request/response exchange on a shared :class:`HTTP2Connection`.
+
+    This is what :class:`HTTP2ConnectionPool` hands out instead of a
+    connection. It looks enough like an
+    :class:`~urllib3.connection.HTTPConnection` to go through the regular
+    ``urlopen`` code path.
+    """
+
+    _http_vsn_str = "HTTP/2"
+
+    #: Size of the blocks read from file-like request bodies.
+    blocksize = 16384
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.timeout = Timeout.DEFAULT_TIMEOUT
+        self.stream_id = None
+        self._read_timeout = None
+
+        #: Bytes of request body sent on this stream. Frame and header bytes
+        #: are shared with the other streams, so they aren't counted.
+        self.bytes_sent = 0
+
+    #: :class:`~urllib3.util.timing.RequestTimings` of the request being
+    #: made on the stream.
+    timings = None
+
+    @property
+    def sock(self):
+        # ``_make_request`` sets the read timeout with ``conn.sock.settimeout``.
+        if self.connection.sock is None:
+            return None
+        return self
+
+    @property
+    def is_verified(self):
+        return self.connection.is_verified
+
+    def connect(self):
+        # How long the shared connection took to connect is recorded in the
+        # timings of whichever stream gets to it first.
+        if self.connection.sock is None:
+            self.connection.timings = self.timings
+            try:
+                self.connection.connect()
+            finally:
+                self.connection.timings = None
+
+    def settimeout(self, timeout):
+        self._read_timeout = timeout
+
+    def request(self, method, url, body=None, headers=None):
+        timeout = _resolve_timeout(self.timeout)
+        chunks = _iter_body(body, self.blocksize)
+        self._method = method
+        self.stream_id = self.connection.open_stream(
+            method, url, headers or {}, end_stream=body is None, timeout=timeout
+        )
+
+        if body is not None:
+            for chunk in chunks:
+                self.connection.send_data(self.stream_id, chunk, timeout=timeout)
+                self.bytes_sent += len(chunk)
+            self.connection.send_data(
+                self.stream_id, b"", end_stream=True, timeout=timeout
+            )
+
+    # HTTP/2 frames the body itself, so chunked requests need nothing special.
+    request_chunked = request
+
+    def getresponse(self, buffering=False):
+        headers = self.connection.get_headers(self.stream_id, self._read_timeout)
+        return HTTP2Response(self, headers)
+
+    def read(self, amt=None):
+        return self.connection.read(self.stream_id, amt, self._read_timeout)
+
+    def close(self):
+        if self.stream_id is not None:
+            self.connection.close_stream(self.stream_id)
+            self.stream_id = None
+
+
+class HTTP2Response(QtCore.QObject):
+    """
+    The response to an :class:`HTTP2Stream`, with just enough of the
+    interface of :class:`httplib.HTTPResponse` to be wrapped by
+    :meth:`urllib3.response.HTTPResponse.from_httplib`.
+    """
+
+    version = 20
+    strict = 0
+
+    def __init__(self, stream, headers):
+        self._stream = stream
+        self._method = stream._method
+        self._closed = False
+
+        self.status = 0
+        lines = []
+        for name, value in headers:
+            if name == b":status":
+                self.status = int(value)
+            elif not name.startswith(b":"):
+                lines.append(name + b": " + value + b"\r\n")
+
+        self.reason = httplib.responses.get(self.status, "")
+        self.msg = _parse_headers(b"".join(lines) + b"\r\n")
+
+        try:
+            self.length = int(self.msg.get("content-length"))
+        except (TypeError, ValueError):
+            self.length = None
+
+    def read(self, amt=None):
+        if self._closed:
+            return b""
+
+        data, finished = self._stream.read(amt)
+        if finished:
+            self.close()
+        return data
+
+    def isclosed(self):
+        return self._closed
+
+    def close(self):
+        self._closed = True
+        self._stream.close()
+
+
+def _parse_headers(header_block):
+    fp = io.BytesIO(header_block)
+    if six.PY3:
+        return httplib.parse_headers(fp)
+    return httplib.HTTPMessage(fp)
+
+
+class HTTP2ConnectionPool(HTTPSConnectionPool):
+    """
+    Same as :class:`~urllib3.connectionpool.HTTPSConnectionPool`, but
+    multiplexes concurrent requests onto one HTTP/2 connection when the
+    server supports it.
+
+    ``maxsize`` and ``block`` only come into play once the pool has fallen
+    back to HTTP/1.1. New HTTP/2 connections are established with the pool's
+    default connect timeout.
+    """
+
+    ConnectionCls = HTTP2Connection
+
+    def __init__(self, *args, **kw):
+        HTTPSConnectionPool.__init__(self, *args, **kw)
+
+        #: Whether the server speaks HTTP/2, or None until we've connected.
+        self.is_http2 = False if self.proxy is not None else None
+
+        self._h2_conn = None
+        self._h2_lock = QtCore.QMutex()
+
+    def _get_conn(self, timeout=None, priority=0, deadline=None):
+        if self.pool is None:
+            raise ClosedPoolError(self, "Pool is closed.")
+
+        if self.is_http2 is False:
+            return HTTPSConnectionPool._get_conn(self, timeout, priority, deadline)
+
+        with QtCore.QMutexLocker(self._h2_lock):
+            conn = self._h2_conn
+            if conn is None or not conn.is_open:
+                conn = self._new_conn()
+                conn.connect()
+
+                if not conn.is_http2:
+                    log.debug("%s didn't negotiate HTTP/2, using HTTP/1.1", self.host)
+                    self.is_http2 = False
+                    # Take a slot in the pool for this connection, so it can
+                    # be put back after use like any other.
+                    try:
+                        self.pool.get(block=False)
+                    except queue.Empty:
+                        pass
+                    return conn
+
+                self.is_http2 = True
+                self._h2_conn = conn
+
+        return HTTP2Stream(conn)
+
+    def _put_conn(self, conn, checked_out=True):
+        # Streams are never reused. Closing one cancels it if its response
+        # wasn't read to the end, so that it doesn't keep taking up one of
+        # the server's concurrent streams. The shared connection stays with
+        # the pool.
+        if isinstance(conn, HTTP2Stream):
+            conn.close()
+            return
+        if self.is_http2 is not False:
+            return
+
+        HTTPSConnectionPool._put_conn(self, conn, checked_out)
+
+    def close(self):
+        with QtCore.QMutexLocker(self._h2_lock):
+            conn, self._h2_conn = self._h2_conn, None
+        if conn is not None:
+            conn.close()
+
+        HTTPSConnectionPool.close(self)
@@ -0,0 +1,350 @@
+from __future__ import absolute_import
+import logging
+import os
+import re
+import sys
+
+from PyQt5 import QtCore
+
+from .exceptions import (
+    DownloadError,
+    ProtocolError,
+    ReadTimeoutError,
+    ResourceChangedError,
+)
+from .packages.six.moves import queue
+from .packages.six.moves.urllib.parse import urljoin
+from .response import DownloadResult, _O_BINARY, _accepts_ranges, _strong_validator
+from .util.retry import Retry
+from .util.timeout import current_time
+
+
+__all__ = ["SegmentedDownload"]
+
+
+log = logging.getLogger(__name__)
+
+_CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$", re.IGNORECASE)
+
+#: Headers which tell whether the segments are of the same resource.
+_VALIDATORS = ("ETag", "Last-Modified")
+
+
+def _content_length(headers):
+    try:
+        length = int(headers.get("content-length", ""))
+    except ValueError:
+        return None
+    return length if length >= 0 else None
+
+
+def _discard(response):
+    # The body wasn't read, so the connection can't be used again.
+    response.close()
+    response.release_conn()
+
+
+class _SegmentJob(QtCore.QRunnable):
+    """
+    Fetch one segment of a :class:`SegmentedDownload` on a worker thread, and
+    hand back the error it failed with, if any, through ``results``.
+    """
+
+    def __init__(self, download, results, index, first, last):
+        QtCore.QRunnable.__init__(self)
+        self.download = download
+        self.results = results
+        self.index = index
+        self.first = first
+        self.last = last
+
+    def run(self):
+        error = None
+        try:
+            self.download._fetch_segment(self.first, self.last)
+        except Exception as e:
+            # Don't start retries of the other segments, they'd be wasted.
+            self.download._failed = True
+            error = e
+
+        self.results.put((self.index, error))
+
+
+class SegmentedDownload(QtCore.QObject):
+    """
+    Download a resource to a file, in several byte ranges fetched
+    concurrently over the connections of a pool. Made and run by
+    :meth:`urllib3.poolmanager.PoolManager.download`.
+
+    The resource is probed with a ``HEAD`` request first. If the server
+    accepts byte ranges and gives a ``Content-Length`` and a strong ``ETag``
+    or ``Last-Modified`` date to check the segments against, the file is
+    sized up front and each segment is fetched with a ``Range`` request and
+    written at its offset. Otherwise, the resource is fetched with a single
+    :attr:`~urllib3.response.HTTPResponse.resumable` ``GET``.
+
+    Every segment is asked for with that validator in ``If-Range``, and its
+    ``ETag`` and ``Last-Modified`` have to match those of the probe. If they don't, the resource changed while it
+    was being downloaded and :class:`~urllib3.exceptions.ResourceChangedError`
+    is raised.
+
+    A segment which breaks off is asked for again from where it stopped, as
+    a read error of its :class:`~urllib3.util.retry.Retry`. Each segment
+    retries on its own, starting from ``retries``.
+
+    :param manager:
+        The :class:`~urllib3.poolmanager.PoolManager` making the requests.
+
+    :param url:
+        The URL to download.
+
+    :param dest:
+        The path of the file to write, which is created or truncated. If the
+        download fails, it's left incomplete.
+
+    :param segments:
+        The number of segments to fetch at once. It can't exceed the
+        ``maxsize`` of the manager's pools, so that no segment waits for, or
+        throws away, a connection.
+
+    :param min_segment_size:
+        The smallest segment worth a request of its own, in bytes. Smaller
+        files are split into fewer segments.
+
+    :param headers:
+        Headers to send with every request, on top of the manager's.
+
+    :param retries:
+        Configure the number of retries of each request, as for
+        :meth:`~urllib3.connectionpool.HTTPConnectionPool.urlopen`.
+
+    :param request_kw:
+        Keyword arguments for every request.
+    """
+
+    def __init__(
+        self,
+        manager,
+        url,
+        dest,
+        segments=4,
+        min_segment_size=2 ** 20,
+        headers=None,
+        retries=None,
+        request_kw=None,
+    ):
+        if segments < 1:
+            raise ValueError("segments must be at least 1.")
+
+        self.manager = manager
+        self.url = url
+        self.dest = dest
+        self.segments = segments
+        self.min_segment_size = max(min_segment_size, 1)
+        self.headers = manager.headers.copy()
+        self.headers.update(headers or {})
+        self.retries = retries
+        self.request_kw = request_kw or {}
+
+        self._url = url
+        self._length = None
+        self._validators = {}
+        self._if_range = None
+        self._failed = False
+
+    def run(self):
+        """
+        Download the resource, and return a
+        :class:`~urllib3.response.DownloadResult` of how many bytes were
+        written and how fast.
+        """
+        start = current_time()
+        head = self.manager.request(
+            "HEAD",
+            self.url,
+            headers=self.headers,
+            retries=self.retries,
+            **self.request_kw
+        )
+        self._url = self._final_url(head)
+        self._length = _content_length(head.headers)
+        for name in _VALIDATORS:
+            value = head.headers.get(name)
+            if value is not None:
+                self._validators[name] = value
+
+        self._if_range = _strong_validator(head.headers)
+
+        segments = self._plan(head)
+        if len(segments) < 2:
+            written = self._fetch_whole()
+        else:
+            log.debug(
+                "Downloading %s in %d segments of %d bytes",
+                self._url,
+                len(segments),
+                segments[0][1] + 1,
+            )
+            self._fetch_segments(segments)
+            written = self._length
+
+        return DownloadResult(written, current_time() - start)
+
+    def _final_url(self, head):
+        url = self.url
+        if head.retries is not None:
+            for entry in head.retries.history:
+                if entry.redirect_location:
+                    url = urljoin(url, entry.redirect_location)
+        return url
+
+    def _plan(self, head):
+        """ Split the resource into ``(first, last)`` byte ranges. """
+        if (
+            head.status != 200
+            or not self._length
+            or self._if_range is None
+            or not _accepts_ranges(head.headers)
+        ):
+            return []
+
+        maxsize = self.manager.connection_pool_kw.get("maxsize", 1)
+        count = min(self.segments, maxsize, -(-self._length // self.min_segment_size))
+        size = -(-self._length // count)
+        return [
+            (first, min(first + size, self._length) - 1)
+            for first in range(0, self._length, size)
+        ]
+
+    def _fetch_whole(self):
+        response = self.manager.request(
+            "GET",
+            self._url,
+            headers=self.headers,
+            retries=self.retries,
+            preload_content=False,
+            resumable=True,
+            **self.request_kw
+        )
+        if response.status != 200:
+            _discard(response)
+            raise DownloadError(
+                self._url, "Unexpected status %d" % response.status, response
+            )
+
+        try:
+            return response.stream_to_file(self.dest).bytes_written
+        finally:
+            response.release_conn()
+
+    def _fetch_segments(self, segments):
+        fd = os.open(self.dest, os.O_RDWR | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o666)
+        try:
+            os.ftruncate(fd, self._length)
+        finally:
+            os.close(fd)
+
+        results = queue.Queue()
+        threads = QtCore.QThreadPool()
+        threads.setMaxThreadCount(len(segments))
+        for index, (first, last) in enumerate(segments):
+            threads.start(_SegmentJob(self, results, index, first, last))
+        threads.waitForDone()
+
+        # Raise the error of the first segment which failed.
+        errors = sorted(results.get() for _ in segments)
+        for index, error in errors:
+            if error is not None:
+                raise error
+
+    def _fetch_segment(self, first, last):
+        """
+        Fetch bytes ``first`` to ``last`` into the file, asking again for the
+        rest when a response breaks off or ends early.
+        """
+        pool = self.manager.connection_from_url(self._url)
+        retries = Retry.from_int(self.retries, default=pool.retries)
+        fd = os.open(self.dest, os.O_RDWR | _O_BINARY)
+        try:
+            while first <= last and not self._failed:
+                headers = self.headers.copy()
+                headers["Range"] = "bytes=%d-%d" % (first, last)
+                headers["If-Range"] = self._if_range
+                response = self.manager.request(
+                    "GET",
+                    self._url,
+                    headers=headers,
+                    retries=retries,
+                    preload_content=False,
+                    enforce_content_length=True,
+                    **self.request_kw
+                )
+                retries = response.retries or retries
+                self._check_segment(response, first, last)
+
+                os.lseek(fd, first, os.SEEK_SET)
+                try:
+                    response.stream_to_file(fd, decode_content=False)
+                except (ProtocolError, ReadTimeoutError) as e:
+                    first += response.tell()
+                    retries = retries.increment(
+                        "GET",
+                        self._url,
+                        error=e,
+                        _pool=pool,
+                        _stacktrace=sys.exc_info()[2],
+                    )
+                    log.debug(
+                        "Retrying bytes %d-%d of %s after %r", first, last, self._url, e
+                    )
+                    retries.sleep()
+                else:
+                    first += response.tell()
+        finally:
+            os.close(fd)
+
+    def _check_segment(self, response, first, last):
+        """
+        Raise if ``response`` isn't bytes ``first`` to ``last``, or up to
+        some byte in between, of the resource which was probed.
+        """
+        error = None
+        changed = [
+            name
+            for name, value in sorted(self._validators.items())
+            if response.headers.get(name) != value
+        ]
+        content_range = response.headers.get("content-range", "")
+        match = _CONTENT_RANGE_RE.match(content_range)
+
+        if changed:
+            error = ResourceChangedError(
+                self._url,
+                "%s changed during the download" % " and ".join(changed),
+                response,
+            )
+        elif response.status != 206:
+            error = DownloadError(
+                self._url,
+                "Unexpected status %d for bytes %d-%d" % (response.status, first, last),
+                response,
+            )
+        elif (
+            not match
+            or int(match.group(1)) != first
+            or not first <= int(match.group(2)) <= last
+        ):
+            error = DownloadError(
+                self._url,
+                "Unexpected Content-Range %r for bytes %d-%d"
+                % (content_range, first, last),
+                response,
+            )
+        elif match.group(3) != "*" and int(match.group(3)) != self._length:
+            error = ResourceChangedError(
+                self._url, "Length changed during the download", response
+            )
+
+        if error is not None:
+            _discard(response)
+            raise error
@@ -83,6 +83,61 @@ class MaxRetryError(RequestError):
         RequestError.__init__(self, pool, url, message)
 
 
+class RetryBudgetExhaustedError(MaxRetryError):
+    """Raised when a retry is refused because the pool's
+    :class:`~urllib3.util.retry.RetryBudget` is spent.
+
+    :param pool: The connection pool
+    :type pool: :class:`~urllib3.connectionpool.HTTPConnectionPool`
+    :param string url: The requested Url
+    :param exceptions.Exception reason: The error which would have been retried
+
+    """
+
+    def __init__(self, pool, url, reason=None):
+        self.reason = reason
+
+        message = "Retry budget exhausted with url: %s (Caused by %r)" % (url, reason)
+
+        RequestError.__init__(self, pool, url, message)
+
+
+class CircuitOpenError(RequestError):
+    """Raised when a request is refused because the
+    :class:`~urllib3.util.circuit.CircuitBreaker` of its host is open."""
+
+    pass
+
+
+class DownloadError(HTTPError):
+    """Raised when :meth:`~urllib3.poolmanager.PoolManager.download` gets a
+    response it can't write to the file: an error status, or one which
+    doesn't match the range it asked for.
+
+    :param string url: The requested Url
+    :param response: The response
+    :type response: :class:`~urllib3.response.HTTPResponse`
+
+    """
+
+    def __init__(self, url, message, response=None):
+        self.url = url
+        self.response = response
+        HTTPError.__init__(self, "%s: %s" % (url, message))
+
+    def __reduce__(self):
+        # For pickling purposes.
+        return self.__class__, (self.url, None)
+
+
+class ResourceChangedError(DownloadError):
+    """Raised when a resource changes while
+    :meth:`~urllib3.poolmanager.PoolManager.download` is fetching it in
+    segments, so that its ``ETag`` or ``Last-Modified`` no longer match."""
+
+    pass
+
+
 class HostChangedError(RequestError):
     "Raised when an existing pool gets a request for a foreign host."
 
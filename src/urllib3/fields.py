@@ -78,19 +78,28 @@ _HTML5_REPLACEMENTS.update(
 )
 
 
-def _replace_multiple(value, needles_and_replacements):
+def _replace_multiple(value, needles_and_replacements, pattern=None):
     def replacer(match):
         return needles_and_replacements[match.group(0)]
 
-    pattern = re.compile(
-        r"|".join([re.escape(needle) for needle in needles_and_replacements.keys()])
-    )
+    if pattern is None:
+        pattern = _needles_pattern(needles_and_replacements)
 
     result = pattern.sub(replacer, value)
 
     return result
 
 
+def _needles_pattern(needles_and_replacements):
+    return re.compile(
+        r"|".join([re.escape(needle) for needle in needles_and_replacements.keys()])
+    )
+
+
+# Compiled once, as forms can have many fields.
+_HTML5_PATTERN = _needles_pattern(_HTML5_REPLACEMENTS)
+
+
 def format_header_param_html5(name, value):
     """
     Helper function to format and quote a single header parameter using the
@@ -113,7 +122,7 @@ def format_header_param_html5(name, value):
     if isinstance(value, six.binary_type):
         value = value.decode("utf-8")
 
-    value = _replace_multiple(value, _HTML5_REPLACEMENTS)
+    value = _replace_multiple(value, _HTML5_REPLACEMENTS, _HTML5_PATTERN)
 
     return u'%s="%s"' % (name, value)
 
@@ -1,16 +1,25 @@
 from __future__ import absolute_import
 import binascii
 import codecs
+import io
 import os
 
-from io import BytesIO
+from PyQt5.QtCore import QObject
 
 from .packages import six
 from .packages.six import b
-from .fields import RequestField
+from .fields import RequestField, guess_content_type
 
 writer = codecs.lookup("utf-8")[3]
 
+# Rendered headers of the fields given as tuples, by field name, filename and
+# content type, as forms tend to be sent with the same fields many times.
+_field_headers = {}
+_FIELD_HEADERS_SIZE = 4096
+
+# A content type which is guessed from the filename.
+_GUESS = object()
+
 
 def choose_boundary():
     """
@@ -42,6 +51,67 @@ def iter_field_objects(fields):
             yield RequestField.from_tuples(*field)
 
 
+def _iter_encoded_fields(fields):
+    """
+    Iterate over fields, as pairs of their encoded headers and their data,
+    which is encoded to bytes unless it's file-like.
+
+    Takes the same ``fields`` as :func:`iter_field_objects`, but renders
+    fields given as tuples without making a
+    :class:`~urllib3.fields.RequestField` for each.
+    """
+    if isinstance(fields, dict):
+        i = six.iteritems(fields)
+    else:
+        i = iter(fields)
+
+    for field in i:
+        if isinstance(field, RequestField):
+            headers = field.render_headers().encode("utf-8")
+            data = field.data
+        else:
+            headers, data = _encode_tuple(*field)
+
+        if isinstance(data, int):
+            data = str(data)  # Backwards compatibility
+        if isinstance(data, six.text_type):
+            data = data.encode("utf-8")
+        yield headers, data
+
+
+def _encode_tuple(fieldname, value):
+    """
+    Return the encoded headers and the data of the field which
+    :meth:`RequestField.from_tuples <urllib3.fields.RequestField.from_tuples>`
+    would make of ``fieldname`` and ``value``.
+    """
+    if isinstance(value, tuple):
+        if len(value) == 3:
+            filename, data, content_type = value
+        else:
+            filename, data = value
+            content_type = _GUESS
+    else:
+        filename = None
+        content_type = None
+        data = value
+
+    key = (fieldname, filename, content_type)
+    headers = _field_headers.get(key)
+    if headers is None:
+        if content_type is _GUESS:
+            content_type = guess_content_type(filename)
+        field = RequestField(fieldname, data, filename=filename)
+        field.make_multipart(content_type=content_type)
+        headers = field.render_headers().encode("utf-8")
+
+        if len(_field_headers) >= _FIELD_HEADERS_SIZE:
+            _field_headers.clear()
+        _field_headers[key] = headers
+
+    return headers, data
+
+
 def iter_fields(fields):
     """
     .. deprecated:: 1.6
@@ -71,28 +141,195 @@ def encode_multipart_formdata(fields, boundary=None):
         If not specified, then a random boundary will be generated using
         :func:`urllib3.filepost.choose_boundary`.
     """
-    body = BytesIO()
     if boundary is None:
         boundary = choose_boundary()
 
-    for field in iter_field_objects(fields):
-        body.write(b("--%s\r\n" % (boundary)))
+    delimiter = b("--%s\r\n" % (boundary))
+    parts = []
+    for headers, data in _iter_encoded_fields(fields):
+        parts += (delimiter, headers, data, b"\r\n")
+    parts.append(b("--%s--\r\n" % (boundary)))
 
-        writer(body).write(field.render_headers())
-        data = field.data
+    content_type = str("multipart/form-data; boundary=%s" % boundary)
 
-        if isinstance(data, int):
-            data = str(data)  # Backwards compatibility
+    return b"".join(parts), content_type
 
-        if isinstance(data, six.text_type):
-            writer(body).write(data)
-        else:
-            body.write(data)
 
-        body.write(b"\r\n")
+def _file_size(fp):
+    """
+    Return how many bytes are left to read from the file-like object ``fp``,
+    or None if that can't be told without reading it.
+    """
+    if isinstance(fp, io.TextIOBase):
+        return None
+    try:
+        return os.fstat(fp.fileno()).st_size - fp.tell()
+    except (AttributeError, IOError, OSError, ValueError):
+        pass
+    try:
+        position = fp.tell()
+        fp.seek(0, 2)
+        end = fp.tell()
+        fp.seek(position)
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+    return end - position
 
-    body.write(b("--%s--\r\n" % (boundary)))
 
-    content_type = str("multipart/form-data; boundary=%s" % boundary)
+class MultipartEncoder(QObject):
+    """
+    Encode ``fields`` using the multipart/form-data MIME format as they're
+    sent, rather than all at once like :func:`encode_multipart_formdata`.
+
+    The data of a field may also be a file-like object, which is read
+    ``blocksize`` bytes at a time, so that files of any size can be
+    uploaded without holding them in memory::
+
+        with open('video.mp4', 'rb') as fp:
+            encoder = MultipartEncoder({'video': ('video.mp4', fp)})
+            http.request('POST', url, body=encoder)
+
+    :meth:`~urllib3.request.RequestMethods.request_encode_body` sends the
+    ``Content-Type`` and ``Content-Length`` :attr:`headers` along with an
+    encoder passed as the ``body``. Pass them yourself to ``urlopen``.
+
+    An encoder is a file-like object, which can be rewound with
+    :meth:`seek` for retries and redirects if its files can, and an
+    iterable of blocks of the body.
+
+    :param fields:
+        Dictionary of fields or list of (key, :class:`~urllib3.fields.RequestField`).
+
+    :param boundary:
+        If not specified, then a random boundary will be generated using
+        :func:`urllib3.filepost.choose_boundary`.
+
+    :param blocksize:
+        Bytes to read from file-like field data at a time.
+    """
+
+    _position = 0
+    _buffer = b""
+
+    def __init__(self, fields, boundary=None, blocksize=16384):
+        if boundary is None:
+            boundary = choose_boundary()
+        self.boundary = boundary
+        self.blocksize = blocksize
+        self.content_type = str("multipart/form-data; boundary=%s" % boundary)
+
+        #: Length of the whole body in bytes, or None if the size of one of
+        #: the file-like fields can't be told up front.
+        self.content_length = 0
+
+        # The body, as a list of bytes and (file-like, starting position).
+        self._parts = []
+        delimiter = b("--%s\r\n" % boundary)
+        for headers, data in _iter_encoded_fields(fields):
+            self._add(delimiter + headers)
+            self._add(data)
+            self._add(b"\r\n")
+        self._add(b("--%s--\r\n" % boundary))
+
+        self.seek(0)
+
+    def _add(self, data):
+        if isinstance(data, bytes):
+            self._parts.append(data)
+            if self.content_length is not None:
+                self.content_length += len(data)
+            return
+
+        size = _file_size(data)
+        try:
+            start = data.tell()
+        except (AttributeError, IOError, OSError):
+            start = None
+        self._parts.append((data, start))
+        if size is None:
+            self.content_length = None
+        elif self.content_length is not None:
+            self.content_length += size
+
+    @property
+    def headers(self):
+        """ The headers to send with the body. """
+        headers = {"Content-Type": self.content_type}
+        if self.content_length is not None:
+            headers["Content-Length"] = str(self.content_length)
+        return headers
+
+    def _iter_parts(self):
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+
+            fp, start = part
+            if start is not None:
+                fp.seek(start)
+            while True:
+                data = fp.read(self.blocksize)
+                if not data:
+                    break
+                if isinstance(data, six.text_type):
+                    data = data.encode("utf-8")
+                yield data
+
+    def __iter__(self):
+        """ Iterate over the rest of the body, in blocks. """
+        if self._buffer:
+            data, self._buffer = self._buffer, b""
+            self._position += len(data)
+            yield data
+        for data in self._blocks:
+            self._position += len(data)
+            yield data
+
+    def read(self, amt=None):
+        """ Read and return up to ``amt`` bytes of the body, or all of it. """
+        if amt is None or amt < 0:
+            return b"".join(self)
+
+        blocks = [self._buffer]
+        length = len(self._buffer)
+        while length < amt:
+            data = next(self._blocks, None)
+            if data is None:
+                break
+            blocks.append(data)
+            length += len(data)
+
+        data = b"".join(blocks)
+        data, self._buffer = data[:amt], data[amt:]
+        self._position += len(data)
+        return data
+
+    def tell(self):
+        """ Return how many bytes of the body have been read. """
+        return self._position
+
+    def seek(self, offset, whence=0):
+        """
+        Go back to ``offset`` bytes into the body, by starting over and
+        skipping to it. Only ``whence=0`` is supported.
+
+        :raises io.UnsupportedOperation:
+            If a file-like field can't be rewound.
+        """
+        if whence != 0:
+            raise io.UnsupportedOperation("can only seek from the start")
+        if self._position or self._buffer:
+            for part in self._parts:
+                if not isinstance(part, bytes) and part[1] is None:
+                    raise io.UnsupportedOperation(
+                        "the data of a field can't be rewound"
+                    )
 
-    return body.getvalue(), content_type
+        self._blocks = self._iter_parts()
+        self._buffer = b""
+        self._position = 0
+        while self._position < offset:
+            if not self.read(min(offset - self._position, self.blocksize)):
+                break
+        return self._position
@@ -2,19 +2,30 @@ from __future__ import absolute_import
 import collections
 import functools
 import logging
+import time
 
-from ._collections import RecentlyUsedContainer
+from ._collections import HTTPHeaderDict, RecentlyUsedContainer
+from .batch import RequestBatch
+from .cache import CacheEntry, MemoryCache, _CacheFiller, is_cacheable
 from .connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from .connectionpool import port_by_scheme
+from .download import SegmentedDownload
 from .exceptions import LocationValueError, MaxRetryError, ProxySchemeUnknown
 from .packages import six
 from .packages.six.moves.urllib.parse import urljoin
 from .request import RequestMethods
 from .util.url import parse_url
 from .util.retry import Retry
+from .util.timeout import Timeout, current_time
 
 
-__all__ = ["PoolManager", "ProxyManager", "proxy_from_url"]
+__all__ = [
+    "BasePoolManager",
+    "PoolManager",
+    "ProxyManager",
+    "CachingPoolManager",
+    "proxy_from_url",
+]
 
 
 log = logging.getLogger(__name__)
@@ -38,6 +49,8 @@ _key_fields = (
     "key_port",  # int
     "key_timeout",  # int or float or Timeout
     "key_retries",  # int or Retry
+    "key_retry_budget",  # RetryBudget
+    "key_circuit_breaker",  # CircuitBreaker
     "key_strict",  # bool
     "key_block",  # bool
     "key_source_address",  # str
@@ -50,9 +63,15 @@ _key_fields = (
     "key_ca_cert_dir",  # str
     "key_ssl_context",  # instance of ssl.SSLContext or urllib3.util.ssl_.SSLContext
     "key_maxsize",  # int
+    "key_minsize",  # int
+    "key_max_overflow",  # int
+    "key_metrics",  # Metrics
+    "key_slow_request_hook",  # callable
+    "key_slow_request_thresholds",  # dict
     "key_headers",  # dict
     "key__proxy",  # parsed proxy url
     "key__proxy_headers",  # dict
+    "key_chunked_frame_size",  # int
     "key_socket_options",  # list of (level (int), optname (int), value (int or str)) tuples
     "key__socks_options",  # dict
     "key_assert_hostname",  # bool or string
@@ -60,9 +79,27 @@ _key_fields = (
     "key_server_hostname",  # str
 )
 
-#: The namedtuple class used to construct keys for the connection pool.
-#: All custom key schemes should include the fields in this key at a minimum.
-PoolKey = collections.namedtuple("PoolKey", _key_fields)
+
+class PoolKey(collections.namedtuple("PoolKey", _key_fields)):
+    """
+    The namedtuple class used to construct keys for the connection pool.
+    All custom key schemes should include the fields in this key at a minimum.
+
+    Keys are looked up on every request, so each key only computes its hash
+    once.
+    """
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = super(PoolKey, self).__hash__()
+            return self._hash
+
+    def __reduce__(self):
+        # Don't carry the cached hash over to another process, where string
+        # hashes differ.
+        return self.__class__, tuple(self)
 
 
 def _default_key_normalizer(key_class, request_context):
@@ -90,8 +127,13 @@ def _default_key_normalizer(key_class, request_context):
     context["scheme"] = context["scheme"].lower()
     context["host"] = context["host"].lower()
 
-    # These are both dictionaries and need to be transformed into frozensets
-    for key in ("headers", "_proxy_headers", "_socks_options"):
+    # These are dictionaries and need to be transformed into frozensets
+    for key in (
+        "headers",
+        "_proxy_headers",
+        "_socks_options",
+        "slow_request_thresholds",
+    ):
         if key in context and context[key] is not None:
             context[key] = frozenset(context[key].items())
 
@@ -126,10 +168,12 @@ key_fn_by_scheme = {
 pool_classes_by_scheme = {"http": HTTPConnectionPool, "https": HTTPSConnectionPool}
 
 
-class PoolManager(RequestMethods):
+class BasePoolManager(RequestMethods):
     """
-    Allows for arbitrary requests while transparently keeping track of
-    necessary connection pools for you.
+    Keeps track of the connection pools for the hosts requests are made to,
+    and works out where redirects lead. It leaves :meth:`urlopen` to
+    subclasses, such as :class:`PoolManager` and
+    :class:`urllib3.contrib.aio.AsyncPoolManager`.
 
     :param num_pools:
         Number of connection pools to cache before discarding the least
@@ -142,20 +186,13 @@ class PoolManager(RequestMethods):
     :param \\**connection_pool_kw:
         Additional parameters are used to create fresh
         :class:`urllib3.connectionpool.ConnectionPool` instances.
-
-    Example::
-
-        >>> manager = PoolManager(num_pools=2)
-        >>> r = manager.request('GET', 'http://google.com/')
-        >>> r = manager.request('GET', 'http://google.com/mail')
-        >>> r = manager.request('GET', 'http://yahoo.com/')
-        >>> len(manager.pools)
-        2
-
     """
 
     proxy = None
 
+    #: Maximum number of pool keys remembered by :meth:`connection_from_host`.
+    pool_key_cache_size = 1000
+
     def __init__(self, num_pools=10, headers=None, **connection_pool_kw):
         RequestMethods.__init__(self, headers)
         self.connection_pool_kw = connection_pool_kw
@@ -166,6 +203,14 @@ class PoolManager(RequestMethods):
         self.pool_classes_by_scheme = pool_classes_by_scheme
         self.key_fn_by_scheme = key_fn_by_scheme.copy()
 
+        # Pool keys and request contexts computed by connection_from_host(),
+        # by (scheme, host, port, id(pool_kwargs)).
+        self._pool_key_cache = {}
+        self._overrides_context = (
+            type(self).connection_from_context
+            != BasePoolManager.connection_from_context
+        )
+
     def __enter__(self):
         return self
 
@@ -224,6 +269,23 @@ class PoolManager(RequestMethods):
         if not host:
             raise LocationValueError("No host specified.")
 
+        # Building a pool key means merging and normalizing all of the pool
+        # kwargs, so remember the key for each host. It is reused for as long
+        # as the kwargs and key function it was made from are unchanged. A
+        # hit still compares those kwargs with the ones it was made from.
+        cache_key = (scheme, host, port, id(pool_kwargs))
+        entry = self._pool_key_cache.get(cache_key)
+        if entry is not None:
+            kw, pool_kw, key_scheme, key_fn, pool_key, request_context, _ = entry
+            if (
+                kw == self.connection_pool_kw
+                and pool_kw == pool_kwargs
+                and key_fn is self.key_fn_by_scheme.get(key_scheme)
+            ):
+                return self.connection_from_pool_key(
+                    pool_key, request_context=request_context
+                )
+
         request_context = self._merge_pool_kwargs(pool_kwargs)
         request_context["scheme"] = scheme or "http"
         if not port:
@@ -231,7 +293,29 @@ class PoolManager(RequestMethods):
         request_context["port"] = port
         request_context["host"] = host
 
-        return self.connection_from_context(request_context)
+        # A subclass which overrides connection_from_context() sees every
+        # lookup, so its pool keys aren't remembered.
+        if self._overrides_context:
+            return self.connection_from_context(request_context)
+
+        key_scheme = request_context["scheme"].lower()
+        key_fn = self.key_fn_by_scheme[key_scheme]
+        pool_key = key_fn(request_context)
+
+        if len(self._pool_key_cache) >= self.pool_key_cache_size:
+            self._pool_key_cache.clear()
+        self._pool_key_cache[cache_key] = (
+            self.connection_pool_kw.copy(),
+            pool_kwargs and pool_kwargs.copy(),
+            key_scheme,
+            key_fn,
+            pool_key,
+            request_context,
+            # Hold on to pool_kwargs so that its id can't be reused.
+            pool_kwargs,
+        )
+
+        return self.connection_from_pool_key(pool_key, request_context=request_context)
 
     def connection_from_context(self, request_context):
         """
@@ -265,7 +349,9 @@ class PoolManager(RequestMethods):
             scheme = request_context["scheme"]
             host = request_context["host"]
             port = request_context["port"]
-            pool = self._new_pool(scheme, host, port, request_context=request_context)
+            pool = self._new_pool(
+                scheme, host, port, request_context=request_context.copy()
+            )
             self.pools[pool_key] = pool
 
         return pool
@@ -306,32 +392,23 @@ class PoolManager(RequestMethods):
                     base_pool_kwargs[key] = value
         return base_pool_kwargs
 
-    def urlopen(self, method, url, redirect=True, **kw):
-        """
-        Same as :meth:`urllib3.connectionpool.HTTPConnectionPool.urlopen`
-        with custom cross-host redirect logic and only sends the request-uri
-        portion of the ``url``.
-
-        The given ``url`` parameter must be absolute, such that an appropriate
-        :class:`urllib3.connectionpool.ConnectionPool` can be chosen for it.
+    def _next_request(self, method, url, response, conn, redirect, kw, elapsed=None):
         """
-        u = parse_url(url)
-        conn = self.connection_from_host(u.host, port=u.port, scheme=u.scheme)
+        Decide whether a response is to be followed by a redirect, possibly
+        to another host.
 
-        kw["assert_same_host"] = False
-        kw["redirect"] = False
-
-        if "headers" not in kw:
-            kw["headers"] = self.headers.copy()
-
-        if self.proxy is not None and u.scheme == "http":
-            response = conn.urlopen(method, url, **kw)
-        else:
-            response = conn.urlopen(method, u.request_uri, **kw)
+        Returns None if ``response`` should be returned to the caller.
+        Otherwise returns the ``(method, url)`` of the next request, and
+        updates ``kw`` with the headers and retries to make it with. Raises
+        :class:`~urllib3.exceptions.MaxRetryError` if the redirects are
+        exhausted and should be raised.
 
+        ``elapsed`` is the time the request which got ``response`` took, which
+        is recorded in the retry history.
+        """
         redirect_location = redirect and response.get_redirect_location()
         if not redirect_location:
-            return response
+            return None
 
         # Support relative URLs for redirecting.
         redirect_location = urljoin(url, redirect_location)
@@ -356,17 +433,224 @@ class PoolManager(RequestMethods):
                     kw["headers"].pop(header, None)
 
         try:
-            retries = retries.increment(method, url, response=response, _pool=conn)
+            retries = retries.increment(
+                method, url, response=response, _pool=conn, _elapsed=elapsed
+            )
         except MaxRetryError:
             if retries.raise_on_redirect:
                 raise
-            return response
+            return None
 
         kw["retries"] = retries
         kw["redirect"] = redirect
 
-        log.info("Redirecting %s -> %s", url, redirect_location)
-        return self.urlopen(method, redirect_location, **kw)
+        return method, redirect_location
+
+
+class PoolManager(BasePoolManager):
+    """
+    Allows for arbitrary requests while transparently keeping track of
+    necessary connection pools for you.
+
+    :param num_pools:
+        Number of connection pools to cache before discarding the least
+        recently used pool.
+
+    :param headers:
+        Headers to include with all requests, unless other headers are given
+        explicitly.
+
+    :param coalescer:
+        A :class:`~urllib3.util.coalesce.RequestCoalescer` to share one
+        response among identical requests made at the same time.
+
+    :param \\**connection_pool_kw:
+        Additional parameters are used to create fresh
+        :class:`urllib3.connectionpool.ConnectionPool` instances.
+
+    Example::
+
+        >>> manager = PoolManager(num_pools=2)
+        >>> r = manager.request('GET', 'http://google.com/')
+        >>> r = manager.request('GET', 'http://google.com/mail')
+        >>> r = manager.request('GET', 'http://yahoo.com/')
+        >>> len(manager.pools)
+        2
+
+    """
+
+    coalescer = None
+
+    def __init__(
+        self, num_pools=10, headers=None, coalescer=None, **connection_pool_kw
+    ):
+        BasePoolManager.__init__(self, num_pools, headers, **connection_pool_kw)
+        self.coalescer = coalescer
+
+    def request_many(
+        self, requests, max_concurrency=10, per_host=None, ordered=False, **kw
+    ):
+        """
+        Make many requests concurrently, spread over the pools of this
+        manager.
+
+        Returns a :class:`urllib3.batch.RequestBatch`, which yields a
+        :class:`urllib3.batch.BatchResult` for each request as it completes
+        (or in input order if ``ordered`` is True), and keeps per-host latency
+        and error counts in its ``summary``. Requests are only started as the
+        batch is iterated over; errors are returned in the results rather than
+        raised.
+
+        :param requests:
+            Iterable of ``(method, url)`` or ``(method, url, kwargs)`` tuples.
+
+        :param max_concurrency:
+            Maximum number of requests in flight at a time.
+
+        :param per_host:
+            Maximum number of requests in flight to a single host. Defaults to
+            the ``maxsize`` of the pools, which it can't exceed.
+
+        :param \\**kw:
+            Passed to :meth:`request` for every request.
+
+        Example::
+
+            >>> manager = PoolManager(maxsize=4)
+            >>> batch = manager.request_many(
+            ...     [('GET', url) for url in urls], max_concurrency=32
+            ... )
+            >>> for result in batch:
+            ...     print(result.url, result.error or result.response.status)
+            >>> batch.summary['http://example.com:80'].mean_time
+            0.084
+        """
+        return RequestBatch(
+            self,
+            requests,
+            max_concurrency=max_concurrency,
+            per_host=per_host,
+            ordered=ordered,
+            request_kw=kw,
+        )
+
+    def download(
+        self,
+        url,
+        dest,
+        segments=4,
+        min_segment_size=2 ** 20,
+        headers=None,
+        retries=None,
+        **kw
+    ):
+        """
+        Download ``url`` to the file at the path ``dest``, fetching up to
+        ``segments`` byte ranges of it at once over the connections of its
+        pool.
+
+        Returns a :class:`urllib3.response.DownloadResult`. Servers which
+        don't accept byte ranges, and files smaller than two segments of
+        ``min_segment_size`` bytes, are downloaded with a single request. See
+        :class:`urllib3.download.SegmentedDownload` for the details.
+
+        Raises :class:`~urllib3.exceptions.ResourceChangedError` if the
+        ``ETag`` or ``Last-Modified`` of the segments don't match, and
+        :class:`~urllib3.exceptions.DownloadError` if a response can't be
+        written to the file.
+
+        :param \\**kw:
+            Passed to :meth:`request` for every request.
+
+        Example::
+
+            >>> manager = PoolManager(maxsize=8)
+            >>> result = manager.download(
+            ...     'http://example.com/big.iso', 'big.iso', segments=8
+            ... )
+            >>> result.bytes_written, result.rate
+            (4294967296, 118240512.0)
+        """
+        return SegmentedDownload(
+            self,
+            url,
+            dest,
+            segments=segments,
+            min_segment_size=min_segment_size,
+            headers=headers,
+            retries=retries,
+            request_kw=kw,
+        ).run()
+
+    def urlopen(self, method, url, redirect=True, **kw):
+        """
+        Same as :meth:`urllib3.connectionpool.HTTPConnectionPool.urlopen`
+        with custom cross-host redirect logic and only sends the request-uri
+        portion of the ``url``.
+
+        The given ``url`` parameter must be absolute, such that an appropriate
+        :class:`urllib3.connectionpool.ConnectionPool` can be chosen for it.
+
+        With a ``coalescer``, identical requests made at the same time share
+        one response, see :class:`~urllib3.util.coalesce.RequestCoalescer`.
+        """
+        if "headers" not in kw:
+            kw["headers"] = self.headers.copy()
+
+        if self.coalescer is not None:
+            return self.coalescer.urlopen(
+                self._urlopen,
+                method,
+                url,
+                default_timeout=self.connection_pool_kw.get(
+                    "timeout", Timeout.DEFAULT_TIMEOUT
+                ),
+                redirect=redirect,
+                **kw
+            )
+        return self._urlopen(method, url, redirect=redirect, **kw)
+
+    def _urlopen(self, method, url, redirect=True, **kw):
+        kw["assert_same_host"] = False
+        kw["redirect"] = False
+
+        # Follow redirects in a loop rather than recursively, so that long
+        # redirect chains don't grow the stack.
+        while True:
+            u = parse_url(url)
+            conn = self.connection_from_host(u.host, port=u.port, scheme=u.scheme)
+
+            if self.proxy is not None and u.scheme == "http":
+                target = url
+            else:
+                target = u.request_uri
+
+            attempt_start = current_time()
+            response = self._urlopen_conn(conn, method, url, target, **kw)
+
+            next_request = self._next_request(
+                method,
+                url,
+                response,
+                conn,
+                redirect,
+                kw,
+                elapsed=current_time() - attempt_start,
+            )
+            if next_request is None:
+                return response
+
+            method, redirect_location = next_request
+            log.info("Redirecting %s -> %s", url, redirect_location)
+            url = redirect_location
+
+    def _urlopen_conn(self, conn, method, url, target, **kw):
+        """
+        Make one request of :meth:`urlopen` for the absolute ``url`` with the
+        pool ``conn``, without following redirects. ``target`` is the URL to
+        pass to the pool.
+        """
+        return conn.urlopen(method, target, **kw)
 
 
 class ProxyManager(PoolManager):
@@ -468,3 +752,132 @@ class ProxyManager(PoolManager):
 
 def proxy_from_url(url, **kw):
     return ProxyManager(proxy_url=url, **kw)
+
+
+class CachingPoolManager(PoolManager):
+    """
+    A :class:`PoolManager` which keeps the responses to ``GET`` requests in
+    a cache, by the rules for private caches of RFC 7234, and answers
+    requests from it for as long as they're fresh.
+
+    A response is kept if its status and ``Cache-Control`` allow it, and if
+    it's fresh for a while, by ``max-age``, ``Expires`` or the age of its
+    ``Last-Modified`` date, or can be revalidated. Stale responses are
+    revalidated with ``If-None-Match`` and ``If-Modified-Since``, and a
+    ``304 Not Modified`` answer is turned into the kept response. For
+    ``Vary``, one variant of each URL is kept, which answers requests with
+    the same values of the headers it varies on. Successful requests with
+    unsafe methods, such as ``POST``, drop the response kept for their URL.
+
+    The body of a response is kept as it's read, and the response is kept
+    once all of it was, so a response which isn't read to the end isn't
+    kept. Responses from the cache are
+    :class:`~urllib3.response.HTTPResponse` objects which read their body
+    from the cache, with an ``Age`` header. Requests with a ``Range``, their
+    own conditional headers or ``Cache-Control: no-store`` skip the cache.
+
+    :param cache:
+        Where to keep the responses: a :class:`~urllib3.cache.MemoryCache`,
+        the default, or a :class:`~urllib3.cache.DiskCache` to share them
+        between processes and keep them across restarts.
+
+    Other parameters are the same as for :class:`PoolManager`.
+
+    Example::
+
+        >>> http = CachingPoolManager(cache=MemoryCache(max_size=16 * 2 ** 20))
+        >>> r = http.request('GET', 'http://example.com/reference.json')
+        >>> r = http.request('GET', 'http://example.com/reference.json')
+        >>> r.headers['Age']
+        '0'
+    """
+
+    #: Methods which don't change resources, so don't drop kept responses.
+    SAFE_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "TRACE"])
+
+    #: Request headers which make requests skip the cache.
+    BYPASS_HEADERS = frozenset(
+        [
+            "Range",
+            "If-Match",
+            "If-None-Match",
+            "If-Modified-Since",
+            "If-Unmodified-Since",
+            "If-Range",
+        ]
+    )
+
+    def __init__(self, num_pools=10, headers=None, cache=None, **connection_pool_kw):
+        super(CachingPoolManager, self).__init__(
+            num_pools, headers, **connection_pool_kw
+        )
+        self.cache = cache if cache is not None else MemoryCache()
+
+    def _urlopen_conn(self, conn, method, url, target, **kw):
+        urlopen = super(CachingPoolManager, self)._urlopen_conn
+        if method != "GET":
+            response = urlopen(conn, method, url, target, **kw)
+            if method not in self.SAFE_METHODS and 200 <= response.status < 400:
+                self.cache.delete(url)
+            return response
+
+        request_headers = HTTPHeaderDict(kw.get("headers"))
+        if any(name in request_headers for name in self.BYPASS_HEADERS):
+            return urlopen(conn, method, url, target, **kw)
+        if "no-store" in request_headers.get("cache-control", "").lower():
+            return urlopen(conn, method, url, target, **kw)
+
+        response_kw = dict(
+            (name, kw[name])
+            for name in ("preload_content", "decode_content", "request_url")
+            if name in kw
+        )
+        preload_content = response_kw.get("preload_content", True)
+
+        entry = self.cache.get(url)
+        if entry is not None and not entry.matches(request_headers):
+            entry = None
+        if entry is not None:
+            now = time.time()
+            if entry.is_fresh(request_headers, now):
+                log.debug("Answering %s from the cache", url)
+                if isinstance(kw.get("retries"), Retry):
+                    response_kw["retries"] = kw["retries"]
+                return entry.to_response(now, **response_kw)
+
+            headers = request_headers.copy()
+            headers.update(entry.validators())
+            kw["headers"] = headers
+
+        # Preload once the body is being kept, if it's to be.
+        kw["preload_content"] = False
+        request_time = time.time()
+        response = urlopen(conn, method, url, target, **kw)
+        response_time = time.time()
+        response_kw["retries"] = response.retries
+
+        if entry is not None and response.status == 304:
+            log.debug("Revalidated %s in the cache", url)
+            response.read()
+            response.release_conn()
+            entry = entry.updated(response, request_time, response_time)
+            self.cache.set(url, entry)
+            return entry.to_response(time.time(), **response_kw)
+
+        length = response.length_remaining
+        if is_cacheable(request_headers, response) and (
+            length is None or length <= self.cache.max_entry_size
+        ):
+            entry = CacheEntry.from_response(
+                url, request_headers, response, None, request_time, response_time
+            )
+            if entry.is_useful():
+                # The body is kept as it's read, and once all of it was.
+                writer = self.cache.writer(url, entry)
+                response._fp = _CacheFiller(response._fp, writer, length)
+
+        if preload_content:
+            response._body = response.read(
+                decode_content=response_kw.get("decode_content")
+            )
+        return response
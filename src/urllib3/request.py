@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 
-from .filepost import encode_multipart_formdata
+from .filepost import encode_multipart_formdata, MultipartEncoder
 from .packages.six.moves.urllib.parse import urlencode
 
 
@@ -140,6 +140,10 @@ class RequestMethods(QObject):
         be overwritten because it depends on the dynamic random boundary string
         which is used to compose the body of the request. The random boundary
         string can be explicitly set with the ``multipart_boundary`` parameter.
+
+        To stream large fields rather than encode them in memory, pass a
+        :class:`~urllib3.filepost.MultipartEncoder` as the ``body`` instead of
+        ``fields``. Its ``Content-Type`` and ``Content-Length`` are sent too.
         """
         if headers is None:
             headers = self.headers
@@ -165,6 +169,9 @@ class RequestMethods(QObject):
             extra_kw["body"] = body
             extra_kw["headers"] = {"Content-Type": content_type}
 
+        elif isinstance(urlopen_kw.get("body"), MultipartEncoder):
+            extra_kw["headers"] = urlopen_kw["body"].headers
+
         extra_kw["headers"].update(headers)
         extra_kw.update(urlopen_kw)
 
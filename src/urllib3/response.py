@@ -1,8 +1,13 @@
 from __future__ import absolute_import
+from collections import namedtuple
 from contextlib import contextmanager
+import email.utils
 import zlib
 import io
 import logging
+import mmap
+import os
+import sys
 from socket import timeout as SocketTimeout
 from socket import error as SocketError
 
@@ -11,6 +16,11 @@ try:
 except ImportError:
     brotli = None
 
+try:
+    import fcntl
+except ImportError:  # Platform-specific: Windows
+    fcntl = None
+
 from ._collections import HTTPHeaderDict
 from .exceptions import (
     BodyNotHttplibCompatible,
@@ -25,9 +35,70 @@ from .packages.six import string_types as basestring, PY3
 from .packages.six.moves import http_client as httplib
 from .connection import HTTPException, BaseSSLError
 from .util.response import is_fp_closed, is_response_to_head
+from .util.timeout import current_time
+from .util.timing import RequestTimings
 
 log = logging.getLogger(__name__)
 
+# Keeps Windows from translating line endings in files written with os.write.
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+
+class DownloadResult(namedtuple("DownloadResult", ["bytes_written", "seconds"])):
+    """ What :meth:`HTTPResponse.stream_to_file` wrote, and how long it took. """
+
+    @property
+    def rate(self):
+        """ Bytes written per second. """
+        if not self.seconds:
+            return 0.0
+        return self.bytes_written / float(self.seconds)
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _is_readable(fd):
+    """ Whether ``fd`` was opened for reading, which mapping it needs. """
+    if fcntl is None:
+        return True
+    return fcntl.fcntl(fd, fcntl.F_GETFL) & os.O_ACCMODE != os.O_WRONLY
+
+
+def _accepts_ranges(headers):
+    units = headers.get("accept-ranges", "").split(",")
+    return "bytes" in [unit.strip().lower() for unit in units]
+
+
+def _parse_http_date(value):
+    parsed = value and email.utils.parsedate_tz(value)
+    if not parsed:
+        return None
+    return email.utils.mktime_tz(parsed)
+
+
+def _strong_validator(headers):
+    """
+    Return the validator of a response which can be sent in ``If-Range``:
+    its ``ETag`` unless that's weak, or else its ``Last-Modified`` date if
+    that's at least a second before its ``Date`` (RFC 7232, Section 2.2.2).
+    Returns None if it has neither.
+    """
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+
+    last_modified = headers.get("last-modified")
+    modified = _parse_http_date(last_modified)
+    date = _parse_http_date(headers.get("date"))
+    if modified is not None and date is not None and date - modified >= 1:
+        return last_modified
+    return None
+
+
 from PyQt5.QtCore import QObject
 class DeflateDecoder(QObject):
     def __init__(self):
@@ -183,6 +254,25 @@ class HTTPResponse(io.IOBase):
     :param enforce_content_length:
         Enforce content length checking. Body returned by server must match
         value of Content-Length header, if present. Otherwise, raise error.
+
+    :param timings:
+        The :class:`~urllib3.util.timing.RequestTimings` of the request, kept
+        as :attr:`timings`. Time spent reading the body is added to its
+        ``download``.
+
+    :param resumable:
+        If True, a body which breaks off, or ends before its
+        ``Content-Length``, is asked for again from where it stopped with a
+        ``Range`` request, and reading carries on as if nothing happened.
+        Each time counts as a read error of :attr:`retries`. Only the ``200``
+        responses to ``GET`` requests made by a connection pool, with
+        ``Accept-Ranges: bytes``, a strong ``ETag`` or ``Last-Modified`` date
+        and no chunked encoding, can be resumed.
+
+    :param resume_request:
+        The ``(method, url, headers, timeout)`` to ask ``pool`` for the rest
+        of a resumable body with. Set by
+        :meth:`~urllib3.connectionpool.HTTPConnectionPool.urlopen`.
     """
 
     CONTENT_DECODERS = ["gzip", "deflate"]
@@ -208,6 +298,9 @@ class HTTPResponse(io.IOBase):
         enforce_content_length=False,
         request_method=None,
         request_url=None,
+        timings=None,
+        resumable=False,
+        resume_request=None,
     ):
 
         if isinstance(headers, HTTPHeaderDict):
@@ -221,6 +314,9 @@ class HTTPResponse(io.IOBase):
         self.decode_content = decode_content
         self.retries = retries
         self.enforce_content_length = enforce_content_length
+        self.timings = timings if timings is not None else RequestTimings()
+        self.resumable = resumable
+        self._resume_request = resume_request
 
         self._decoder = None
         self._body = None
@@ -229,6 +325,7 @@ class HTTPResponse(io.IOBase):
         self._fp_bytes_read = 0
         self.msg = msg
         self._request_url = request_url
+        self._request_method = request_method
 
         if body and isinstance(body, (basestring, bytes)):
             self._body = body
@@ -268,6 +365,11 @@ class HTTPResponse(io.IOBase):
 
         return False
 
+    def _record_received(self, amount):
+        metrics = getattr(self._pool, "metrics", None)
+        if metrics is not None:
+            metrics.inc(self._pool, "bytes_received", amount)
+
     def release_conn(self):
         if not self._pool or not self._connection:
             return
@@ -492,42 +594,25 @@ class HTTPResponse(io.IOBase):
         if self._fp is None:
             return
 
-        flush_decoder = False
-        data = None
+        if amt is not None:
+            cache_content = False
 
-        with self._error_catcher():
-            if amt is None:
-                # cStringIO doesn't like amt=None
-                data = self._fp.read()
-                flush_decoder = True
-            else:
-                cache_content = False
-                data = self._fp.read(amt)
-                if (
-                    amt != 0 and not data
-                ):  # Platform-specific: Buggy versions of Python.
-                    # Close the connection when no data is returned
-                    #
-                    # This is redundant to what httplib/http.client _should_
-                    # already do.  However, versions of python released before
-                    # December 15, 2012 (http://bugs.python.org/issue16298) do
-                    # not properly close the connection in all cases. There is
-                    # no harm in redundantly calling close.
-                    self._fp.close()
-                    flush_decoder = True
-                    if self.enforce_content_length and self.length_remaining not in (
-                        0,
-                        None,
-                    ):
-                        # This is an edge case that httplib failed to cover due
-                        # to concerns of backward compatibility. We're
-                        # addressing it here to make sure IncompleteRead is
-                        # raised during streaming, so all calls with incorrect
-                        # Content-Length are caught.
-                        raise IncompleteRead(self._fp_bytes_read, self.length_remaining)
+        start = current_time()
+        while True:
+            try:
+                data = self._read_fp(amt)
+                break
+            except (ProtocolError, ReadTimeoutError) as e:
+                if not self._resume(e):
+                    raise
+
+        # The body is over.
+        flush_decoder = amt is None or (amt != 0 and not data)
 
+        self.timings.add("download", current_time() - start)
         if data:
             self._fp_bytes_read += len(data)
+            self._record_received(len(data))
             if self.length_remaining is not None:
                 self.length_remaining -= len(data)
 
@@ -538,6 +623,106 @@ class HTTPResponse(io.IOBase):
 
         return data
 
+    def _read_fp(self, amt):
+        with self._error_catcher():
+            if amt is None:
+                # cStringIO doesn't like amt=None
+                return self._fp.read()
+
+            data = self._fp.read(amt)
+            if amt != 0 and not data:  # Platform-specific: Buggy versions of Python.
+                # Close the connection when no data is returned
+                #
+                # This is redundant to what httplib/http.client _should_
+                # already do.  However, versions of python released before
+                # December 15, 2012 (http://bugs.python.org/issue16298) do
+                # not properly close the connection in all cases. There is
+                # no harm in redundantly calling close.
+                self._fp.close()
+                if self.length_remaining not in (0, None) and (
+                    self.enforce_content_length or self._can_resume()
+                ):
+                    # This is an edge case that httplib failed to cover due
+                    # to concerns of backward compatibility. We're
+                    # addressing it here to make sure IncompleteRead is
+                    # raised during streaming, so all calls with incorrect
+                    # Content-Length are caught.
+                    raise IncompleteRead(self._fp_bytes_read, self.length_remaining)
+            return data
+
+    def _can_resume(self):
+        return bool(
+            self.resumable
+            and self._resume_request is not None
+            and self._request_method == "GET"
+            and self.retries is not None
+            and self.status == 200
+            and not self.chunked
+            and _accepts_ranges(self.headers)
+            and _strong_validator(self.headers)
+        )
+
+    def _resume(self, error):
+        """
+        Ask for the rest of a body which broke off with ``error``, and carry
+        on reading it from the new response. Returns False if the body can't
+        be resumed.
+        """
+        if not self._can_resume():
+            return False
+
+        method, url, headers, timeout = self._resume_request
+        retries = self.retries.increment(
+            method, url, error=error, _pool=self._pool, _stacktrace=sys.exc_info()[2]
+        )
+        retries.sleep()
+        log.debug("Resuming %s at byte %d after %r", url, self._fp_bytes_read, error)
+
+        validator = _strong_validator(self.headers)
+        headers = headers.copy()
+        headers["Range"] = "bytes=%d-" % self._fp_bytes_read
+        headers["If-Range"] = validator
+        response = self._pool.urlopen(
+            method,
+            url,
+            headers=headers,
+            retries=retries,
+            redirect=False,
+            assert_same_host=False,
+            timeout=timeout,
+            preload_content=False,
+            release_conn=False,
+            decode_content=False,
+        )
+
+        content_range = response.headers.get("content-range", "")
+        expected = "bytes %d-" % self._fp_bytes_read
+        if self.length_remaining is not None:
+            total = self._fp_bytes_read + self.length_remaining
+            expected_end = "-%d/%d" % (total - 1, total)
+        else:
+            expected_end = ""
+        if (
+            response.status != 206
+            or response.chunked
+            or not content_range.startswith(expected)
+            or not content_range.endswith(expected_end)
+            or _strong_validator(response.headers) != validator
+        ):
+            log.debug("Can't resume %s: got %r", url, response.headers)
+            response.close()
+            response.release_conn()
+            return False
+
+        # Carry on with the new connection. The new response is left empty,
+        # so that closing it doesn't close them.
+        self._fp = response._fp
+        self._original_response = response._original_response
+        self._connection = response._connection
+        self.retries = response.retries or retries
+        response._fp = response._original_response = response._connection = None
+        return True
+
     def stream(self, amt=2 ** 16, decode_content=None):
         """
         A generator wrapper for the read() method. A call will block until
@@ -564,6 +749,161 @@ class HTTPResponse(io.IOBase):
                 if data:
                     yield data
 
+    def stream_to_file(
+        self, dest, amt=2 ** 16, decode_content=None, preallocate=True, use_mmap=False
+    ):
+        """
+        Write the rest of the body to a file, and return a
+        :class:`DownloadResult` of how many bytes were written and how fast.
+
+        Unless the body has to be decoded, it's read into one reused buffer
+        with ``readinto`` rather than as a new ``bytes`` object per block.
+
+        :param dest:
+            A path to write to, which is created or truncated, or a file
+            descriptor or file object to write to from its current position.
+
+        :param amt:
+            How many bytes to read at a time.
+
+        :param decode_content:
+            If True, will attempt to decode the body based on the
+            'content-encoding' header.
+
+        :param preallocate:
+            Allocate the space for the body up front with
+            :func:`os.posix_fallocate`, when the ``Content-Length`` is known
+            and the platform supports it, so the file doesn't fragment as it
+            grows.
+
+        :param use_mmap:
+            Read the body straight into a shared memory map of the file, when
+            the ``Content-Length`` is known and the file is open for reading.
+            The file is sized up front and other processes can map it and read
+            what has arrived so far while the download goes on.
+        """
+        start = current_time()
+        if isinstance(dest, (basestring, bytes)):
+            fd = os.open(dest, os.O_RDWR | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o666)
+            close = True
+        else:
+            if hasattr(dest, "fileno"):
+                dest.flush()
+                dest = dest.fileno()
+            fd = dest
+            close = False
+
+        try:
+            written = self._stream_to_fd(fd, amt, decode_content, preallocate, use_mmap)
+        finally:
+            if close:
+                os.close(fd)
+        return DownloadResult(written, current_time() - start)
+
+    def _stream_to_fd(self, fd, amt, decode_content, preallocate, use_mmap):
+        self._init_decoder()
+        if decode_content is None:
+            decode_content = self.decode_content
+
+        if self._body is not None or self._fp is None or self.isclosed():
+            data = self._body or b""
+            _write_all(fd, data)
+            return len(data)
+
+        offset = os.lseek(fd, 0, os.SEEK_CUR)
+        length = self.length_remaining
+        if (
+            self.chunked
+            or (decode_content and self._decoder is not None)
+            or not hasattr(self._fp, "readinto")
+        ):
+            # The length on the wire isn't the length of the file.
+            written = 0
+            for data in self.stream(amt, decode_content=decode_content):
+                _write_all(fd, data)
+                written += len(data)
+            return written
+
+        # Only space past the current end of the file is set aside, and only
+        # that is given back if the body is short.
+        size = os.fstat(fd).st_size
+        if not length or not _is_readable(fd):
+            use_mmap = False
+        elif use_mmap:
+            if size < offset + length:
+                os.ftruncate(fd, offset + length)
+        elif preallocate and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, offset, length)
+            except OSError:
+                # Not supported by the file system.
+                pass
+
+        written = 0
+        try:
+            if use_mmap:
+                # Maps have to start at a multiple of the allocation granularity.
+                skip = offset % mmap.ALLOCATIONGRANULARITY
+                mapped = mmap.mmap(fd, skip + length, offset=offset - skip)
+                target = memoryview(mapped)[skip:]
+                try:
+                    while written < length:
+                        n = self._readinto(target[written : written + amt])
+                        if not n:
+                            break
+                        written += n
+                finally:
+                    del target
+                    try:
+                        mapped.close()
+                    except BufferError:
+                        # A traceback still refers to part of the map. It's
+                        # unmapped once that's collected.
+                        pass
+            else:
+                buf = memoryview(bytearray(amt))
+                while True:
+                    n = self._readinto(buf)
+                    if not n:
+                        break
+                    _write_all(fd, buf[:n])
+                    written += n
+        finally:
+            if length and written < length and size < offset + length:
+                # Don't leave preallocated space behind a short body.
+                os.ftruncate(fd, max(size, offset + written))
+            if use_mmap or (length and written < length):
+                os.lseek(fd, offset + written, os.SEEK_SET)
+
+        if self.enforce_content_length and self.length_remaining not in (0, None):
+            with self._error_catcher():
+                raise IncompleteRead(self._fp_bytes_read, self.length_remaining)
+        return written
+
+    def _readinto(self, b):
+        """ Read raw body bytes into ``b``, keeping count like :meth:`read`. """
+        start = current_time()
+        while True:
+            try:
+                with self._error_catcher():
+                    n = self._fp.readinto(b)
+                    if not n and len(b) and self.length_remaining:
+                        if self._can_resume():
+                            raise IncompleteRead(
+                                self._fp_bytes_read, self.length_remaining
+                            )
+                break
+            except (ProtocolError, ReadTimeoutError) as e:
+                if not self._resume(e):
+                    raise
+        self.timings.add("download", current_time() - start)
+        if n:
+            self._fp_bytes_read += n
+            self._record_received(n)
+            if self.length_remaining is not None:
+                self.length_remaining -= n
+        return n
+
     @classmethod
     def from_httplib(ResponseCls, r, **response_kw):
         """
@@ -738,10 +1078,13 @@ class HTTPResponse(io.IOBase):
                 return
 
             while True:
+                start = current_time()
                 self._update_chunk_length()
                 if self.chunk_left == 0:
                     break
                 chunk = self._handle_chunk(amt)
+                self.timings.add("download", current_time() - start)
+                self._record_received(len(chunk))
                 decoded = self._decode(
                     chunk, decode_content=decode_content, flush_decoder=False
                 )
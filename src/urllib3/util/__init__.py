@@ -16,18 +16,25 @@ from .ssl_ import (
     PROTOCOL_TLS,
 )
 from .timeout import current_time, Timeout
+from .circuit import CircuitBreaker
+from .metrics import Metrics
+from .timing import RequestTimings
 
-from .retry import Retry
+from .retry import Retry, RetryBudget
 from .url import get_host, parse_url, split_first, Url
 from .wait import wait_for_read, wait_for_write
 
 __all__ = (
+    "CircuitBreaker",
     "HAS_SNI",
     "IS_PYOPENSSL",
     "IS_SECURETRANSPORT",
+    "Metrics",
     "SSLContext",
     "PROTOCOL_TLS",
+    "RequestTimings",
     "Retry",
+    "RetryBudget",
     "Timeout",
     "Url",
     "assert_fingerprint",
@@ -0,0 +1,173 @@
+from __future__ import absolute_import
+import logging
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import QObject
+
+from ..exceptions import CircuitOpenError, ConnectTimeoutError, ProtocolError
+from .timeout import current_time
+
+
+log = logging.getLogger(__name__)
+
+
+class _Circuit(QObject):
+    """ The state of the circuit of one host. """
+
+    def __init__(self, state):
+        self.state = state
+        self.failures = 0
+        self.opened_at = None
+
+
+class CircuitBreaker(QObject):
+    """ Fail fast on requests to hosts which are down.
+
+    Without a circuit breaker, every request to a host which is down ties up
+    a pool slot for a connect timeout, and then for each of its retries. A
+    breaker tracks a circuit for each ``(scheme, host, port)`` of the pools
+    it's attached to:
+
+    - While ``closed``, requests go through. ``failure_threshold``
+      consecutive failures open the circuit.
+    - While ``open``, requests raise
+      :class:`~urllib3.exceptions.CircuitOpenError` without touching the
+      network. After ``recovery_timeout`` seconds the circuit is
+      ``half-open``.
+    - While ``half-open``, one probe request goes through every
+      ``recovery_timeout`` seconds, and the others fail fast. The circuit
+      closes when a probe succeeds, and opens again when one fails.
+
+    Connection errors, connect timeouts, protocol errors, and responses with
+    a 5xx status in the :class:`~urllib3.util.retry.Retry`'s
+    ``status_forcelist`` are failures. Any other response is a success, and
+    other errors don't count either way.
+
+    Attach a breaker to a pool, or to every pool of a
+    :class:`~urllib3.poolmanager.PoolManager`::
+
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10)
+        breaker.state_changed.connect(on_state_changed)
+        http = PoolManager(circuit_breaker=breaker)
+
+    :param int failure_threshold:
+        How many failures in a row open the circuit.
+
+    :param float recovery_timeout:
+        How many seconds an open circuit refuses requests before letting a
+        probe through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    #: Emitted with the ``(scheme, host, port)`` of a circuit, its old state
+    #: and its new state whenever its state changes.
+    state_changed = QtCore.pyqtSignal(object, str, str)
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        QObject.__init__(self)
+
+        if failure_threshold < 1:
+            raise ValueError(
+                "failure_threshold must be at least 1, got %r." % failure_threshold
+            )
+        if recovery_timeout <= 0:
+            raise ValueError(
+                "recovery_timeout must be greater than 0, got %r." % recovery_timeout
+            )
+
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._lock = QtCore.QMutex()
+        # Only hosts with failures, or whose circuit isn't closed, have a
+        # circuit here.
+        self._circuits = {}
+
+    def __repr__(self):
+        return (
+            "{cls.__name__}(failure_threshold={self.failure_threshold}, "
+            "recovery_timeout={self.recovery_timeout})"
+        ).format(cls=type(self), self=self)
+
+    @staticmethod
+    def _key(pool):
+        return pool.scheme, pool.host, pool.port
+
+    def state(self, scheme, host, port):
+        """ Return the state of the circuit of a host. """
+        with QtCore.QMutexLocker(self._lock):
+            circuit = self._circuits.get((scheme, host, port))
+            return circuit.state if circuit is not None else self.CLOSED
+
+    def _changed(self, key, old, new):
+        if new == self.OPEN:
+            log.warning("Circuit for %s://%s:%s opened", *key)
+        else:
+            log.info("Circuit for %s://%s:%s is %s", key[0], key[1], key[2], new)
+        self.state_changed.emit(key, old, new)
+
+    def before_request(self, pool, url):
+        """ Raise :class:`~urllib3.exceptions.CircuitOpenError` unless a
+        request to ``url`` may be made through ``pool``.
+        """
+        key = self._key(pool)
+        with QtCore.QMutexLocker(self._lock):
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.state == self.CLOSED:
+                return
+
+            now = current_time()
+            if now - circuit.opened_at < self.recovery_timeout:
+                raise CircuitOpenError(
+                    pool, url, "Circuit breaker is %s." % circuit.state
+                )
+
+            # Let this request through as a probe, and refuse any others
+            # until it has an outcome or recovery_timeout has passed again.
+            circuit.opened_at = now
+            old = circuit.state
+            circuit.state = self.HALF_OPEN
+
+        if old != self.HALF_OPEN:
+            self._changed(key, old, self.HALF_OPEN)
+
+    def is_failure(self, response=None, error=None, status_forcelist=()):
+        """ Does this outcome of a request count as a failure of its host? """
+        if error is not None:
+            return isinstance(error, (ConnectTimeoutError, ProtocolError))
+        return response.status >= 500 and response.status in status_forcelist
+
+    def after_request(self, pool, response=None, error=None, status_forcelist=()):
+        """ Record the outcome of a request made through ``pool``: either the
+        ``response`` it got, or the ``error`` it raised.
+        """
+        failed = self.is_failure(response, error, status_forcelist)
+        if error is not None and not failed:
+            return
+
+        key = self._key(pool)
+        with QtCore.QMutexLocker(self._lock):
+            circuit = self._circuits.get(key)
+            if not failed:
+                if circuit is None:
+                    return
+                del self._circuits[key]
+                old, new = circuit.state, self.CLOSED
+
+            else:
+                if circuit is None:
+                    circuit = self._circuits[key] = _Circuit(self.CLOSED)
+                circuit.failures += 1
+
+                old = new = circuit.state
+                if old == self.HALF_OPEN or (
+                    old == self.CLOSED and circuit.failures >= self.failure_threshold
+                ):
+                    circuit.state = new = self.OPEN
+                    circuit.opened_at = current_time()
+
+        if old != new:
+            self._changed(key, old, new)
@@ -0,0 +1,247 @@
+from __future__ import absolute_import
+import logging
+import socket
+from io import BytesIO
+
+from PyQt5 import QtCore
+
+from .._collections import HTTPHeaderDict
+from ..response import HTTPResponse
+from .timeout import Timeout, current_time
+
+
+log = logging.getLogger(__name__)
+
+
+class _Flight(QtCore.QObject):
+    """ A request in flight, which identical requests wait for. """
+
+    done = False
+    response = None
+    body = None
+    error = None
+
+    def __init__(self):
+        self.landed = QtCore.QWaitCondition()
+        self.waiters = 0
+
+
+def _wait_timeout(timeout):
+    """
+    Seconds a request made with ``timeout`` may take before it times out, or
+    None if it has no limit.
+    """
+    if not isinstance(timeout, Timeout):
+        timeout = Timeout.from_float(timeout)
+    if timeout.total is not None and timeout.total is not Timeout.DEFAULT_TIMEOUT:
+        return timeout.total
+
+    seconds = 0
+    for value in (timeout.connect_timeout, timeout.read_timeout):
+        if value is Timeout.DEFAULT_TIMEOUT:
+            value = socket.getdefaulttimeout()
+        if value is None:
+            return None
+        seconds += value
+    return seconds
+
+
+class RequestCoalescer(QtCore.QObject):
+    """ Share one request among identical requests made at the same time.
+
+    When many threads ask for the same resource at once, say when a popular
+    entry of some cache expires, each of them would take a connection and
+    make the same request. With a coalescer attached to a
+    :class:`~urllib3.poolmanager.PoolManager`, the first of them makes the
+    request, and the others wait for it and get its response instead::
+
+        http = PoolManager(coalescer=RequestCoalescer(max_body_size=2 ** 20))
+
+    Requests are identical when they have the same method, URL, ``redirect``
+    flag, and values of the ``key_headers``, and requests with a body are
+    never shared. The response's body is read once, and every request gets
+    an :class:`~urllib3.response.HTTPResponse` of its own, which reads from
+    that copy and is preloaded and decoded as it asked. Responses without a
+    ``Content-Length``, or with a larger one than ``max_body_size``, aren't
+    shared: the first request gets the response, and the others are made on
+    their own once it arrives. An error is raised to every request.
+
+    Requests which wait are made with the retries and timeout of the first
+    one. A request waits no longer than its own ``timeout`` allows, and then
+    gives up on the first one and is made on its own.
+
+    :param int max_body_size:
+        The largest body to share, in bytes.
+
+    :param methods:
+        The methods of requests to share. Only safe methods should be.
+
+    :param key_headers:
+        The names of the request headers which make responses differ, so
+        that requests which differ in them aren't shared. Other headers are
+        ignored, so add any others the servers vary on.
+    """
+
+    #: Request headers which make responses differ, by default.
+    DEFAULT_KEY_HEADERS = frozenset(
+        [
+            "Accept",
+            "Accept-Encoding",
+            "Accept-Language",
+            "Authorization",
+            "Cache-Control",
+            "Cookie",
+            "If-Match",
+            "If-Modified-Since",
+            "If-None-Match",
+            "If-Range",
+            "If-Unmodified-Since",
+            "Pragma",
+            "Range",
+        ]
+    )
+
+    def __init__(
+        self,
+        max_body_size=2 ** 20,
+        methods=frozenset(["GET", "HEAD"]),
+        key_headers=DEFAULT_KEY_HEADERS,
+    ):
+        if max_body_size < 0:
+            raise ValueError(
+                "max_body_size must not be negative, got %r." % max_body_size
+            )
+
+        self.max_body_size = max_body_size
+        self.methods = frozenset(method.upper() for method in methods)
+        self.key_headers = sorted(set(name.lower() for name in key_headers))
+
+        self._lock = QtCore.QMutex()
+        self._flights = {}
+
+    def __repr__(self):
+        return "%s(max_body_size=%r)" % (type(self).__name__, self.max_body_size)
+
+    def _key(self, method, url, kw):
+        headers = HTTPHeaderDict(kw.get("headers"))
+        return (
+            method,
+            url,
+            kw.get("redirect", True),
+            tuple(
+                (name, tuple(headers.get_all(name)))
+                for name in self.key_headers
+                if name in headers
+            ),
+        )
+
+    def urlopen(
+        self, urlopen, method, url, default_timeout=Timeout.DEFAULT_TIMEOUT, **kw
+    ):
+        """
+        Make the request ``urlopen(method, url, **kw)``, or wait for an
+        identical one which is in flight and share its response.
+
+        :param default_timeout:
+            The timeout the request is made with if ``kw`` has none, which
+            limits how long it waits.
+        """
+        if method not in self.methods or kw.get("body") is not None:
+            return urlopen(method, url, **kw)
+
+        key = self._key(method, url, kw)
+        response_kw = dict(
+            (name, kw[name])
+            for name in ("preload_content", "decode_content", "request_url")
+            if name in kw
+        )
+
+        with QtCore.QMutexLocker(self._lock):
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            else:
+                flight.waiters += 1
+                leader = False
+                timeout = _wait_timeout(kw.get("timeout", default_timeout))
+                landed = self._wait(flight, timeout)
+                if not landed:
+                    flight.waiters -= 1
+
+        if leader:
+            return self._lead(flight, key, urlopen, method, url, response_kw, kw)
+
+        if not landed:
+            log.debug("Gave up waiting for identical %s %s", method, url)
+            return urlopen(method, url, **kw)
+
+        if flight.error is not None:
+            raise flight.error
+        if flight.response is None:
+            log.debug("Response to %s %s can't be shared", method, url)
+            return urlopen(method, url, **kw)
+        return self._share(flight, method, response_kw)
+
+    def _wait(self, flight, timeout):
+        """
+        Wait up to ``timeout`` seconds for ``flight`` to land, with the lock
+        held. Returns whether it did.
+        """
+        deadline = None if timeout is None else current_time() + timeout
+        while not flight.done:
+            if deadline is None:
+                flight.landed.wait(self._lock)
+                continue
+            remaining = deadline - current_time()
+            if remaining <= 0:
+                return False
+            flight.landed.wait(self._lock, int(remaining * 1000) + 1)
+        return True
+
+    def _lead(self, flight, key, urlopen, method, url, response_kw, kw):
+        kw["preload_content"] = False
+        try:
+            response = urlopen(method, url, **kw)
+            length = response.length_remaining
+            if length is not None and length <= self.max_body_size:
+                flight.body = response.read(decode_content=False)
+                response.release_conn()
+                flight.response = response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with QtCore.QMutexLocker(self._lock):
+                del self._flights[key]
+                flight.done = True
+                flight.landed.wakeAll()
+                waiters = flight.waiters
+            if waiters:
+                log.debug("%s %s answered %d more requests", method, url, waiters)
+
+        if flight.response is not None:
+            return self._share(flight, method, response_kw)
+
+        if response_kw.get("preload_content", True):
+            response._body = response.read(
+                decode_content=response_kw.get("decode_content")
+            )
+        return response
+
+    @staticmethod
+    def _share(flight, method, response_kw):
+        response = flight.response
+        return HTTPResponse(
+            body=BytesIO(flight.body),
+            headers=response.headers.copy(),
+            status=response.status,
+            version=response.version,
+            reason=response.reason,
+            strict=response.strict,
+            retries=response.retries,
+            request_method=method,
+            # Reading each response adds to its own download time.
+            timings=response.timings.copy(),
+            **response_kw
+        )
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 import socket
+from .timeout import current_time
 from .wait import NoWayToWaitForSocketError, wait_for_read
 from ..contrib import _appengine_environ
 
@@ -27,7 +28,8 @@ def is_connection_dropped(conn):  # Platform-specific
 
 
 # This function is copied from socket.py in the Python 2.7 standard
-# library test suite. Added to its signature is only `socket_options`.
+# library test suite. Added to its signature are `socket_options` and
+# `timings`.
 # One additional modification is that we avoid binding to IPv6 servers
 # discovered in DNS if the system doesn't have IPv6 functionality.
 def create_connection(
@@ -35,6 +37,7 @@ def create_connection(
     timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
     source_address=None,
     socket_options=None,
+    timings=None,
 ):
     """Connect to *address* and return the socket object.
 
@@ -45,7 +48,9 @@ def create_connection(
     global default timeout setting returned by :func:`getdefaulttimeout`
     is used.  If *source_address* is set it must be a tuple of (host, port)
     for the socket to bind as a source address before making the connection.
-    An host of '' or port 0 tells the OS to use the default.
+    An host of '' or port 0 tells the OS to use the default. If *timings*
+    is a :class:`~urllib3.util.timing.RequestTimings`, the seconds taken to
+    resolve the host name and to connect are added to it.
     """
 
     host, port = address
@@ -58,7 +63,14 @@ def create_connection(
     # The original create_connection function always returns all records.
     family = allowed_gai_family()
 
-    for res in socket.getaddrinfo(host, port, family, socket.SOCK_STREAM):
+    start = current_time()
+    addresses = socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+    if timings is not None:
+        resolved = current_time()
+        timings.add("dns", resolved - start)
+        start = resolved
+
+    for res in addresses:
         af, socktype, proto, canonname, sa = res
         sock = None
         try:
@@ -72,6 +84,8 @@ def create_connection(
             if source_address:
                 sock.bind(source_address)
             sock.connect(sa)
+            if timings is not None:
+                timings.add("connect", current_time() - start)
             return sock
 
         except socket.error as e:
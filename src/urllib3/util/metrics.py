@@ -0,0 +1,241 @@
+from __future__ import absolute_import
+import bisect
+import collections
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import QObject
+
+
+#: Upper bounds of the default histogram buckets, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+#: A histogram in a :meth:`Metrics.snapshot`. ``counts[i]`` is the number of
+#: observations no greater than ``buckets[i]``, ``count`` is the number of
+#: all observations and ``sum`` their total.
+HistogramSnapshot = collections.namedtuple(
+    "HistogramSnapshot", ["buckets", "counts", "count", "sum"]
+)
+
+
+class _Histogram(QObject):
+    """ Observations of one histogram of one host. """
+
+    def __init__(self, size):
+        # One count per bucket, plus one for observations above the last.
+        self.counts = [0] * (size + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+class Metrics(QObject):
+    """ Counters and histograms of what connection pools are doing.
+
+    Attach a registry to a pool, or to every pool of a
+    :class:`~urllib3.poolmanager.PoolManager`, and it keeps separate numbers
+    for each ``(scheme, host, port)`` the pools connect to::
+
+        metrics = Metrics()
+        http = PoolManager(metrics=metrics)
+        http.request('GET', 'http://example.com/')
+        metrics.snapshot()[('http', 'example.com', 80)]['connections_created']
+
+    Recording a number takes a lock and a dictionary lookup, so it's cheap
+    enough to leave on. Read everything at once with :meth:`snapshot`, or in
+    the Prometheus text format with :meth:`to_prometheus`.
+
+    The counters are listed in :attr:`COUNTERS` and the histograms, of
+    durations in seconds, in :attr:`HISTOGRAMS`. ``retries`` are counted by
+    cause (``connect``, ``read``, ``status`` or ``error``) and ``redirects``
+    by status.
+
+    :param buckets:
+        Upper bounds of the histogram buckets, in seconds.
+    """
+
+    #: Counters, with their description.
+    COUNTERS = collections.OrderedDict(
+        [
+            ("connections_created", "New connections made."),
+            ("connections_reused", "Connections reused from the pool."),
+            (
+                "connections_dropped",
+                "Pooled connections found closed by the server, and reset.",
+            ),
+            ("connections_discarded", "Connections closed because the pool was full."),
+            ("bytes_sent", "Bytes of requests sent."),
+            ("bytes_received", "Bytes of response bodies received."),
+            ("retries", "Requests retried, by cause."),
+            ("redirects", "Redirects followed, by status."),
+        ]
+    )
+
+    #: Histograms, with their description.
+    HISTOGRAMS = collections.OrderedDict(
+        [
+            ("pool_wait_seconds", "Time spent waiting for a connection from the pool."),
+            ("dns_seconds", "Time taken to resolve host names."),
+            (
+                "connect_seconds",
+                "Time taken to open a connection, once the host name is resolved.",
+            ),
+            ("tls_seconds", "Time taken by TLS handshakes."),
+            (
+                "ttfb_seconds",
+                "Time from sending a request to receiving the response headers.",
+            ),
+            (
+                "request_seconds",
+                "Time from starting an attempt to receiving the response headers.",
+            ),
+        ]
+    )
+
+    #: The label which tells apart the values of labelled counters.
+    LABELS = {"retries": "cause", "redirects": "status"}
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = QtCore.QMutex()
+        self._counters = {}
+        self._histograms = {}
+
+    def __repr__(self):
+        return "{cls}(buckets={self.buckets!r})".format(
+            cls=type(self).__name__, self=self
+        )
+
+    @staticmethod
+    def _key(pool):
+        return pool.scheme, pool.host, pool.port
+
+    def inc(self, pool, name, amount=1, label=None):
+        """ Add ``amount`` to a counter of the host of ``pool``. """
+        key = (self._key(pool), name, label)
+        with QtCore.QMutexLocker(self._lock):
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, pool, name, value):
+        """ Add ``value`` to a histogram of the host of ``pool``. """
+        key = (self._key(pool), name)
+        index = bisect.bisect_left(self.buckets, value)
+        with QtCore.QMutexLocker(self._lock):
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self.buckets))
+            histogram.counts[index] += 1
+            histogram.count += 1
+            histogram.sum += value
+
+    def record_timings(self, pool, timings):
+        """ Record the connection setup and time to first byte of a request
+        from its :class:`~urllib3.util.timing.RequestTimings`.
+        """
+        for phase in ("dns", "connect", "tls", "ttfb"):
+            seconds = getattr(timings, phase)
+            if seconds is not None:
+                self.observe(pool, phase + "_seconds", seconds)
+
+    def reset(self):
+        """ Forget everything recorded so far. """
+        with QtCore.QMutexLocker(self._lock):
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """
+        Return everything recorded so far, as a dictionary which maps each
+        ``(scheme, host, port)`` to a dictionary of its metrics by name.
+
+        Counters are numbers, or dictionaries of numbers by label for the
+        labelled ones. Histograms are :class:`HistogramSnapshot` tuples.
+        Metrics which haven't been recorded for a host are left out.
+        """
+        hosts = {}
+        with QtCore.QMutexLocker(self._lock):
+            for (host, name, label), value in self._counters.items():
+                metrics = hosts.setdefault(host, {})
+                if name in self.LABELS:
+                    metrics.setdefault(name, {})[label] = value
+                else:
+                    metrics[name] = value
+
+            for (host, name), histogram in self._histograms.items():
+                counts = []
+                total = 0
+                for count in histogram.counts[:-1]:
+                    total += count
+                    counts.append(total)
+                hosts.setdefault(host, {})[name] = HistogramSnapshot(
+                    self.buckets, tuple(counts), histogram.count, histogram.sum
+                )
+
+        return hosts
+
+    def to_prometheus(self, prefix="urllib3"):
+        """
+        Return everything recorded so far in the Prometheus text exposition
+        format, ready to be served on a ``/metrics`` endpoint. Counters get a
+        ``_total`` suffix, and every metric is labelled with the ``scheme``,
+        ``host`` and ``port`` it's for.
+        """
+        snapshot = sorted(self.snapshot().items(), key=lambda item: str(item[0]))
+        lines = []
+
+        for name, description in self.COUNTERS.items():
+            metric = "%s_%s_total" % (prefix, name)
+            samples = []
+            for host, metrics in snapshot:
+                value = metrics.get(name)
+                if value is None:
+                    continue
+                if name not in self.LABELS:
+                    samples.append((_labels(host), value))
+                    continue
+                for label, count in sorted(value.items(), key=str):
+                    samples.append(
+                        (_labels(host, ((self.LABELS[name], label),)), count)
+                    )
+
+            if samples:
+                lines.append("# HELP %s %s" % (metric, description))
+                lines.append("# TYPE %s counter" % metric)
+                for labels, value in samples:
+                    lines.append("%s{%s} %s" % (metric, labels, _number(value)))
+
+        for name, description in self.HISTOGRAMS.items():
+            metric = "%s_%s" % (prefix, name)
+            histograms = [
+                (host, metrics[name]) for host, metrics in snapshot if name in metrics
+            ]
+            if not histograms:
+                continue
+
+            lines.append("# HELP %s %s" % (metric, description))
+            lines.append("# TYPE %s histogram" % metric)
+            for host, histogram in histograms:
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    labels = _labels(host, (("le", _number(bound)),))
+                    lines.append("%s_bucket{%s} %d" % (metric, labels, count))
+                labels = _labels(host, (("le", "+Inf"),))
+                lines.append("%s_bucket{%s} %d" % (metric, labels, histogram.count))
+                labels = _labels(host)
+                lines.append("%s_sum{%s} %s" % (metric, labels, _number(histogram.sum)))
+                lines.append("%s_count{%s} %d" % (metric, labels, histogram.count))
+
+        return "".join(line + "\n" for line in lines)
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(host, extra=()):
+    scheme, hostname, port = host
+    pairs = (("scheme", scheme), ("host", hostname), ("port", port)) + tuple(extra)
+    return ",".join('%s="%s"' % (name, _escape(value)) for name, value in pairs)
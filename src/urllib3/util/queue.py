@@ -1,21 +1,240 @@
 import collections
+import itertools
+import threading
+
+from PyQt5.QtCore import QObject
+
 from ..packages import six
 from ..packages.six.moves import queue
+from .timeout import current_time
 
 if six.PY2:
     # Queue is imported for side effects on MS Windows. See issue #229.
     import Queue as _unused_module_Queue  # noqa: F401
 
 
+_NOTHING = QObject()
+
+
+class _Waiter(QObject):
+    """ A thread blocked in :meth:`LifoQueue.get`. """
+
+    def __init__(self, priority, deadline, seq, since, ready):
+        self.priority = priority
+        self.deadline = deadline
+        self.seq = seq
+        self.since = since
+        self.item = _NOTHING
+        self.ready = ready
+
+
 class LifoQueue(queue.Queue):
-    def _init(self, _):
+    """
+    Queue of pooled connections, most recently used first.
+
+    Items are kept in a :class:`collections.deque`, and a second deque holds
+    one token for each free slot. Popping and appending are atomic, so
+    :meth:`get` and :meth:`put` only take the mutex when they have to wait,
+    or when there are waiters to hand an item to. Nothing waits in a
+    connection pool with ``block=False``.
+
+    Threads blocked in :meth:`get` are handed items by priority, then by
+    deadline, then in the order they started waiting, instead of whichever
+    one the OS wakes first.
+
+    Unlike :class:`queue.Queue`, unfinished tasks aren't counted, so
+    :meth:`~queue.Queue.join` doesn't wait.
+    """
+
+    #: Seconds of waiting which raise a waiter's priority by one, so that low
+    #: priority waiters aren't starved by a stream of higher priority ones.
+    PRIORITY_AGING = 1.0
+
+    def _init(self, maxsize):
         self.queue = collections.deque()
+        # One token for each free slot, or None if the queue is unbounded.
+        self._room = collections.deque([None] * maxsize) if maxsize > 0 else None
+        self._waiters = []
+        self._putters = 0
+        self._seq = itertools.count()
+
+        #: Number of calls to :meth:`get` which had to wait, and the most
+        #: threads waiting at once.
+        self.num_waits = 0
+        self.max_waiting = 0
+
+    @property
+    def num_waiting(self):
+        """ Number of threads currently waiting in :meth:`get`. """
+        return len(self._waiters)
 
     def _qsize(self, len=len):
         return len(self.queue)
 
     def _put(self, item):
         self.queue.append(item)
+        # A thread which starts waiting after we've checked for waiters
+        # finds the item when it checks the queue after registering.
+        if self._waiters:
+            with self.mutex:
+                self._hand_out()
+
+    def _hand_out(self):
+        """ Hand queued items to waiters. Must be called with the mutex. """
+        while self._waiters:
+            try:
+                item = self.queue.pop()
+            except IndexError:
+                return
+            waiter = min(self._waiters, key=self._waiter_order(current_time()))
+            self._waiters.remove(waiter)
+            waiter.item = item
+            waiter.ready.notify()
+
+    def _waiter_order(self, now):
+        aging = self.PRIORITY_AGING
+
+        def key(waiter):
+            priority = waiter.priority
+            if aging:
+                priority += (now - waiter.since) // aging
+            deadline = waiter.deadline
+            return (-priority, deadline is None, deadline, waiter.seq)
+
+        return key
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Put an item into the queue, waiting for a free slot if ``block`` is
+        True.
+        """
+        if self._room is not None:
+            try:
+                self._room.pop()
+            except IndexError:
+                if not block:
+                    raise queue.Full
+                self._wait_for_room(timeout)
+        self._put(item)
+
+    def _wait_for_room(self, timeout):
+        if timeout is not None:
+            if timeout < 0:
+                raise ValueError("'timeout' must be a non-negative number")
+            end = current_time() + timeout
+
+        with self.mutex:
+            self._putters += 1
+            try:
+                while True:
+                    try:
+                        self._room.pop()
+                        return
+                    except IndexError:
+                        pass
+
+                    if timeout is None:
+                        self.not_full.wait()
+                        continue
+                    remaining = end - current_time()
+                    if remaining <= 0:
+                        raise queue.Full
+                    self.not_full.wait(remaining)
+            finally:
+                self._putters -= 1
+
+    def get(self, block=True, timeout=None, priority=0, deadline=None):
+        """
+        Remove and return an item, waiting for one if ``block`` is True.
+
+        :param int priority:
+            Waiters with a higher priority are handed items first.
+
+        :param float deadline:
+            The :func:`~urllib3.util.timeout.current_time` by which the caller
+            needs the item. Among waiters with the same priority, the earliest
+            deadline goes first. Waiting ``timeout`` seconds also sets a
+            deadline.
+        """
+        try:
+            item = self.queue.pop()
+        except IndexError:
+            if not block:
+                raise queue.Empty
+            item = self._wait(timeout, priority, deadline)
+
+        if self._room is not None:
+            self._room.append(None)
+            if self._putters:
+                with self.mutex:
+                    self.not_full.notify()
+        return item
+
+    def _wait(self, timeout, priority, deadline):
+        if timeout is not None and timeout < 0:
+            raise ValueError("'timeout' must be a non-negative number")
+
+        now = current_time()
+        end = None
+        if timeout is not None:
+            end = now + timeout
+            if deadline is None or end < deadline:
+                deadline = end
+
+        with self.mutex:
+            waiter = _Waiter(
+                priority,
+                deadline,
+                next(self._seq),
+                now,
+                threading.Condition(self.mutex),
+            )
+            self._waiters.append(waiter)
+            self.num_waits += 1
+            self.max_waiting = max(self.max_waiting, len(self._waiters))
+
+            # Pick up anything put since we found the queue empty.
+            self._hand_out()
+
+            while waiter.item is _NOTHING:
+                if end is None:
+                    waiter.ready.wait()
+                    continue
+
+                remaining = end - current_time()
+                if remaining <= 0:
+                    self._waiters.remove(waiter)
+                    raise queue.Empty
+                waiter.ready.wait(remaining)
+
+            return waiter.item
+
+    def grow(self, item=None):
+        """ Add a slot to the queue, holding ``item``. """
+        with self.mutex:
+            self.maxsize += 1
+        self._put(item)
+
+    def shrink(self, count):
+        """
+        Remove up to ``count`` slots which hold no item or an idle item, and
+        return the items removed. Empty slots go first, then the least
+        recently used items.
+        """
+        with self.mutex:
+            removed = []
+            while len(removed) < count:
+                try:
+                    self.queue.remove(None)
+                except ValueError:
+                    break
+                removed.append(None)
+
+            while len(removed) < count:
+                try:
+                    removed.append(self.queue.popleft())
+                except IndexError:
+                    break
 
-    def _get(self):
-        return self.queue.pop()
+            self.maxsize -= len(removed)
+            return removed
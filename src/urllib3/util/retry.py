@@ -1,30 +1,121 @@
 from __future__ import absolute_import
 import time
 import logging
-from collections import namedtuple
-from itertools import takewhile
+from collections import deque, namedtuple
 import email
+import random
 import re
 
+from PyQt5 import QtCore
+
 from ..exceptions import (
     ConnectTimeoutError,
     MaxRetryError,
     ProtocolError,
     ReadTimeoutError,
     ResponseError,
+    RetryBudgetExhaustedError,
     InvalidHeader,
 )
 from ..packages import six
+from .timeout import current_time
 
 
 log = logging.getLogger(__name__)
 
 
 # Data structure for representing the metadata of requests that result in a retry.
-RequestHistory = namedtuple(
-    "RequestHistory", ["method", "url", "error", "status", "redirect_location"]
+class RequestHistory(
+    namedtuple(
+        "RequestHistory", ["method", "url", "error", "status", "redirect_location"]
+    )
+):
+    #: How long the attempt took in seconds, if it was measured. This isn't one
+    #: of the tuple's fields, so it doesn't affect comparison or unpacking.
+    elapsed = None
+
+    #: The :class:`~urllib3.util.timing.RequestTimings` of the attempt, if
+    #: they were measured. Not a field either.
+    timings = None
+
+
+# The parts of a Retry which don't change from one attempt to the next. They're
+# shared by every Retry derived from the same original.
+_RetryConfig = namedtuple(
+    "_RetryConfig",
+    [
+        "method_whitelist",
+        "status_forcelist",
+        "backoff_factor",
+        "raise_on_redirect",
+        "raise_on_status",
+        "respect_retry_after_header",
+        "remove_headers_on_redirect",
+        "backoff_jitter",
+        "sleeper",
+    ],
 )
 
+# A persistent singly linked list of RequestHistory entries, newest first, so
+# that each attempt adds to the history of the previous one without copying it.
+_HistoryNode = namedtuple("_HistoryNode", ["entry", "parent", "length"])
+
+
+def _history_from_tuple(history):
+    node = None
+    for length, entry in enumerate(history, 1):
+        node = _HistoryNode(entry, node, length)
+    return node
+
+
+def _release_traceback(error):
+    """
+    Drop the traceback frames held by an error which is being retried, and by
+    the errors it wraps, so that the retry history doesn't keep them alive.
+    """
+    seen = set()
+    errors = [error]
+    while errors:
+        error = errors.pop()
+        if not isinstance(error, BaseException) or id(error) in seen:
+            continue
+        seen.add(id(error))
+
+        error.__traceback__ = None
+        errors.extend(error.args)
+        errors.append(getattr(error, "__cause__", None))
+        errors.append(getattr(error, "__context__", None))
+
+
+def qt_sleep(seconds):
+    """
+    Wait for ``seconds`` while running a Qt event loop, so that a thread with
+    Qt objects, such as the GUI thread, keeps processing events while a
+    request is waiting to be retried. The wait is scheduled with
+    :meth:`QTimer.singleShot` rather than blocking.
+
+    Falls back to :func:`time.sleep` without a :class:`QCoreApplication`.
+    Pass it as the ``sleeper`` of a :class:`Retry`.
+    """
+    if QtCore.QCoreApplication.instance() is None:
+        time.sleep(seconds)
+        return
+
+    loop = QtCore.QEventLoop()
+    QtCore.QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec_()
+
+
+def _config_property(name):
+    def fget(self):
+        return getattr(self._config, name)
+
+    def fset(self, value):
+        self._config = self._config._replace(**{name: value})
+
+    return property(fget, fset)
+
+
 from PyQt5.QtCore import QObject
 class Retry(QObject):
     """ Retry configuration.
@@ -124,6 +215,24 @@ class Retry(QObject):
 
         By default, backoff is disabled (set to 0).
 
+    :param str backoff_jitter:
+        How to randomize the backoff, so that clients which failed together
+        don't retry together:
+
+        - ``None``, the default, doesn't randomize the backoff.
+        - ``"full"`` (:attr:`Retry.JITTER_FULL`) picks a random backoff
+          between 0 and the one described for ``backoff_factor``.
+        - ``"decorrelated"`` (:attr:`Retry.JITTER_DECORRELATED`) picks a
+          random backoff between ``backoff_factor`` and three times the
+          previous backoff.
+
+        The backoff is never longer than :attr:`Retry.BACKOFF_MAX`.
+
+    :param callable sleeper:
+        Called with the number of seconds to wait between attempts, instead
+        of :func:`time.sleep`. :func:`qt_sleep` keeps a Qt event loop running
+        while waiting.
+
     :param bool raise_on_redirect: Whether, if the number of redirects is
         exhausted, to raise a MaxRetryError, or to return a response with a
         response code in the 3xx range.
@@ -145,6 +254,10 @@ class Retry(QObject):
         Sequence of headers to remove from the request when a response
         indicating a redirect is returned before firing off the redirected
         request.
+
+    If the pool making the request has a :class:`RetryBudget`, every retry
+    other than a redirect also has to be allowed by the budget, or
+    :class:`~urllib3.exceptions.RetryBudgetExhaustedError` is raised.
     """
 
     DEFAULT_METHOD_WHITELIST = frozenset(
@@ -158,6 +271,12 @@ class Retry(QObject):
     #: Maximum backoff time.
     BACKOFF_MAX = 120
 
+    #: Values for ``backoff_jitter``.
+    JITTER_FULL = "full"
+    JITTER_DECORRELATED = "decorrelated"
+
+    _COUNTERS = frozenset(["total", "connect", "read", "redirect", "status"])
+
     def __init__(
         self,
         total=10,
@@ -173,7 +292,11 @@ class Retry(QObject):
         history=None,
         respect_retry_after_header=True,
         remove_headers_on_redirect=DEFAULT_REDIRECT_HEADERS_BLACKLIST,
+        backoff_jitter=None,
+        sleeper=None,
     ):
+        if backoff_jitter not in (None, self.JITTER_FULL, self.JITTER_DECORRELATED):
+            raise ValueError("Unknown backoff_jitter %r." % (backoff_jitter,))
 
         self.total = total
         self.connect = connect
@@ -185,18 +308,69 @@ class Retry(QObject):
             raise_on_redirect = False
 
         self.redirect = redirect
-        self.status_forcelist = status_forcelist or set()
-        self.method_whitelist = method_whitelist
-        self.backoff_factor = backoff_factor
-        self.raise_on_redirect = raise_on_redirect
-        self.raise_on_status = raise_on_status
-        self.history = history or tuple()
-        self.respect_retry_after_header = respect_retry_after_header
-        self.remove_headers_on_redirect = frozenset(
-            [h.lower() for h in remove_headers_on_redirect]
+        self._config = _RetryConfig(
+            method_whitelist=method_whitelist,
+            status_forcelist=status_forcelist or set(),
+            backoff_factor=backoff_factor,
+            raise_on_redirect=raise_on_redirect,
+            raise_on_status=raise_on_status,
+            respect_retry_after_header=respect_retry_after_header,
+            remove_headers_on_redirect=frozenset(
+                [h.lower() for h in remove_headers_on_redirect]
+            ),
+            backoff_jitter=backoff_jitter,
+            sleeper=sleeper,
         )
+        self.history = history or tuple()
+        self._backoff = None
+        self._prev_backoff = None
+
+    method_whitelist = _config_property("method_whitelist")
+    status_forcelist = _config_property("status_forcelist")
+    backoff_factor = _config_property("backoff_factor")
+    raise_on_redirect = _config_property("raise_on_redirect")
+    raise_on_status = _config_property("raise_on_status")
+    respect_retry_after_header = _config_property("respect_retry_after_header")
+    remove_headers_on_redirect = _config_property("remove_headers_on_redirect")
+    backoff_jitter = _config_property("backoff_jitter")
+    sleeper = _config_property("sleeper")
+
+    @property
+    def history(self):
+        """
+        The :class:`RequestHistory` of each call to :meth:`increment` which
+        led to this Retry, oldest first.
+        """
+        if self._history_tuple is None:
+            entries = []
+            node = self._history
+            while node is not None:
+                entries.append(node.entry)
+                node = node.parent
+            self._history_tuple = tuple(reversed(entries))
+        return self._history_tuple
+
+    @history.setter
+    def history(self, history):
+        self._history = _history_from_tuple(history)
+        self._history_tuple = tuple(history)
 
     def new(self, **kw):
+        if type(self).__init__ is Retry.__init__ and all(
+            key in self._COUNTERS for key in kw
+        ):
+            # Only counters change from one attempt to the next, so share
+            # everything else instead of going through __init__() again.
+            new_retry = type(self).__new__(type(self))
+            new_retry._config = self._config
+            new_retry._history = self._history
+            new_retry._history_tuple = self._history_tuple
+            new_retry._backoff = None
+            new_retry._prev_backoff = None
+            for key in self._COUNTERS:
+                setattr(new_retry, key, kw.get(key, getattr(self, key)))
+            return new_retry
+
         params = dict(
             total=self.total,
             connect=self.connect,
@@ -211,6 +385,8 @@ class Retry(QObject):
             history=self.history,
             remove_headers_on_redirect=self.remove_headers_on_redirect,
             respect_retry_after_header=self.respect_retry_after_header,
+            backoff_jitter=self.backoff_jitter,
+            sleeper=self.sleeper,
         )
         params.update(kw)
         return type(self)(**params)
@@ -232,19 +408,36 @@ class Retry(QObject):
     def get_backoff_time(self):
         """ Formula for computing the current backoff
 
+        With ``backoff_jitter``, the backoff is random, but the same Retry
+        always returns the same one.
+
         :rtype: float
         """
+        if self._backoff is not None:
+            return self._backoff
+
         # We want to consider only the last consecutive errors sequence (Ignore redirects).
-        consecutive_errors_len = len(
-            list(
-                takewhile(lambda x: x.redirect_location is None, reversed(self.history))
-            )
-        )
+        consecutive_errors_len = 0
+        node = self._history
+        while node is not None and node.entry.redirect_location is None:
+            consecutive_errors_len += 1
+            node = node.parent
         if consecutive_errors_len <= 1:
             return 0
 
-        backoff_value = self.backoff_factor * (2 ** (consecutive_errors_len - 1))
-        return min(self.BACKOFF_MAX, backoff_value)
+        jitter = self.backoff_jitter
+        if jitter == self.JITTER_DECORRELATED:
+            previous = self._prev_backoff or self.backoff_factor
+            backoff_value = random.uniform(self.backoff_factor, previous * 3)
+        else:
+            backoff_value = self.backoff_factor * (2 ** (consecutive_errors_len - 1))
+            if jitter == self.JITTER_FULL:
+                backoff_value = random.uniform(0, min(self.BACKOFF_MAX, backoff_value))
+
+        backoff_value = min(self.BACKOFF_MAX, backoff_value)
+        if jitter is not None:
+            self._backoff = backoff_value
+        return backoff_value
 
     def parse_retry_after(self, retry_after):
         # Whitespace: https://tools.ietf.org/html/rfc7230#section-3.2.4
@@ -272,10 +465,16 @@ class Retry(QObject):
 
         return self.parse_retry_after(retry_after)
 
+    def _sleep(self, seconds):
+        if self.sleeper is not None:
+            self.sleeper(seconds)
+        else:
+            time.sleep(seconds)
+
     def sleep_for_retry(self, response=None):
         retry_after = self.get_retry_after(response)
         if retry_after:
-            time.sleep(retry_after)
+            self._sleep(retry_after)
             return True
 
         return False
@@ -284,7 +483,18 @@ class Retry(QObject):
         backoff = self.get_backoff_time()
         if backoff <= 0:
             return
-        time.sleep(backoff)
+        self._sleep(backoff)
+
+    def get_sleep_time(self, response=None):
+        """ Get the number of seconds :meth:`sleep` would sleep for, without
+        sleeping.
+        """
+        if self.respect_retry_after_header and response:
+            retry_after = self.get_retry_after(response)
+            if retry_after:
+                return retry_after
+
+        return max(self.get_backoff_time(), 0)
 
     def sleep(self, response=None):
         """ Sleep between retry attempts.
@@ -293,6 +503,9 @@ class Retry(QObject):
         and sleep the duration of the time requested. If that is not present, it
         will use an exponential backoff. By default, the backoff factor is 0 and
         this method will return immediately.
+
+        The wait is done by ``sleeper`` if one was given, otherwise by
+        :func:`time.sleep`.
         """
 
         if self.respect_retry_after_header and response:
@@ -360,6 +573,8 @@ class Retry(QObject):
         error=None,
         _pool=None,
         _stacktrace=None,
+        _elapsed=None,
+        _timings=None,
     ):
         """ Return a new Retry object with incremented retry counters.
 
@@ -367,7 +582,9 @@ class Retry(QObject):
             return a response.
         :type response: :class:`~urllib3.response.HTTPResponse`
         :param Exception error: An error encountered during the request, or
-            None if the response was received successfully.
+            None if the response was received successfully. If it is retried,
+            its traceback is released so that the history doesn't keep the
+            frames alive.
 
         :return: A new ``Retry`` object.
         """
@@ -384,6 +601,7 @@ class Retry(QObject):
         redirect = self.redirect
         status_count = self.status
         cause = "unknown"
+        metrics_cause = "error"
         status = None
         redirect_location = None
 
@@ -393,6 +611,7 @@ class Retry(QObject):
                 raise six.reraise(type(error), error, _stacktrace)
             elif connect is not None:
                 connect -= 1
+            metrics_cause = "connect"
 
         elif error and self._is_read_error(error):
             # Read retry?
@@ -400,6 +619,7 @@ class Retry(QObject):
                 raise six.reraise(type(error), error, _stacktrace)
             elif read is not None:
                 read -= 1
+            metrics_cause = "read"
 
         elif response and response.get_redirect_location():
             # Redirect retry?
@@ -418,10 +638,15 @@ class Retry(QObject):
                     status_count -= 1
                 cause = ResponseError.SPECIFIC_ERROR.format(status_code=response.status)
                 status = response.status
+                metrics_cause = "status"
 
-        history = self.history + (
-            RequestHistory(method, url, error, status, redirect_location),
-        )
+        entry = RequestHistory(method, url, error, status, redirect_location)
+        if _elapsed is not None:
+            entry.elapsed = _elapsed
+        if _timings is None and response is not None:
+            _timings = getattr(response, "timings", None)
+        if _timings is not None:
+            entry.timings = _timings
 
         new_retry = self.new(
             total=total,
@@ -429,12 +654,30 @@ class Retry(QObject):
             read=read,
             redirect=redirect,
             status=status_count,
-            history=history,
         )
+        new_retry._history = _HistoryNode(
+            entry, self._history, self._history.length + 1 if self._history else 1
+        )
+        new_retry._history_tuple = None
+        new_retry._prev_backoff = self._backoff
 
         if new_retry.is_exhausted():
             raise MaxRetryError(_pool, url, error or ResponseError(cause))
 
+        budget = getattr(_pool, "retry_budget", None)
+        if budget is not None and redirect_location is None and not budget.withdraw():
+            raise RetryBudgetExhaustedError(_pool, url, error or ResponseError(cause))
+
+        metrics = getattr(_pool, "metrics", None)
+        if metrics is not None:
+            if redirect_location is not None:
+                metrics.inc(_pool, "redirects", label=status)
+            else:
+                metrics.inc(_pool, "retries", label=metrics_cause)
+
+        if error is not None:
+            _release_traceback(error)
+
         log.debug("Incremented Retry for (url='%s'): %r", url, new_retry)
 
         return new_retry
@@ -448,3 +691,121 @@ class Retry(QObject):
 
 # For backwards compatibility (equivalent to pre-v1.9):
 Retry.DEFAULT = Retry(3)
+
+
+class RetryBudget(QObject):
+    """ Limit on the share of requests which may be retried.
+
+    A :class:`Retry` on its own applies to one request, so when a server
+    starts failing every request to it gets retried and the load on it
+    multiplies. A budget is shared between requests instead: each request
+    adds ``ratio`` retries to it, and each retry other than a redirect takes
+    one away. Requests and retries stop counting after ``ttl`` seconds.
+
+    Attach a budget to a pool, or to every pool of a
+    :class:`~urllib3.poolmanager.PoolManager`::
+
+        budget = RetryBudget(ratio=0.1, min_retries_per_second=5)
+        http = PoolManager(retries=Retry(3), retry_budget=budget)
+
+    Once the budget is spent, :meth:`Retry.increment` raises
+    :class:`~urllib3.exceptions.RetryBudgetExhaustedError` instead of
+    allowing another attempt.
+
+    :param float ratio:
+        How many retries each request adds, e.g. ``0.2`` allows one retry for
+        every five requests.
+
+    :param float min_retries_per_second:
+        Retries to allow on top of ``ratio``, so that a client which makes
+        few requests can still retry them.
+
+    :param float ttl:
+        How many seconds requests and retries count towards the budget.
+    """
+
+    def __init__(self, ratio=0.2, min_retries_per_second=10, ttl=10):
+        if ratio < 0:
+            raise ValueError("ratio must be at least 0, got %r." % ratio)
+        if min_retries_per_second < 0:
+            raise ValueError(
+                "min_retries_per_second must be at least 0, got %r."
+                % min_retries_per_second
+            )
+        if ttl <= 0:
+            raise ValueError("ttl must be greater than 0, got %r." % ttl)
+
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.ttl = ttl
+
+        #: Number of requests, of retries, and of retries refused because the
+        #: budget was spent, since the budget was created.
+        self.requests = 0
+        self.retries = 0
+        self.exhausted = 0
+
+        self._lock = QtCore.QMutex()
+        # A [second, requests, retries] entry for each second with any
+        # activity, oldest first, and the sums of their counts.
+        self._buckets = deque()
+        self._window_requests = 0
+        self._window_retries = 0
+
+    def __repr__(self):
+        return (
+            "{cls.__name__}(ratio={self.ratio}, "
+            "min_retries_per_second={self.min_retries_per_second}, "
+            "ttl={self.ttl})"
+        ).format(cls=type(self), self=self)
+
+    def _bucket(self):
+        """ Expire old entries and return the one for the current second. """
+        now = int(current_time())
+        buckets = self._buckets
+        while buckets and buckets[0][0] <= now - self.ttl:
+            _, requests, retries = buckets.popleft()
+            self._window_requests -= requests
+            self._window_retries -= retries
+
+        if not buckets or buckets[-1][0] != now:
+            buckets.append([now, 0, 0])
+        return buckets[-1]
+
+    def _balance(self):
+        return (
+            self.ratio * self._window_requests
+            + self.min_retries_per_second * self.ttl
+            - self._window_retries
+        )
+
+    @property
+    def balance(self):
+        """ How many more retries the budget allows right now. """
+        with QtCore.QMutexLocker(self._lock):
+            self._bucket()
+            return max(0, int(self._balance()))
+
+    def deposit(self, requests=1):
+        """ Record requests being made, which adds to the budget. """
+        with QtCore.QMutexLocker(self._lock):
+            self._bucket()[1] += requests
+            self._window_requests += requests
+            self.requests += requests
+
+    def withdraw(self):
+        """ Take a retry out of the budget.
+
+        :return: False if the budget is spent and the retry isn't allowed.
+        """
+        with QtCore.QMutexLocker(self._lock):
+            bucket = self._bucket()
+            if self._balance() < 1:
+                self.exhausted += 1
+                log.debug("Retry budget exhausted: %r", self)
+                return False
+
+            bucket[2] += 1
+            self._window_retries += 1
+            self.retries += 1
+            return True
@@ -225,7 +225,7 @@ def resolve_ssl_version(candidate):
 
 
 def create_urllib3_context(
-    ssl_version=None, cert_reqs=None, options=None, ciphers=None
+    ssl_version=None, cert_reqs=None, options=None, ciphers=None, alpn_protocols=None
 ):
     """All arguments have the same meaning as ``ssl_wrap_socket``.
 
@@ -256,6 +256,10 @@ def create_urllib3_context(
         ``ssl.OP_NO_SSLv3``, ``ssl.OP_NO_COMPRESSION``.
     :param ciphers:
         Which cipher suites to allow the server to select.
+    :param alpn_protocols:
+        Protocols to offer the server during the TLS handshake using ALPN,
+        in order of preference (e.g. ``["h2", "http/1.1"]``). Ignored when
+        the TLS implementation doesn't support ALPN.
     :returns:
         Constructed SSLContext object with specified options
     :rtype: SSLContext
@@ -286,6 +290,9 @@ def create_urllib3_context(
         # We do our own verification, including fingerprints and alternative
         # hostnames. So disable it here
         context.check_hostname = False
+
+    if alpn_protocols and hasattr(context, "set_alpn_protocols"):
+        context.set_alpn_protocols(alpn_protocols)
     return context
 
 
@@ -0,0 +1,79 @@
+from __future__ import absolute_import
+
+from PyQt5.QtCore import QObject
+
+
+class RequestTimings(QObject):
+    """ How long the phases of one attempt at a request took, in seconds.
+
+    Each :class:`~urllib3.response.HTTPResponse` has the timings of the
+    attempt which got it as :attr:`~urllib3.response.HTTPResponse.timings`,
+    and each :class:`~urllib3.util.retry.RequestHistory` entry has those of
+    an attempt which was retried or redirected.
+
+    A phase which didn't happen is None. For example ``dns``, ``connect`` and
+    ``tls`` are None when a pooled connection was reused.
+
+    - ``pool_wait``: getting a connection from the pool.
+    - ``dns``: resolving the host name.
+    - ``connect``: opening the connection, once the host name is resolved.
+    - ``tls``: the TLS handshake.
+    - ``ttfb``: from starting to send the request until the response headers
+      have arrived.
+    - ``download``: reading the response body, so far.
+    """
+
+    #: The phases, in the order they happen.
+    PHASES = ("pool_wait", "dns", "connect", "tls", "ttfb", "download")
+
+    def __init__(self, **phases):
+        for name in self.PHASES:
+            setattr(self, name, phases.pop(name, None))
+        if phases:
+            raise TypeError("Unknown request phases: %s" % ", ".join(sorted(phases)))
+
+    @property
+    def setup(self):
+        """ Seconds taken to set up a new connection: ``dns``, ``connect``
+        and ``tls`` together. """
+        return sum(getattr(self, name) or 0 for name in ("dns", "connect", "tls"))
+
+    @property
+    def total(self):
+        """ Seconds taken by all the phases together. """
+        return sum(getattr(self, name) or 0 for name in self.PHASES)
+
+    def copy(self):
+        """ Return a new :class:`RequestTimings` with the same phases. """
+        return type(self)(**dict((name, getattr(self, name)) for name in self.PHASES))
+
+    def add(self, name, seconds):
+        """ Add ``seconds`` to a phase. """
+        setattr(self, name, (getattr(self, name) or 0) + seconds)
+
+    def exceeded(self, thresholds):
+        """
+        Return the names of the phases which took longer than their threshold
+        in ``thresholds``, a dictionary of seconds by phase name. ``total``
+        is checked against the time taken by all the phases.
+        """
+        exceeded = []
+        for name, threshold in thresholds.items():
+            seconds = self.total if name == "total" else getattr(self, name)
+            if seconds is not None and seconds > threshold:
+                exceeded.append(name)
+        return sorted(exceeded, key=_phase_order)
+
+    def __repr__(self):
+        phases = ", ".join(
+            "%s=%.6f" % (name, getattr(self, name))
+            for name in self.PHASES
+            if getattr(self, name) is not None
+        )
+        return "%s(%s)" % (type(self).__name__, phases)
+
+
+def _phase_order(name):
+    if name == "total":
+        return len(RequestTimings.PHASES)
+    return RequestTimings.PHASES.index(name)
@@ -0,0 +1,97 @@
+"""
+Benchmark uploading a body with chunked encoding over a local TCP connection.
+
+Compares the framing :class:`~urllib3.connection.HTTPConnection` used to do,
+with four ``send()`` calls per chunk, against the gathered writes it does now,
+with and without ``chunked_frame_size`` gathering small items into larger
+chunks::
+
+    python test/benchmarks/bench_chunked_upload.py [--size MB] [--items N ...]
+"""
+from __future__ import print_function
+
+import argparse
+import socket
+import threading
+import timeit
+
+from urllib3.connection import HTTPConnection
+from urllib3.packages import six
+
+
+class FourSendsHTTPConnection(HTTPConnection):
+    def request_chunked(self, method, url, body=None, headers=None):
+        self.putrequest(method, url, skip_accept_encoding=True)
+        self.putheader("Transfer-Encoding", "chunked")
+        self.endheaders()
+
+        for chunk in body:
+            len_str = hex(len(chunk))[2:]
+            self.send(len_str.encode("utf-8"))
+            self.send(b"\r\n")
+            self.send(chunk)
+            self.send(b"\r\n")
+
+        self.send(b"0\r\n\r\n")
+
+
+def serve(listener):
+    sock = listener.accept()[0]
+    tail = b""
+    while not tail.endswith(b"\r\n0\r\n\r\n"):
+        data = sock.recv(65536)
+        if not data:
+            break
+        tail = (tail + data)[-7:]
+    sock.close()
+
+
+def run(connection_cls, item_size, total, **conn_kw):
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    server = threading.Thread(target=serve, args=(listener,))
+    server.start()
+
+    item = b"x" * item_size
+    body = (item for _ in six.moves.range(total // item_size))
+    conn = connection_cls("127.0.0.1", listener.getsockname()[1], **conn_kw)
+
+    start = timeit.default_timer()
+    conn.connect()
+    conn.request_chunked("POST", "/", body=body)
+    server.join()
+    seconds = timeit.default_timer() - start
+
+    conn.close()
+    listener.close()
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=float, default=8, help="MB per upload")
+    parser.add_argument("--items", type=int, nargs="+", default=[16, 256, 4096, 65536])
+    parser.add_argument("--frame-size", type=int, default=16384)
+    args = parser.parse_args()
+    total = int(args.size * 2 ** 20)
+
+    print("%-10s %-26s %8s" % ("item size", "connection", "MB/s"))
+    for item_size in args.items:
+        for label, connection_cls, conn_kw in [
+            ("four sends", FourSendsHTTPConnection, {}),
+            ("gathered", HTTPConnection, {}),
+            (
+                "gathered, %d byte frames" % args.frame_size,
+                HTTPConnection,
+                {"chunked_frame_size": args.frame_size},
+            ),
+        ]:
+            seconds = min(
+                run(connection_cls, item_size, total, **conn_kw) for _ in range(3)
+            )
+            print("%-10d %-26s %8.1f" % (item_size, label, total / seconds / 2 ** 20))
+
+
+if __name__ == "__main__":
+    main()
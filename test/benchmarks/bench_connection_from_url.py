@@ -0,0 +1,67 @@
+"""
+Benchmark looking up a connection pool with :class:`PoolManager`.
+
+Compares ``connection_from_url()`` and ``connection_from_host()``, which reuse
+pool keys, with building the pool key from scratch for every lookup like
+``connection_from_context()`` does::
+
+    python test/benchmarks/bench_connection_from_url.py [-n NUMBER]
+"""
+from __future__ import print_function
+
+import argparse
+import timeit
+
+from urllib3 import PoolManager
+from urllib3.util.retry import Retry
+from urllib3.util.timeout import Timeout
+
+
+def make_manager():
+    return PoolManager(
+        num_pools=50,
+        headers={"User-Agent": "bench", "Accept": "*/*"},
+        maxsize=10,
+        block=False,
+        timeout=Timeout(connect=2.0, read=7.0),
+        retries=Retry(3, backoff_factor=0.1),
+    )
+
+
+def uncached(manager, host, port, scheme):
+    request_context = manager._merge_pool_kwargs(None)
+    request_context.update(scheme=scheme, host=host, port=port)
+    return manager.connection_from_context(request_context)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    manager = make_manager()
+    url = "https://example.com:8443/path?query=1"
+    assert (
+        manager.connection_from_url(url)
+        is manager.connection_from_host("example.com", 8443, "https")
+        is uncached(manager, "example.com", 8443, "https")
+    )
+
+    cases = [
+        ("connection_from_url", lambda: manager.connection_from_url(url)),
+        (
+            "connection_from_host",
+            lambda: manager.connection_from_host("example.com", 8443, "https"),
+        ),
+        (
+            "uncached pool key",
+            lambda: uncached(manager, "example.com", 8443, "https"),
+        ),
+    ]
+    for name, fn in cases:
+        seconds = min(timeit.repeat(fn, number=args.number, repeat=3))
+        print("%-22s %8.3f us/call" % (name, seconds / args.number * 1e6))
+
+
+if __name__ == "__main__":
+    main()
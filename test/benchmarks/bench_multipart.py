@@ -0,0 +1,98 @@
+"""
+Benchmark encoding forms of many small fields as multipart/form-data.
+
+Compares :func:`~urllib3.filepost.encode_multipart_formdata` with the way it
+used to work, making a :class:`~urllib3.fields.RequestField` for every field,
+compiling the HTML5 escaping regex for every parameter and writing through a
+new ``codecs`` writer twice per field::
+
+    python test/benchmarks/bench_multipart.py [-n NUMBER] [--fields N ...]
+"""
+from __future__ import print_function
+
+import argparse
+import codecs
+import re
+import timeit
+from io import BytesIO
+
+from urllib3.fields import _HTML5_REPLACEMENTS, RequestField
+from urllib3.filepost import encode_multipart_formdata
+from urllib3.packages import six
+from urllib3.packages.six import b
+
+writer = codecs.lookup("utf-8")[3]
+
+
+def format_header_param_html5(name, value):
+    if isinstance(value, six.binary_type):
+        value = value.decode("utf-8")
+
+    pattern = re.compile(
+        r"|".join([re.escape(needle) for needle in _HTML5_REPLACEMENTS.keys()])
+    )
+    value = pattern.sub(lambda match: _HTML5_REPLACEMENTS[match.group(0)], value)
+    return u'%s="%s"' % (name, value)
+
+
+def legacy_encode_multipart_formdata(fields, boundary):
+    body = BytesIO()
+    for fieldname, value in fields:
+        field = RequestField.from_tuples(
+            fieldname, value, header_formatter=format_header_param_html5
+        )
+        body.write(b("--%s\r\n" % (boundary)))
+
+        writer(body).write(field.render_headers())
+        data = field.data
+
+        if isinstance(data, int):
+            data = str(data)
+
+        if isinstance(data, six.text_type):
+            writer(body).write(data)
+        else:
+            body.write(data)
+
+        body.write(b"\r\n")
+
+    body.write(b("--%s--\r\n" % (boundary)))
+    return body.getvalue()
+
+
+def make_fields(count):
+    fields = []
+    for i in range(count):
+        if i % 10 == 0:
+            fields.append(("file%d" % (i % 100), ("data%d.csv" % i, b"a,b\n1,2\n")))
+        else:
+            fields.append(("field%d" % (i % 1000), u"value %d" % i))
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=5)
+    parser.add_argument("--fields", type=int, nargs="+", default=[10, 1000, 50000])
+    args = parser.parse_args()
+
+    boundary = "boundary"
+    print("%-8s %-8s %12s" % ("fields", "encoder", "us/field"))
+    for count in args.fields:
+        fields = make_fields(count)
+        assert (
+            legacy_encode_multipart_formdata(fields, boundary)
+            == encode_multipart_formdata(fields, boundary)[0]
+        )
+
+        for label, encode in [
+            ("legacy", lambda: legacy_encode_multipart_formdata(fields, boundary)),
+            ("bulk", lambda: encode_multipart_formdata(fields, boundary)),
+        ]:
+            number = max(1, args.number * 1000 // count)
+            seconds = min(timeit.repeat(encode, number=number, repeat=3)) / number
+            print("%-8d %-8s %12.3f" % (count, label, seconds / count * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark checking connections out of a pool queue and back in from threads.
+
+Compares :class:`~urllib3.util.queue.LifoQueue` with a plain
+:class:`queue.Queue` kept in LIFO order, which takes the mutex and signals
+its conditions on every call. ``non-blocking`` checks out like a pool with
+``block=False`` does, and ``blocking`` like one with ``block=True``::
+
+    python test/benchmarks/bench_pool_checkout.py [-n NUMBER] [--threads N ...]
+"""
+from __future__ import print_function
+
+import argparse
+import collections
+import threading
+import timeit
+
+from urllib3.packages.six.moves import queue
+from urllib3.util.queue import LifoQueue
+
+
+class QueueLifoQueue(queue.Queue):
+    def _init(self, _):
+        self.queue = collections.deque()
+
+    def _qsize(self, len=len):
+        return len(self.queue)
+
+    def _put(self, item):
+        self.queue.append(item)
+
+    def _get(self):
+        return self.queue.pop()
+
+
+def non_blocking(q, number):
+    for _ in range(number):
+        try:
+            conn = q.get(block=False)
+        except queue.Empty:
+            conn = None
+        try:
+            q.put(conn, block=False)
+        except queue.Full:
+            pass
+
+
+def blocking(q, number):
+    for _ in range(number):
+        q.put(q.get(timeout=10), block=False)
+
+
+def run(queue_cls, checkout, threads, maxsize, number):
+    q = queue_cls(maxsize)
+    for _ in range(maxsize):
+        q.put(None)
+
+    workers = [
+        threading.Thread(target=checkout, args=(q, number)) for _ in range(threads)
+    ]
+    start = timeit.default_timer()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = timeit.default_timer() - start
+
+    assert q.qsize() == maxsize
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=20000)
+    parser.add_argument("--maxsize", type=int, default=4)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    print("%-13s %-10s %7s %12s" % ("", "queue", "threads", "us/checkout"))
+    for name, checkout in [("non-blocking", non_blocking), ("blocking", blocking)]:
+        for threads in args.threads:
+            for label, queue_cls in [
+                ("Queue", QueueLifoQueue),
+                ("LifoQueue", LifoQueue),
+            ]:
+                seconds = min(
+                    run(queue_cls, checkout, threads, args.maxsize, args.number)
+                    for _ in range(3)
+                )
+                print(
+                    "%-13s %-10s %7d %12.3f"
+                    % (name, label, threads, seconds / (args.number * threads) * 1e6)
+                )
+
+
+if __name__ == "__main__":
+    main()
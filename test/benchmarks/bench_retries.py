@@ -0,0 +1,107 @@
+"""
+Benchmark ``HTTPConnectionPool.urlopen`` on requests which are retried or
+redirected many times.
+
+Responses come from memory rather than the network, so the numbers are the
+cost of urllib3's own retry and redirect handling::
+
+    python test/benchmarks/bench_retries.py [-n NUMBER] [--attempts ATTEMPTS]
+"""
+from __future__ import print_function
+
+import argparse
+import io
+import sys
+import timeit
+from socket import error as SocketError
+
+from urllib3 import HTTPConnectionPool
+from urllib3.packages.six.moves import http_client as httplib
+from urllib3.util.retry import Retry
+
+
+class FakeSocket(object):
+    def __init__(self, data):
+        self.data = data
+
+    def makefile(self, *args, **kwargs):
+        return io.BytesIO(self.data)
+
+
+def make_response(status, headers=()):
+    lines = ["HTTP/1.1 %d Whatever" % status, "Content-Length: 2"]
+    lines.extend("%s: %s" % header for header in headers)
+    data = ("\r\n".join(lines) + "\r\n\r\nok").encode("latin-1")
+    response = httplib.HTTPResponse(FakeSocket(data))
+    response.begin()
+    return response
+
+
+class Scenario(object):
+    """
+    Stand-in for ``HTTPConnectionPool._make_request``, which fails
+    ``attempts`` times and then succeeds.
+    """
+
+    def __init__(self, name, attempts, fail):
+        self.name = name
+        self.attempts = attempts
+        self.fail = fail
+        self.remaining = attempts
+        self.max_depth = 0
+
+    def __call__(self, conn, method, url, **kwargs):
+        frame, depth = sys._getframe(), 0
+        while frame:
+            frame, depth = frame.f_back, depth + 1
+        self.max_depth = max(self.max_depth, depth)
+
+        if self.remaining:
+            self.remaining -= 1
+            return self.fail()
+        self.remaining = self.attempts
+        return make_response(200)
+
+
+def connection_error():
+    raise SocketError("connection reset")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    parser.add_argument("--attempts", type=int, default=20)
+    args = parser.parse_args()
+
+    attempts = args.attempts
+    scenarios = [
+        Scenario("connection errors", attempts, connection_error),
+        Scenario("503 responses", attempts, lambda: make_response(503)),
+        Scenario(
+            "redirects", attempts, lambda: make_response(302, [("Location", "/")])
+        ),
+    ]
+    retries = Retry(total=attempts, status_forcelist=[503])
+
+    pool = HTTPConnectionPool("localhost", maxsize=1)
+    for scenario in scenarios:
+        pool._make_request = scenario
+
+        def request():
+            response = pool.urlopen("GET", "/", retries=retries)
+            assert response.status == 200
+
+        seconds = min(timeit.repeat(request, number=args.number, repeat=3))
+        print(
+            "%-18s %8.1f us/request  %6.1f us/attempt  stack depth %d"
+            % (
+                scenario.name,
+                seconds / args.number * 1e6,
+                seconds / args.number / (attempts + 1) * 1e6,
+                scenario.max_depth,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
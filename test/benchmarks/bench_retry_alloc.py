@@ -0,0 +1,95 @@
+"""
+Benchmark the time and memory taken by chains of ``Retry.increment`` calls.
+
+Reports the time per call, the memory allocated per call, and the memory
+still held by the final ``Retry`` of each chain (its history and the errors
+in it). Needs Python 3 for :mod:`tracemalloc`::
+
+    python test/benchmarks/bench_retry_alloc.py [--attempts ATTEMPTS]
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import timeit
+import tracemalloc
+
+from urllib3.exceptions import MaxRetryError, ProtocolError
+from urllib3.response import HTTPResponse
+from urllib3.util.retry import Retry
+
+
+def deep_error(depth=20):
+    """Raise an error from ``depth`` frames down, and return it."""
+    try:
+        if depth:
+            return deep_error(depth - 1)
+        raise ConnectionResetError("connection reset by peer")
+    except ConnectionResetError as e:
+        if depth:
+            raise
+        try:
+            raise ProtocolError("Connection aborted.", e)
+        except ProtocolError as e:
+            return e
+
+
+def retry_errors(attempts):
+    retry = Retry(total=attempts, read=attempts)
+    for _ in range(attempts):
+        retry = retry.increment("GET", "/", error=deep_error())
+    return retry
+
+
+def retry_statuses(attempts):
+    retry = Retry(total=attempts, status_forcelist=[503])
+    response = HTTPResponse(status=503)
+    for _ in range(attempts):
+        retry = retry.increment("GET", "/", response=response)
+    return retry
+
+
+def measure(fn, attempts):
+    number = max(1, 2000 // attempts)
+    seconds = min(timeit.repeat(lambda: fn(attempts), number=number, repeat=3))
+
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    retry = fn(attempts)
+    gc.collect()
+    held = tracemalloc.take_snapshot().compare_to(start, "filename")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(retry.history) == attempts
+    return (
+        seconds / number / attempts * 1e6,
+        peak / attempts,
+        sum(stat.size_diff for stat in held),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attempts", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    try:
+        retry_errors(1)
+    except MaxRetryError:
+        pass
+
+    print(
+        "%-9s %8s %10s %12s %14s"
+        % ("", "attempts", "us/call", "peak B/call", "held bytes")
+    )
+    for name, fn in [("errors", retry_errors), ("statuses", retry_statuses)]:
+        for attempts in args.attempts:
+            print(
+                "%-9s %8d %10.2f %12d %14d" % ((name, attempts) + measure(fn, attempts))
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import sys
+
+collect_ignore = []
+
+# The asyncio front-end uses async/await syntax.
+if sys.version_info < (3, 5):
+    collect_ignore.append("test_aio.py")
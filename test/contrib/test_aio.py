@@ -0,0 +1,364 @@
+import asyncio
+import json
+import socket
+import threading
+import zlib
+
+import pytest
+
+from dummyserver.server import DEFAULT_CA_BAD
+from dummyserver.testcase import (
+    HTTPDummyServerTestCase,
+    HTTPSDummyServerTestCase,
+    SocketDummyServerTestCase,
+    consume_socket,
+)
+from urllib3.contrib.aio import (
+    AsyncHTTPConnectionPool,
+    AsyncHTTPSConnectionPool,
+    AsyncPoolManager,
+)
+from urllib3.exceptions import (
+    EmptyPoolError,
+    MaxRetryError,
+    NewConnectionError,
+    ProtocolError,
+    ReadTimeoutError,
+    SSLError,
+)
+from urllib3.util.metrics import Metrics
+from urllib3.util.retry import Retry
+from urllib3.util.timeout import Timeout
+
+
+# So that a failing test can't leave a request, or a test server, waiting
+# forever and block the rest of the suite.
+TIMEOUT = 5
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(asyncio.wait_for(coro, TIMEOUT))
+    finally:
+        loop.close()
+
+
+def accept(listener):
+    listener.settimeout(TIMEOUT)
+    sock = listener.accept()[0]
+    sock.settimeout(TIMEOUT)
+    return sock
+
+
+class TestAsyncHTTPConnectionPool(HTTPDummyServerTestCase):
+    def test_get(self):
+        async def go():
+            async with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+                r = await pool.request("GET", "/echo", fields={"a": "b"})
+                assert r.status == 200
+                assert r.data == b"a=b"
+
+                r = await pool.request("GET", "/headers", headers={"X-Test": "1"})
+                headers = json.loads(r.data.decode("utf-8"))
+                assert headers["X-Test"] == "1"
+                assert headers["Host"] == "%s:%d" % (self.host, self.port)
+
+        run(go())
+
+    def test_post_body(self):
+        async def go():
+            async with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+                r = await pool.urlopen("POST", "/echo", body=b"x" * 100000)
+                assert r.data == b"x" * 100000
+
+                r = await pool.urlopen("POST", "/echo", body=iter([b"ab", b"cd"]))
+                assert r.data == b"abcd"
+
+        run(go())
+
+    def test_chunked_response(self):
+        async def go():
+            async with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+                r = await pool.request("GET", "/chunked")
+                assert r.data == b"123" * 4
+
+        run(go())
+
+    def test_decode_content(self):
+        async def go():
+            async with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+                r = await pool.request(
+                    "GET", "/encodingrequest", headers={"accept-encoding": "deflate"}
+                )
+                assert r.headers["content-encoding"] == "deflate"
+                assert r.data == b"hello, world!"
+
+                r = await pool.request(
+                    "GET",
+                    "/encodingrequest",
+                    headers={"accept-encoding": "deflate"},
+                    decode_content=False,
+                )
+                assert zlib.decompress(r.data) == b"hello, world!"
+
+        run(go())
+
+    def test_stream(self):
+        async def go():
+            async with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+                r = await pool.urlopen(
+                    "POST", "/echo", body=b"0123456789", preload_content=False
+                )
+                assert r.data is None
+                chunks = []
+                async for chunk in r.stream(4):
+                    chunks.append(chunk)
+                r.release_conn()
+                assert chunks == [b"0123", b"4567", b"89"]
+                assert pool.num_connections == 1
+
+                r = await pool.urlopen("GET", "/")
+                assert pool.num_connections == 1
+
+        run(go())
+
+    def test_redirect(self):
+        async def go():
+            async with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+                r = await pool.request(
+                    "GET", "/redirect", fields={"target": "/echo?a=b"}
+                )
+                assert r.status == 200
+                assert r.data == b"a=b"
+
+                r = await pool.request(
+                    "GET", "/redirect", fields={"target": "/"}, redirect=False
+                )
+                assert r.status == 303
+
+                with pytest.raises(MaxRetryError):
+                    await pool.request(
+                        "GET", "/redirect", fields={"target": "/"}, retries=0
+                    )
+
+        run(go())
+
+    def test_retry_status(self):
+        async def go():
+            retries = Retry(total=1, status_forcelist=[418])
+            async with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+                r = await pool.request(
+                    "GET",
+                    "/successful_retry",
+                    headers={"test-name": "test_aio_retry_status"},
+                    retries=retries,
+                )
+                assert r.status == 200
+                assert len(r.retries.history) == 1
+
+        run(go())
+
+    def test_pool_blocks_without_blocking_loop(self):
+        async def go():
+            async with AsyncHTTPConnectionPool(
+                self.host, self.port, maxsize=1, block=True
+            ) as pool:
+                responses = await asyncio.gather(
+                    *[pool.request("GET", "/echo?i=%d" % i) for i in range(5)]
+                )
+                assert [r.data for r in responses] == [b"i=%d" % i for i in range(5)]
+                assert pool.num_connections == 1
+
+                r = await pool.request("GET", "/", preload_content=False)
+                with pytest.raises(EmptyPoolError):
+                    await pool.request("GET", "/", pool_timeout=0.01)
+                await r.drain_conn()
+                r.release_conn()
+
+        run(go())
+
+    def test_metrics(self):
+        metrics = Metrics()
+
+        async def go():
+            async with AsyncHTTPConnectionPool(
+                self.host, self.port, metrics=metrics
+            ) as pool:
+                r = await pool.urlopen("POST", "/echo", body=b"hello")
+                assert r.data == b"hello"
+                r = await pool.urlopen("GET", "/echo", body=None)
+                assert r.data == b""
+                assert r.timings.connect is None
+                assert r.timings.ttfb > 0
+
+        run(go())
+
+        host = metrics.snapshot()[("http", self.host, self.port)]
+        assert host["connections_created"] == 1
+        assert host["connections_reused"] == 1
+        assert host["bytes_sent"] > 5
+        assert host["bytes_received"] == 5
+        assert host["connect_seconds"].count == 1
+        assert host["ttfb_seconds"].count == 2
+
+    def test_connection_refused(self):
+        # Grab a port which nothing is listening on.
+        sock = socket.socket()
+        sock.bind((self.host, 0))
+        closed_port = sock.getsockname()[1]
+        sock.close()
+
+        async def go():
+            async with AsyncHTTPConnectionPool(self.host, closed_port) as pool:
+                with pytest.raises(MaxRetryError) as e:
+                    await pool.request("GET", "/", retries=1)
+                assert isinstance(e.value.reason, NewConnectionError)
+
+        run(go())
+
+    def test_control_characters_rejected(self):
+        bad = [
+            ("GET\r\nX-Injected: 1\r\n", "/", {}),
+            ("GET", "/ HTTP/1.1\r\nX-Injected: 1", {}),
+            ("GET", "/", {"X-Test": "1\r\nX-Injected: 1"}),
+            ("GET", "/", {"X-Test\r\nX-Injected": "1"}),
+        ]
+
+        async def go():
+            async with AsyncHTTPConnectionPool(self.host, self.port) as pool:
+                for method, url, headers in bad:
+                    with pytest.raises(ValueError):
+                        await pool.urlopen(method, url, headers=headers, retries=0)
+
+        run(go())
+
+    def test_proxy_unsupported(self):
+        with pytest.raises(ValueError):
+            AsyncHTTPConnectionPool(self.host, self.port, _proxy=object())
+
+
+class TestAsyncPoolManager(HTTPDummyServerTestCase):
+    def test_cross_host_redirect(self):
+        async def go():
+            async with AsyncPoolManager() as http:
+                r = await http.request(
+                    "GET",
+                    "http://%s:%d/redirect" % (self.host, self.port),
+                    fields={
+                        "target": "http://%s:%d/echo?a=b" % (self.host_alt, self.port)
+                    },
+                )
+                assert r.status == 200
+                assert r.data == b"a=b"
+                assert len(http.pools) == 2
+
+        run(go())
+
+    def test_redirect_limit(self):
+        async def go():
+            async with AsyncPoolManager() as http:
+                url = "http://%s:%d/multi_redirect" % (self.host, self.port)
+                fields = {"redirect_codes": "303,302,301,200"}
+                with pytest.raises(MaxRetryError):
+                    await http.request(
+                        "GET", url, fields=fields, retries=Retry(redirect=2)
+                    )
+
+                r = await http.request(
+                    "GET", url, fields=fields, retries=Retry(redirect=3)
+                )
+                assert r.status == 200
+                assert r.data == b"Done redirecting"
+
+        run(go())
+
+    def test_request_many(self):
+        async def go():
+            async with AsyncPoolManager(maxsize=2) as http:
+                url = "http://%s:%d/echo" % (self.host, self.port)
+                results = await http.request_many(
+                    [("GET", url + "?i=%d" % i) for i in range(5)]
+                    + [("GET", "http://%s:1/" % self.host, {"retries": 0})],
+                    max_concurrency=3,
+                )
+
+                assert [r.index for r in results] == list(range(6))
+                assert [r.response.data for r in results[:5]] == [
+                    b"i=%d" % i for i in range(5)
+                ]
+                assert isinstance(results[5].error, MaxRetryError)
+                assert results[5].response is None
+                assert http.connection_from_url(url).num_connections <= 2
+
+        run(go())
+
+    def test_sync_only_methods_not_inherited(self):
+        assert not hasattr(AsyncPoolManager, "download")
+        assert not hasattr(AsyncPoolManager, "coalescer")
+
+
+class TestAsyncHTTPSConnectionPool(HTTPSDummyServerTestCase):
+    def test_unverified(self):
+        async def go():
+            async with AsyncHTTPSConnectionPool(
+                self.host, self.port, cert_reqs="CERT_NONE"
+            ) as pool:
+                with pytest.warns(Warning):
+                    r = await pool.request("GET", "/echo?a=b")
+                assert r.data == b"a=b"
+
+        run(go())
+
+    def test_verify_failed(self):
+        async def go():
+            async with AsyncHTTPSConnectionPool(
+                self.host, self.port, cert_reqs="CERT_REQUIRED", ca_certs=DEFAULT_CA_BAD
+            ) as pool:
+                with pytest.raises(MaxRetryError) as e:
+                    await pool.request("GET", "/", retries=0)
+                assert isinstance(e.value.reason, SSLError)
+
+        run(go())
+
+
+class TestAsyncSocketLevel(SocketDummyServerTestCase):
+    def test_read_timeout(self):
+        def socket_handler(listener):
+            sock = accept(listener)
+            consume_socket(sock)
+            self.done.wait(5)
+            sock.close()
+
+        self.done = threading.Event()
+        self._start_server(socket_handler)
+
+        async def go():
+            async with AsyncHTTPConnectionPool(
+                self.host, self.port, timeout=Timeout(read=0.05), retries=False
+            ) as pool:
+                with pytest.raises(ReadTimeoutError):
+                    await pool.request("GET", "/")
+
+        try:
+            run(go())
+        finally:
+            self.done.set()
+
+    def test_truncated_body(self):
+        def socket_handler(listener):
+            sock = accept(listener)
+            consume_socket(sock)
+            sock.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\nabc")
+            sock.close()
+
+        self._start_server(socket_handler)
+
+        async def go():
+            async with AsyncHTTPConnectionPool(
+                self.host, self.port, retries=False
+            ) as pool:
+                with pytest.raises(ProtocolError):
+                    await pool.request("GET", "/")
+
+        run(go())
@@ -0,0 +1,225 @@
+import ssl
+import threading
+
+import pytest
+
+from dummyserver.server import DEFAULT_CERTS
+from dummyserver.testcase import SocketDummyServerTestCase, consume_socket
+
+h2 = pytest.importorskip("h2")
+
+import h2.config  # noqa: E402
+import h2.connection  # noqa: E402
+import h2.events  # noqa: E402
+
+from urllib3.contrib.http2 import HTTP2ConnectionPool  # noqa: E402
+from urllib3.exceptions import ProtocolError  # noqa: E402
+from urllib3.util.retry import Retry  # noqa: E402
+
+# So that a broken handshake or a stalled stream fails the test instead of
+# hanging it, on either end.
+TIMEOUT = 5
+
+
+def wrap_server_socket(sock, protocols):
+    sock.settimeout(TIMEOUT)
+    context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+    context.load_cert_chain(DEFAULT_CERTS["certfile"], DEFAULT_CERTS["keyfile"])
+    context.set_alpn_protocols(protocols)
+    return context.wrap_socket(sock, server_side=True)
+
+
+def h2_handler(respond, num_connections=1):
+    """
+    Build a socket handler speaking HTTP/2. ``respond`` is called with the
+    server-side h2 connection, the stream ID and the request headers and body
+    once each request is complete. Returns the handler along with the list of
+    ``(headers, body)`` requests received.
+    """
+    received = []
+
+    def socket_handler(listener):
+        listener.settimeout(TIMEOUT)
+        for _ in range(num_connections):
+            sock = wrap_server_socket(listener.accept()[0], ["h2"])
+            conn = h2.connection.H2Connection(
+                config=h2.config.H2Configuration(
+                    client_side=False, header_encoding="utf-8"
+                )
+            )
+            conn.initiate_connection()
+            sock.sendall(conn.data_to_send())
+
+            requests = {}
+            while True:
+                data = sock.recv(65535)
+                if not data:
+                    break
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        requests[event.stream_id] = (dict(event.headers), [])
+                    elif isinstance(event, h2.events.DataReceived):
+                        requests[event.stream_id][1].append(event.data)
+                        conn.acknowledge_received_data(
+                            event.flow_controlled_length, event.stream_id
+                        )
+                    elif isinstance(event, h2.events.StreamEnded):
+                        headers, body = requests.pop(event.stream_id)
+                        received.append((headers, b"".join(body)))
+                        respond(conn, event.stream_id, headers, b"".join(body))
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        break
+                sock.sendall(conn.data_to_send())
+            sock.close()
+
+    return socket_handler, received
+
+
+def send_response(conn, stream_id, status, body, headers=()):
+    conn.send_headers(
+        stream_id,
+        [(":status", str(status)), ("content-length", str(len(body)))] + list(headers),
+    )
+    conn.send_data(stream_id, body, end_stream=True)
+
+
+class TestHTTP2ConnectionPool(SocketDummyServerTestCase):
+    def _pool(self, **kw):
+        kw.setdefault("cert_reqs", "CERT_NONE")
+        kw.setdefault("retries", False)
+        kw.setdefault("timeout", TIMEOUT)
+        return HTTP2ConnectionPool(self.host, self.port, **kw)
+
+    def test_get(self):
+        def respond(conn, stream_id, headers, body):
+            send_response(
+                conn, stream_id, 200, b"hello", [("x-path", headers[":path"])]
+            )
+
+        handler, received = h2_handler(respond)
+        self._start_server(handler)
+
+        with self._pool() as pool:
+            r = pool.request("GET", "/a?b=c", headers={"X-Test": "1"})
+            assert pool.is_http2 is True
+            assert r.status == 200
+            assert r.version == 20
+            assert r.data == b"hello"
+            assert r.headers["x-path"] == "/a?b=c"
+
+        headers, body = received[0]
+        assert headers[":method"] == "GET"
+        assert headers[":scheme"] == "https"
+        assert headers[":authority"] == "%s:%d" % (self.host, self.port)
+        assert headers["x-test"] == "1"
+        assert body == b""
+
+    def test_post_body(self):
+        def respond(conn, stream_id, headers, body):
+            send_response(conn, stream_id, 201, str(len(body)).encode("ascii"))
+
+        handler, received = h2_handler(respond)
+        self._start_server(handler)
+
+        with self._pool() as pool:
+            r = pool.urlopen("POST", "/", body=b"x" * 100000 + b"y")
+            assert r.status == 201
+            assert r.data == b"100001"
+
+        assert received[0][1] == b"x" * 100000 + b"y"
+
+    def test_concurrent_requests_share_connection(self):
+        # Only answer once all the requests have arrived, so they must be in
+        # flight at the same time on the one connection.
+        num_requests = 5
+        pending = []
+
+        def respond(conn, stream_id, headers, body):
+            pending.append((stream_id, headers[":path"]))
+            if len(pending) == num_requests:
+                for stream_id, path in reversed(pending):
+                    send_response(conn, stream_id, 200, path.encode("ascii"))
+
+        handler, received = h2_handler(respond)
+        self._start_server(handler)
+
+        results = {}
+
+        with self._pool() as pool:
+
+            def request(i):
+                r = pool.request("GET", "/%d" % i)
+                results[i] = r.data
+
+            threads = [
+                threading.Thread(target=request, args=(i,)) for i in range(num_requests)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(5)
+
+        assert results == dict((i, b"/%d" % i) for i in range(num_requests))
+
+    def test_reset_stream_raises(self):
+        def respond(conn, stream_id, headers, body):
+            conn.reset_stream(stream_id, error_code=2)
+
+        handler, _ = h2_handler(respond)
+        self._start_server(handler)
+
+        with self._pool() as pool:
+            with pytest.raises(ProtocolError):
+                pool.request("GET", "/")
+
+    def test_released_stream_is_closed(self):
+        def respond(conn, stream_id, headers, body):
+            send_response(conn, stream_id, 200, b"hello")
+
+        handler, _ = h2_handler(respond)
+        self._start_server(handler)
+
+        with self._pool() as pool:
+            r = pool.request("GET", "/", preload_content=False)
+            assert len(pool._h2_conn._streams) == 1
+            r.release_conn()
+            assert pool._h2_conn._streams == {}
+
+    def test_redirect(self):
+        def respond(conn, stream_id, headers, body):
+            if headers[":path"] == "/old":
+                send_response(conn, stream_id, 303, b"", [("location", "/new")])
+            else:
+                send_response(conn, stream_id, 200, b"moved")
+
+        handler, received = h2_handler(respond)
+        self._start_server(handler)
+
+        with self._pool(retries=Retry(redirect=1)) as pool:
+            r = pool.request("GET", "/old")
+            assert r.status == 200
+            assert r.data == b"moved"
+
+        assert [h[":path"] for h, _ in received] == ["/old", "/new"]
+
+    def test_falls_back_to_http11(self):
+        def socket_handler(listener):
+            listener.settimeout(TIMEOUT)
+            sock = wrap_server_socket(listener.accept()[0], ["http/1.1"])
+            for _ in range(2):
+                consume_socket(sock)
+                sock.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            sock.close()
+
+        self._start_server(socket_handler)
+
+        with self._pool() as pool:
+            r = pool.request("GET", "/")
+            assert pool.is_http2 is False
+            assert r.version == 11
+            assert r.data == b"ok"
+            assert pool.num_connections == 1
+
+            r = pool.request("GET", "/")
+            assert r.data == b"ok"
+            assert pool.num_connections == 1
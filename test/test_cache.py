@@ -0,0 +1,385 @@
+import os
+import time
+from io import BytesIO
+
+import pytest
+
+from urllib3.cache import (
+    CacheEntry,
+    DiskCache,
+    MemoryCache,
+    _CacheFiller,
+    is_cacheable,
+    parse_cache_control,
+)
+from urllib3.exceptions import ProtocolError
+from urllib3.response import HTTPResponse
+
+# Tue, 15 Nov 1994 12:45:26 GMT
+DATE = 784903526
+HTTP_DATE = "Tue, 15 Nov 1994 12:45:26 GMT"
+
+
+def make_entry(headers=None, status=200, body=b"body", vary=None, **kw):
+    all_headers = {"Date": HTTP_DATE}
+    all_headers.update(headers or {})
+    kw.setdefault("request_time", DATE)
+    kw.setdefault("response_time", DATE)
+    return CacheEntry("http://example.com/", status, all_headers, body, vary=vary, **kw)
+
+
+class TestParsing(object):
+    def test_parse_cache_control(self):
+        headers = {"Cache-Control": 'Max-Age=60, private="Set-Cookie", no-cache'}
+        assert parse_cache_control(headers) == {
+            "max-age": "60",
+            "private": "Set-Cookie",
+            "no-cache": None,
+        }
+        assert parse_cache_control({}) == {}
+
+    @pytest.mark.parametrize(
+        "status, request_headers, headers, cacheable",
+        [
+            (200, {}, {}, True),
+            (404, {}, {}, True),
+            (206, {}, {"Cache-Control": "max-age=60"}, False),
+            (302, {}, {}, False),
+            (302, {}, {"Cache-Control": "max-age=60"}, True),
+            (307, {}, {"Expires": HTTP_DATE}, True),
+            (200, {}, {"Cache-Control": "no-store"}, False),
+            (200, {"Cache-Control": "no-store"}, {}, False),
+            (200, {}, {"Vary": "Accept, *"}, False),
+        ],
+    )
+    def test_is_cacheable(self, status, request_headers, headers, cacheable):
+        response = HTTPResponse(status=status, headers=headers)
+        assert is_cacheable(request_headers, response) is cacheable
+
+
+class TestCacheEntry(object):
+    def test_current_age(self):
+        entry = make_entry({"Age": "10"}, request_time=DATE - 2, response_time=DATE)
+        # The Age given, plus the time the response took, plus its time in
+        # the cache.
+        assert entry.current_age(DATE + 5) == 17
+
+        entry = make_entry(response_time=DATE + 30)
+        assert entry.current_age(DATE + 30) == 30
+
+    @pytest.mark.parametrize(
+        "headers, lifetime",
+        [
+            ({"Cache-Control": "max-age=60", "Expires": HTTP_DATE}, 60),
+            ({"Expires": "Tue, 15 Nov 1994 12:46:26 GMT"}, 60),
+            ({"Expires": "0"}, 0),
+            ({"Last-Modified": "Tue, 15 Nov 1994 12:28:46 GMT"}, 100),
+            ({}, 0),
+        ],
+    )
+    def test_freshness_lifetime(self, headers, lifetime):
+        assert make_entry(headers).freshness_lifetime() == lifetime
+
+    def test_heuristic_freshness_needs_a_cacheable_status(self):
+        headers = {"Last-Modified": "Tue, 15 Nov 1994 12:28:46 GMT"}
+        assert make_entry(headers, status=302).freshness_lifetime() == 0
+        headers["Cache-Control"] = "public"
+        assert make_entry(headers, status=302).freshness_lifetime() == 100
+
+    def test_is_fresh(self):
+        entry = make_entry({"Cache-Control": "max-age=60"})
+        assert entry.is_fresh({}, DATE + 59)
+        assert not entry.is_fresh({}, DATE + 60)
+        assert not entry.is_fresh({"Cache-Control": "no-cache"}, DATE)
+        assert not entry.is_fresh({"Pragma": "no-cache"}, DATE)
+        assert not entry.is_fresh({"Cache-Control": "max-age=10"}, DATE + 20)
+        assert not entry.is_fresh({"Cache-Control": "min-fresh=30"}, DATE + 40)
+        assert entry.is_fresh({"Cache-Control": "max-stale"}, DATE + 1000)
+        assert entry.is_fresh({"Cache-Control": "max-stale=10"}, DATE + 70)
+        assert not entry.is_fresh({"Cache-Control": "max-stale=10"}, DATE + 71)
+
+        entry = make_entry({"Cache-Control": "max-age=60, must-revalidate"})
+        assert not entry.is_fresh({"Cache-Control": "max-stale"}, DATE + 61)
+        entry = make_entry({"Cache-Control": "max-age=60, no-cache"})
+        assert not entry.is_fresh({}, DATE)
+
+    def test_is_useful(self):
+        assert make_entry({"Cache-Control": "max-age=60"}).is_useful()
+        assert make_entry({"ETag": '"a"'}).is_useful()
+        assert not make_entry().is_useful()
+
+    def test_validators(self):
+        entry = make_entry({"ETag": '"a"', "Last-Modified": HTTP_DATE})
+        assert entry.validators() == {
+            "If-None-Match": '"a"',
+            "If-Modified-Since": HTTP_DATE,
+        }
+        assert make_entry().validators() == {}
+
+    def test_matches(self):
+        response = HTTPResponse(headers={"Vary": "Accept-Encoding, Accept"})
+        entry = CacheEntry.from_response(
+            "http://example.com/",
+            {"accept-encoding": "gzip"},
+            response,
+            b"",
+            DATE,
+            DATE,
+        )
+        assert entry.vary == {"accept-encoding": "gzip", "accept": None}
+        assert entry.matches({"Accept-Encoding": "gzip"})
+        assert not entry.matches({"Accept-Encoding": "gzip", "Accept": "*/*"})
+        assert not entry.matches({})
+
+    def test_updated(self):
+        entry = make_entry({"ETag": '"a"', "Content-Length": "4", "X-Old": "1"})
+        response = HTTPResponse(
+            status=304,
+            headers={
+                "ETag": '"a"',
+                "Cache-Control": "max-age=60",
+                "Date": "Tue, 15 Nov 1994 12:55:26 GMT",
+                "Content-Length": "0",
+            },
+        )
+        updated = entry.updated(response, DATE + 600, DATE + 600)
+        assert updated.body == b"body"
+        assert updated.status == 200
+        assert updated.headers["Content-Length"] == "4"
+        assert updated.headers["X-Old"] == "1"
+        assert updated.is_fresh({}, DATE + 630)
+
+    def test_to_response(self):
+        entry = make_entry({"Content-Encoding": "gzip"}, body=b"raw")
+        response = entry.to_response(DATE + 3, decode_content=False)
+        assert response.status == 200
+        assert response.headers["Age"] == "3"
+        assert response.data == b"raw"
+        assert "Age" not in entry.headers
+
+        response = entry.to_response(DATE, preload_content=False, decode_content=False)
+        assert response.read() == b"raw"
+
+
+class TestMemoryCache(object):
+    def test_get_set_delete(self):
+        cache = MemoryCache()
+        entry = make_entry()
+        assert cache.get("a") is None
+        cache.set("a", entry)
+        assert cache.get("a") is entry
+        assert len(cache) == 1
+        assert cache.size == 4
+
+        cache.set("a", make_entry(body=b"longer"))
+        assert cache.size == 6
+        cache.delete("a")
+        cache.delete("a")
+        assert len(cache) == 0
+        assert cache.size == 0
+
+    def test_lru_eviction(self):
+        cache = MemoryCache(max_size=10, max_entry_size=4)
+        cache.set("a", make_entry(body=b"aaaa"))
+        cache.set("b", make_entry(body=b"bbbb"))
+        cache.get("a")
+        cache.set("c", make_entry(body=b"cccc"))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.size == 8
+
+    def test_too_large(self):
+        cache = MemoryCache(max_size=100)
+        assert cache.max_entry_size == 10
+        cache.set("a", make_entry())
+        cache.set("a", make_entry(body=b"x" * 11))
+        assert cache.get("a") is None
+
+        cache.set("a", make_entry())
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.size == 0
+
+
+class TestDiskCache(object):
+    def body_files(self, directory):
+        return sorted(
+            name
+            for _, _, names in os.walk(os.path.join(str(directory), "bodies"))
+            for name in names
+        )
+
+    def test_get_set_delete(self, tmpdir):
+        cache = DiskCache(str(tmpdir))
+        assert cache.get("a") is None
+        entry = make_entry(vary={"accept": None})
+        entry.headers.add("Set-Cookie", "a=1")
+        entry.headers.add("Set-Cookie", "b=2")
+        cache.set("a", entry)
+
+        stored = cache.get("a")
+        assert stored.url == "http://example.com/"
+        assert stored.headers.get_all("Set-Cookie") == ["a=1", "b=2"]
+        assert stored.vary == {"accept": None}
+        assert stored.response_time == DATE
+        assert stored.size == 4
+        assert stored.to_response(DATE, preload_content=False).read() == b"body"
+        assert len(cache) == 1
+        assert cache.size == 4
+
+        cache.delete("a")
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        assert self.body_files(tmpdir) == []
+
+    def test_mapped_body(self, tmpdir):
+        cache = DiskCache(str(tmpdir))
+        cache.set("a", make_entry(body=b"0123456789"))
+        body = cache.get("a").open_body()
+        assert body.read(3) == b"012"
+        buffer = bytearray(4)
+        assert body.readinto(buffer) == 4
+        assert buffer == bytearray(b"3456")
+        assert body.read() == b"789"
+        assert body.read(1) == b""
+        assert body.readinto(buffer) == 0
+
+        cache.set("b", make_entry(body=b""))
+        assert cache.get("b").open_body().read() == b""
+
+    def test_content_addressed(self, tmpdir):
+        cache = DiskCache(str(tmpdir))
+        cache.set("a", make_entry(body=b"same"))
+        cache.set("b", make_entry(body=b"same"))
+        assert len(self.body_files(tmpdir)) == 1
+        assert cache.size == 4
+
+        cache.delete("a")
+        assert cache.get("b").open_body().read() == b"same"
+        cache.set("b", make_entry(body=b"other"))
+        assert len(self.body_files(tmpdir)) == 1
+        cache.clear()
+        assert self.body_files(tmpdir) == []
+
+    def test_shared_lru_eviction(self, tmpdir):
+        # Two caches on one directory, as in two processes.
+        one = DiskCache(str(tmpdir), max_size=10, max_entry_size=4)
+        two = DiskCache(str(tmpdir), max_size=10, max_entry_size=4)
+        one.set("a", make_entry(body=b"aaaa"))
+        time.sleep(0.01)
+        two.set("b", make_entry(body=b"bbbb"))
+        time.sleep(0.01)
+        two.get("a")
+        time.sleep(0.01)
+        one.set("c", make_entry(body=b"cccc"))
+
+        assert one.get("b") is None
+        assert two.get("a") is not None
+        assert two.get("c") is not None
+        assert len(self.body_files(tmpdir)) == 2
+
+    def test_writer(self, tmpdir):
+        cache = DiskCache(str(tmpdir), max_size=100)
+        writer = cache.writer("a", make_entry(body=None))
+        writer.write(b"bo")
+        writer.write(b"dy")
+        assert cache.get("a") is None
+        writer.commit()
+        assert cache.get("a").open_body().read() == b"body"
+
+        writer = cache.writer("b", make_entry(body=None))
+        writer.write(b"x" * 11)
+        writer.commit()
+        assert cache.get("b") is None
+
+        writer = cache.writer("b", make_entry(body=None))
+        writer.write(b"x")
+        writer.abort()
+        assert cache.get("b") is None
+        assert os.listdir(str(tmpdir.join("tmp"))) == []
+
+    def test_updated(self, tmpdir):
+        cache = DiskCache(str(tmpdir))
+        cache.set("a", make_entry({"ETag": '"a"'}))
+        response = HTTPResponse(status=304, headers={"Cache-Control": "max-age=60"})
+        entry = cache.get("a").updated(response, DATE, DATE)
+        cache.set("a", entry)
+
+        stored = cache.get("a")
+        assert stored.headers["Cache-Control"] == "max-age=60"
+        assert stored.open_body().read() == b"body"
+
+    def test_evicted_body(self, tmpdir):
+        cache = DiskCache(str(tmpdir))
+        cache.set("a", make_entry())
+        for name in self.body_files(tmpdir):
+            os.remove(os.path.join(str(tmpdir), "bodies", name[:2], name))
+        assert cache.get("a") is None
+
+    def test_stale_temp_files(self, tmpdir):
+        DiskCache(str(tmpdir))
+        stale = tmpdir.join("tmp", "stale")
+        stale.write(b"")
+        os.utime(str(stale), (0, 0))
+        tmpdir.join("tmp", "recent").write(b"")
+        DiskCache(str(tmpdir))
+        assert os.listdir(str(tmpdir.join("tmp"))) == ["recent"]
+
+    def test_forked_process_reconnects(self, tmpdir):
+        cache = DiskCache(str(tmpdir))
+        cache.set("a", make_entry())
+        db = cache._db
+        cache._pid = -1
+        assert cache.get("a") is not None
+        assert cache._db is not db
+
+
+class TestCacheFiller(object):
+    def make_response(self, body, length, cache):
+        entry = make_entry({"Cache-Control": "max-age=60"}, body=None)
+        fp = _CacheFiller(BytesIO(body), cache.writer("a", entry), length)
+        return HTTPResponse(fp, preload_content=False)
+
+    def test_kept_at_the_end(self):
+        cache = MemoryCache()
+        response = self.make_response(b"0123456789", 10, cache)
+        assert response.read(4) == b"0123"
+        assert cache.get("a") is None
+        assert response.read() == b"456789"
+        assert cache.get("a").body == b"0123456789"
+
+    def test_readinto(self):
+        cache = MemoryCache()
+        response = self.make_response(b"0123456789", None, cache)
+        buffer = bytearray(6)
+        assert response.readinto(buffer) == 6
+        assert response.readinto(buffer) == 4
+        assert cache.get("a") is None
+        assert response.readinto(buffer) == 0
+        assert cache.get("a").body == b"0123456789"
+
+    def test_not_kept_when_short(self):
+        cache = MemoryCache()
+        response = self.make_response(b"01234", 10, cache)
+        assert response.read() == b"01234"
+        assert cache.get("a") is None
+
+    def test_not_kept_when_closed(self):
+        cache = MemoryCache()
+        response = self.make_response(b"0123456789", 10, cache)
+        response.read(4)
+        response.close()
+        assert cache.get("a") is None
+
+    def test_not_kept_on_errors(self):
+        class BrokenBody(BytesIO):
+            def read(self, amt=None):
+                raise ProtocolError("Connection broken")
+
+        cache = MemoryCache()
+        entry = make_entry(body=None)
+        fp = _CacheFiller(BrokenBody(), cache.writer("a", entry), 10)
+        with pytest.raises(ProtocolError):
+            fp.read(4)
+        assert cache.get("a") is None
@@ -0,0 +1,128 @@
+import mock
+import pytest
+
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import (
+    CircuitOpenError,
+    ConnectTimeoutError,
+    NewConnectionError,
+    ProtocolError,
+    ReadTimeoutError,
+)
+from urllib3.response import HTTPResponse
+from urllib3.util.circuit import CircuitBreaker
+
+
+@pytest.fixture
+def now():
+    now = [100.0]
+    with mock.patch("urllib3.util.circuit.current_time", lambda: now[0]):
+        yield now
+
+
+class TestCircuitBreaker(object):
+    def setup_method(self, method):
+        self.breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10)
+        self.changes = []
+        self.breaker.state_changed.connect(
+            lambda key, old, new: self.changes.append((key, old, new))
+        )
+        self.pool = HTTPConnectionPool("localhost", 8080)
+        self.key = ("http", "localhost", 8080)
+
+    def fail(self):
+        self.breaker.after_request(self.pool, error=ConnectTimeoutError())
+
+    def test_open_after_threshold(self, now):
+        self.fail()
+        self.fail()
+        self.breaker.before_request(self.pool, "/")
+        assert self.breaker.state(*self.key) == "closed"
+
+        self.fail()
+        assert self.breaker.state(*self.key) == "open"
+        assert self.changes == [(self.key, "closed", "open")]
+        with pytest.raises(CircuitOpenError):
+            self.breaker.before_request(self.pool, "/")
+
+        # Other hosts aren't affected.
+        other = HTTPConnectionPool("localhost", 8081)
+        self.breaker.before_request(other, "/")
+        assert self.breaker.state("http", "localhost", 8081) == "closed"
+
+    def test_success_resets_failures(self, now):
+        self.fail()
+        self.fail()
+        self.breaker.after_request(self.pool, HTTPResponse(status=200))
+        self.fail()
+        self.fail()
+        assert self.breaker.state(*self.key) == "closed"
+        assert self.changes == []
+
+    def test_half_open_probe(self, now):
+        for _ in range(3):
+            self.fail()
+
+        now[0] += 10
+        self.breaker.before_request(self.pool, "/")
+        assert self.breaker.state(*self.key) == "half-open"
+        # Only one probe at a time.
+        with pytest.raises(CircuitOpenError):
+            self.breaker.before_request(self.pool, "/")
+
+        # The probe failed.
+        self.fail()
+        assert self.breaker.state(*self.key) == "open"
+        now[0] += 5
+        with pytest.raises(CircuitOpenError):
+            self.breaker.before_request(self.pool, "/")
+
+        now[0] += 5
+        self.breaker.before_request(self.pool, "/")
+        # A probe with no outcome lets another through later.
+        now[0] += 10
+        self.breaker.before_request(self.pool, "/")
+        self.breaker.after_request(self.pool, HTTPResponse(status=404))
+        assert self.breaker.state(*self.key) == "closed"
+        self.breaker.before_request(self.pool, "/")
+
+        assert [change[1:] for change in self.changes] == [
+            ("closed", "open"),
+            ("open", "half-open"),
+            ("half-open", "open"),
+            ("open", "half-open"),
+            ("half-open", "closed"),
+        ]
+
+    @pytest.mark.parametrize(
+        "kwargs, failure",
+        [
+            ({"error": NewConnectionError(None, "refused")}, True),
+            ({"error": ConnectTimeoutError()}, True),
+            ({"error": ProtocolError("Connection aborted.")}, True),
+            ({"error": ReadTimeoutError(None, "/", "timed out")}, False),
+            ({"response": HTTPResponse(status=503)}, True),
+            ({"response": HTTPResponse(status=500)}, False),
+            ({"response": HTTPResponse(status=429)}, False),
+            ({"response": HTTPResponse(status=200)}, False),
+        ],
+    )
+    def test_is_failure(self, kwargs, failure):
+        status_forcelist = [429, 503]
+        assert self.breaker.is_failure(status_forcelist=status_forcelist, **kwargs) is (
+            failure
+        )
+
+    def test_other_errors_ignored(self, now):
+        for _ in range(5):
+            self.breaker.after_request(
+                self.pool, error=ReadTimeoutError(None, "/", "timed out")
+            )
+        assert self.breaker.state(*self.key) == "closed"
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"failure_threshold": 0}, {"recovery_timeout": 0}]
+    )
+    def test_invalid(self, kwargs):
+        with pytest.raises(ValueError):
+            CircuitBreaker(**kwargs)
@@ -0,0 +1,228 @@
+import threading
+import time
+import zlib
+from io import BytesIO
+
+import pytest
+
+from urllib3.exceptions import ProtocolError
+from urllib3.response import HTTPResponse
+from urllib3.util.coalesce import RequestCoalescer
+
+
+class FakeUpstream(object):
+    """ Answers requests once it's released, counting them. """
+
+    def __init__(self, body=b"shared", headers=None, error=None):
+        self.body = body
+        self.headers = {"Content-Length": str(len(body))}
+        self.headers.update(headers or {})
+        self.error = error
+        self.calls = []
+        self.release = threading.Event()
+
+    def urlopen(self, method, url, **kw):
+        self.calls.append((method, url, kw))
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return HTTPResponse(
+            BytesIO(self.body),
+            headers=self.headers,
+            status=200,
+            preload_content=kw.get("preload_content", True),
+            decode_content=kw.get("decode_content", True),
+        )
+
+
+class TestRequestCoalescer(object):
+    def setup_method(self, method):
+        self.coalescer = RequestCoalescer(max_body_size=100)
+
+    def request_concurrently(self, upstream, requests):
+        """ Make ``requests``, ``(method, url, kw)`` tuples, on threads, while
+        the upstream is held, and return their responses or errors. """
+        results = [None] * len(requests)
+
+        def request(index, method, url, kw):
+            try:
+                results[index] = self.coalescer.urlopen(
+                    upstream.urlopen, method, url, **kw
+                )
+            except Exception as e:
+                results[index] = e
+
+        threads = [
+            threading.Thread(target=request, args=(index,) + tuple(args))
+            for index, args in enumerate(requests)
+        ]
+        threads[0].start()
+        self.wait_for(lambda: upstream.calls)
+        for thread in threads[1:]:
+            thread.start()
+        self.wait_for(
+            lambda: sum(f.waiters for f in self.coalescer._flights.values())
+            + len(upstream.calls)
+            >= len(requests)
+        )
+        upstream.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def wait_for(self, condition):
+        deadline = time.time() + 5
+        while not condition():
+            assert time.time() < deadline
+            time.sleep(0.001)
+
+    def test_shared(self):
+        upstream = FakeUpstream()
+        url = "http://example.com/"
+        results = self.request_concurrently(
+            upstream,
+            [
+                ("GET", url, {"headers": {"X-Request-Id": "1"}}),
+                ("GET", url, {"headers": {"X-Request-Id": "2"}}),
+                ("GET", url, {"preload_content": False}),
+            ],
+        )
+        assert len(upstream.calls) == 1
+        assert upstream.calls[0][2]["preload_content"] is False
+        assert results[0].data == b"shared"
+        assert results[1].data == b"shared"
+        assert results[2].read(3) == b"sha"
+        assert results[2].read() == b"red"
+        assert len(set(id(r) for r in results)) == 3
+        assert results[0].headers is not results[1].headers
+        assert self.coalescer._flights == {}
+
+    def test_decoded_for_each(self):
+        body = zlib.compress(b"shared")
+        upstream = FakeUpstream(body, headers={"Content-Encoding": "deflate"})
+        url = "http://example.com/"
+        results = self.request_concurrently(
+            upstream, [("GET", url, {}), ("GET", url, {"decode_content": False})]
+        )
+        assert len(upstream.calls) == 1
+        assert results[0].data == b"shared"
+        assert results[1].data == body
+
+    def test_different_requests(self):
+        upstream = FakeUpstream()
+        url = "http://example.com/"
+        results = self.request_concurrently(
+            upstream,
+            [
+                ("GET", url, {}),
+                ("GET", url, {"headers": {"Accept": "text/html"}}),
+                ("GET", url + "other", {}),
+                ("GET", url, {"redirect": False}),
+            ],
+        )
+        assert len(upstream.calls) == 4
+        assert all(r.data == b"shared" for r in results)
+
+    def test_not_shared(self):
+        upstream = FakeUpstream()
+        url = "http://example.com/"
+        # Only safe methods, without a body.
+        self.request_concurrently(
+            upstream,
+            [("POST", url, {}), ("POST", url, {}), ("GET", url, {"body": b"x"})],
+        )
+        assert len(upstream.calls) == 3
+
+    def test_too_large(self):
+        upstream = FakeUpstream(b"x" * 101)
+        url = "http://example.com/"
+        results = self.request_concurrently(
+            upstream, [("GET", url, {}), ("GET", url, {})]
+        )
+        # The second request waited, then went on its own.
+        assert len(upstream.calls) == 2
+        assert results[0].data == b"x" * 101
+        assert results[1].data == b"x" * 101
+
+    def test_unknown_length(self):
+        upstream = FakeUpstream()
+        del upstream.headers["Content-Length"]
+        url = "http://example.com/"
+        results = self.request_concurrently(
+            upstream, [("GET", url, {"preload_content": False}), ("GET", url, {})]
+        )
+        assert len(upstream.calls) == 2
+        assert results[0].read() == b"shared"
+        assert results[1].data == b"shared"
+
+    def test_error_raised_to_all(self):
+        error = ProtocolError("Connection aborted.")
+        upstream = FakeUpstream(error=error)
+        url = "http://example.com/"
+        results = self.request_concurrently(
+            upstream, [("GET", url, {}), ("GET", url, {})]
+        )
+        assert len(upstream.calls) == 1
+        assert results == [error, error]
+        assert self.coalescer._flights == {}
+
+    def test_timings_copied(self):
+        upstream = FakeUpstream()
+        url = "http://example.com/"
+        results = self.request_concurrently(
+            upstream, [("GET", url, {}), ("GET", url, {})]
+        )
+        assert len(upstream.calls) == 1
+        assert results[0].timings is not results[1].timings
+
+    def test_waiter_times_out(self):
+        upstream = FakeUpstream()
+        url = "http://example.com/"
+        results = [None, None]
+
+        def request(index, **kw):
+            results[index] = self.coalescer.urlopen(upstream.urlopen, "GET", url, **kw)
+
+        leader = threading.Thread(target=request, args=(0,))
+        leader.start()
+        self.wait_for(lambda: upstream.calls)
+        waiter = threading.Thread(target=request, args=(1,), kwargs={"timeout": 0.05})
+        waiter.start()
+
+        # The waiter gives up on the leader, and makes the request itself.
+        self.wait_for(lambda: len(upstream.calls) == 2)
+        assert upstream.calls[1][2]["timeout"] == 0.05
+        upstream.release.set()
+        leader.join(5)
+        waiter.join(5)
+
+        assert [r.data for r in results] == [b"shared", b"shared"]
+        assert self.coalescer._flights == {}
+
+    def test_waiter_times_out_by_default(self):
+        upstream = FakeUpstream()
+        url = "http://example.com/"
+        results = [None, None]
+
+        def request(index):
+            results[index] = self.coalescer.urlopen(
+                upstream.urlopen, "GET", url, default_timeout=0.05
+            )
+
+        leader = threading.Thread(target=request, args=(0,))
+        leader.start()
+        self.wait_for(lambda: upstream.calls)
+        waiter = threading.Thread(target=request, args=(1,))
+        waiter.start()
+
+        self.wait_for(lambda: len(upstream.calls) == 2)
+        assert "default_timeout" not in upstream.calls[1][2]
+        upstream.release.set()
+        leader.join(5)
+        waiter.join(5)
+
+        assert [r.data for r in results] == [b"shared", b"shared"]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            RequestCoalescer(max_body_size=-1)
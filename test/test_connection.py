@@ -1,9 +1,37 @@
 import datetime
 import mock
+import os
+import tempfile
 
 import pytest
 
-from urllib3.connection import CertificateError, _match_hostname, RECENT_DATE
+from urllib3.connection import (
+    CertificateError,
+    HTTPConnection,
+    HTTPSConnection,
+    _match_hostname,
+    RECENT_DATE,
+)
+
+
+class GatheringSocket(object):
+    """ Takes at most ``limit`` bytes per ``sendmsg`` call. """
+
+    def __init__(self, limit=5):
+        self.limit = limit
+        self.data = b""
+        self.options = []
+
+    def sendall(self, data):
+        self.data += bytes(data)
+
+    def sendmsg(self, buffers):
+        data = b"".join(bytes(buf) for buf in buffers)[: self.limit]
+        self.data += data
+        return len(data)
+
+    def setsockopt(self, level, option, value):
+        self.options.append(value)
 
 
 class TestConnection(object):
@@ -43,6 +71,21 @@ class TestConnection(object):
             )
             assert e._peer_cert == cert
 
+    @pytest.mark.skipif(not hasattr(os, "sendfile"), reason="needs os.sendfile")
+    def test_sendfile_length_does_not_connect(self):
+        with tempfile.TemporaryFile() as body:
+            body.write(b"skipped" + b"A" * 10)
+            body.seek(len(b"skipped"))
+
+            conn = HTTPConnection("localhost", 1)
+            with mock.patch.object(conn, "connect") as connect:
+                assert conn._sendfile_length(body) == 10
+            connect.assert_not_called()
+            assert conn.sock is None
+
+            conn = HTTPSConnection("localhost", 1)
+            assert conn._sendfile_length(body) is None
+
     def test_recent_date(self):
         # This test is to make sure that the RECENT_DATE value
         # doesn't get too far behind what the current date is.
@@ -50,3 +93,23 @@ class TestConnection(object):
         # according to the rules defined in that file.
         two_years = datetime.timedelta(days=365 * 2)
         assert RECENT_DATE > (datetime.datetime.today() - two_years).date()
+
+    @pytest.mark.parametrize(
+        "frame_size, expected",
+        [
+            (None, b"3\r\nfoo\r\n6\r\nbarbaz\r\n0\r\n\r\n"),
+            (4, b"9\r\nfoobarbaz\r\n0\r\n\r\n"),
+            (100, b"9\r\nfoobarbaz\r\n0\r\n\r\n"),
+        ],
+    )
+    def test_request_chunked(self, frame_size, expected):
+        conn = HTTPConnection("localhost", chunked_frame_size=frame_size)
+        conn.sock = GatheringSocket()
+        conn.request_chunked("POST", "/", body=[b"foo", b"", u"barbaz"])
+
+        headers, body = conn.sock.data.split(b"\r\n\r\n", 1)
+        assert b"Transfer-Encoding: chunked" in headers
+        assert body == expected
+        assert conn.bytes_sent == len(conn.sock.data)
+        if conn.sock.options:
+            assert conn.sock.options == [1, 0]
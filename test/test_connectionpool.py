@@ -1,6 +1,8 @@
 from __future__ import absolute_import
 
 import ssl
+import sys
+import mock
 import pytest
 
 from urllib3.connectionpool import (
@@ -10,9 +12,10 @@ from urllib3.connectionpool import (
     HTTPSConnectionPool,
 )
 from urllib3.response import httplib, HTTPResponse
+from urllib3.util.retry import Retry
 from urllib3.util.timeout import Timeout
 from urllib3.packages.six.moves.http_client import HTTPException
-from urllib3.packages.six.moves.queue import Empty
+from urllib3.packages.six.moves.queue import Empty, Queue
 from urllib3.packages.ssl_match_hostname import CertificateError
 from urllib3.exceptions import (
     ClosedPoolError,
@@ -291,6 +294,130 @@ class TestConnectionPool(object):
                 pool.request("GET", "/", retries=1, pool_timeout=0.01)
             assert pool.pool.qsize() == POOL_SIZE
 
+    def test_adaptive_pool_grows(self):
+        with HTTPConnectionPool(host="localhost", maxsize=4, minsize=1) as pool:
+            assert pool.pool.maxsize == 1
+            conns = [pool._get_conn() for _ in range(3)]
+            for conn in conns:
+                pool._put_conn(conn)
+            assert pool.pool.maxsize == 3
+            assert pool.num_discarded == 0
+
+            conns = [pool._get_conn() for _ in range(6)]
+            for conn in conns:
+                pool._put_conn(conn)
+            assert pool.pool.maxsize == 4
+            assert pool.num_discarded == 2
+
+    def test_adaptive_pool_grows_when_blocked(self):
+        with HTTPConnectionPool(
+            host="localhost", maxsize=2, minsize=1, block=True
+        ) as pool:
+            first = pool._get_conn(timeout=0.01)
+            second = pool._get_conn(timeout=0.01)
+            assert pool.pool.maxsize == 2
+            assert pool.wait_time > 0
+            with pytest.raises(EmptyPoolError):
+                pool._get_conn(timeout=0.01)
+            pool._put_conn(first)
+            pool._put_conn(second)
+            assert pool.pool.qsize() == 2
+
+    def test_adaptive_pool_counts_only_checked_out_conns(self):
+        with HTTPConnectionPool(
+            host="localhost", port=1, maxsize=1, minsize=1, block=True
+        ) as pool:
+            conn = pool._get_conn()
+            assert pool._in_use == 1
+            with pytest.raises(EmptyPoolError):
+                pool.urlopen("GET", "/", pool_timeout=0.01)
+            assert pool._in_use == 1
+            assert pool._peak_in_use == 1
+            pool._put_conn(conn)
+            assert pool._in_use == 0
+
+    def test_adaptive_pool_shrinks(self):
+        now = [100.0]
+        with mock.patch(
+            "urllib3.connectionpool.current_time", lambda: now[0]
+        ), mock.patch(
+            "urllib3.connectionpool.is_connection_dropped", return_value=False
+        ):
+            with HTTPConnectionPool(host="localhost", maxsize=5, minsize=2) as pool:
+                conns = [pool._get_conn() for _ in range(5)]
+                for conn in conns:
+                    conn.close = mock.Mock()
+                    pool._put_conn(conn)
+                assert pool.pool.maxsize == 5
+
+                # Only one connection was needed during the last interval.
+                now[0] += pool.ADAPTIVE_SHRINK_INTERVAL
+                pool._put_conn(pool._get_conn())
+                assert pool.pool.maxsize == 5
+
+                now[0] += pool.ADAPTIVE_SHRINK_INTERVAL
+                conn = pool._get_conn()
+                pool._put_conn(conn)
+                assert pool.pool.maxsize == 2
+                assert pool.pool.qsize() == 2
+                assert sum(c.close.called for c in conns) == 3
+                # The most recently used connections are kept.
+                assert conn is pool._get_conn()
+
+    def test_adaptive_pool_invalid_minsize(self):
+        with pytest.raises(ValueError):
+            HTTPConnectionPool(host="localhost", maxsize=2, minsize=3)
+        with pytest.raises(ValueError):
+            HTTPConnectionPool(host="localhost", maxsize=2, minsize=0)
+
+    def test_overflow(self):
+        with HTTPConnectionPool(host="localhost", maxsize=1, max_overflow=1) as pool:
+            conns = [pool._get_conn() for _ in range(3)]
+            for conn in conns:
+                conn.close = mock.Mock()
+                pool._put_conn(conn)
+            assert pool.num_discarded == 1
+            assert conns[2].close.called
+
+            # The overflow is used once the pool is empty.
+            assert pool._get_conn() is conns[0]
+            assert pool._get_conn() is conns[1]
+
+            pool._put_conn(conns[1])
+            pool._put_conn(conns[0])
+            pool.close()
+            assert conns[0].close.called and conns[1].close.called
+
+    def test_priority_and_deadline(self):
+        with HTTPConnectionPool(host="localhost", maxsize=1, block=True) as pool:
+            pool._get_conn = mock.Mock(side_effect=EmptyPoolError(pool, "Empty"))
+            with pytest.raises(EmptyPoolError):
+                pool.urlopen("GET", "/", priority=3)
+            pool._get_conn.assert_called_once_with(
+                timeout=None, priority=3, deadline=None
+            )
+
+            with mock.patch("urllib3.connectionpool.current_time", return_value=10):
+                with pytest.raises(EmptyPoolError):
+                    pool.urlopen("GET", "/", pool_timeout=1, priority=3)
+            pool._get_conn.assert_called_with(timeout=1, priority=3, deadline=11)
+
+            with mock.patch("urllib3.connectionpool.current_time", return_value=10):
+                with pytest.raises(EmptyPoolError):
+                    pool.urlopen("GET", "/", timeout=Timeout(total=5))
+            pool._get_conn.assert_called_with(timeout=None, priority=0, deadline=15)
+
+    def test_plain_queue_cls(self):
+        class QueuePool(HTTPConnectionPool):
+            QueueCls = Queue
+
+        with QueuePool(host="localhost", maxsize=1, block=True) as pool:
+            conn = pool._get_conn(timeout=0.01, priority=3, deadline=1)
+            with pytest.raises(EmptyPoolError):
+                pool._get_conn(timeout=0.01, priority=3, deadline=1)
+            pool._put_conn(conn)
+            assert pool._get_conn(priority=3) is conn
+
     def test_assert_same_host(self):
         with connection_from_url("http://google.com:80") as c:
             with pytest.raises(HostChangedError):
@@ -477,6 +604,24 @@ class TestConnectionPool(object):
         _test(SocketError)
         _test(ProtocolError)
 
+    def test_retries_do_not_grow_the_stack(self):
+        depths = []
+
+        def _make_request(*args, **kwargs):
+            frame, depth = sys._getframe(), 0
+            while frame:
+                frame, depth = frame.f_back, depth + 1
+            depths.append(depth)
+            raise SocketError("boom")
+
+        with HTTPConnectionPool(host="localhost", maxsize=1, block=True) as pool:
+            pool._make_request = _make_request
+            with pytest.raises(MaxRetryError):
+                pool.urlopen("GET", "/", retries=Retry(total=50))
+
+        assert len(depths) == 51
+        assert len(set(depths)) == 1
+
     def test_custom_http_response_class(self):
         class CustomHTTPResponse(HTTPResponse):
             pass
@@ -12,6 +12,8 @@ from urllib3.exceptions import (
     ReadTimeoutError,
     ConnectTimeoutError,
     HeaderParsingError,
+    DownloadError,
+    ResourceChangedError,
 )
 from urllib3.connectionpool import HTTPConnectionPool
 
@@ -32,6 +34,8 @@ class TestPickle(object):
             EmptyPoolError(HTTPConnectionPool("localhost"), None),
             HostChangedError(HTTPConnectionPool("localhost"), "/", None),
             ReadTimeoutError(HTTPConnectionPool("localhost"), "/", None),
+            DownloadError("http://localhost/", "Unexpected status 404"),
+            ResourceChangedError("http://localhost/", "ETag changed"),
         ],
     )
     def test_exceptions(self, exception):
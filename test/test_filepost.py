@@ -1,6 +1,9 @@
+import io
+import tempfile
+
 import pytest
 
-from urllib3.filepost import encode_multipart_formdata, iter_fields
+from urllib3.filepost import encode_multipart_formdata, iter_fields, MultipartEncoder
 from urllib3.fields import RequestField
 from urllib3.packages.six import b, u
 
@@ -127,3 +130,104 @@ class TestMultipartEncoding(object):
         )
 
         assert encoded == expected
+
+    def test_many_fields_match_request_fields(self):
+        fields = []
+        for i in range(50):
+            fields += [
+                ("k%d" % (i % 5), u"v\u00e9 %d" % i),
+                (u('na"me\\%d' % (i % 3)), b"v"),
+                ("f", ("file%d.txt" % (i % 2), b"data")),
+                ("f", ("file%d.txt" % (i % 2), b"data", "image/jpeg")),
+                ("f", ("file.bin", b"data", None)),
+                ("n", i),
+            ]
+        request_fields = [RequestField.from_tuples(*field) for field in fields]
+
+        encoded, _ = encode_multipart_formdata(fields, boundary=BOUNDARY)
+        expected, _ = encode_multipart_formdata(request_fields, boundary=BOUNDARY)
+        assert encoded == expected
+        assert b"Content-Type: text/plain\r\n" in encoded
+        assert b'name="na%22me\\\\0"' in encoded
+
+
+class Unsized(object):
+    """ A file-like object which can only be read. """
+
+    def __init__(self, data):
+        self._fp = io.BytesIO(data)
+
+    def read(self, amt=-1):
+        return self._fp.read(amt)
+
+
+class TestMultipartEncoder(object):
+    def test_same_as_encode_multipart_formdata(self):
+        fields = [
+            ("k", "v"),
+            (u("k\u00e9"), u("\u2603")),
+            ("n", 3),
+            ("f", ("somefile.txt", b"data")),
+        ]
+        encoded, content_type = encode_multipart_formdata(fields, boundary=BOUNDARY)
+        encoder = MultipartEncoder(fields, boundary=BOUNDARY)
+
+        assert encoder.read() == encoded
+        assert encoder.read() == b""
+        assert encoder.content_length == len(encoded)
+        assert encoder.headers == {
+            "Content-Type": content_type,
+            "Content-Length": str(len(encoded)),
+        }
+
+    def test_file_fields(self):
+        data = b"x" * 1000
+        fp = io.BytesIO(b"skipped" + data)
+        fp.seek(7)
+        encoder = MultipartEncoder(
+            [("a", ("a.bin", fp)), ("b", "c")], boundary=BOUNDARY, blocksize=256
+        )
+        expected, _ = encode_multipart_formdata(
+            [("a", ("a.bin", data)), ("b", "c")], boundary=BOUNDARY
+        )
+
+        blocks = list(encoder)
+        assert b"".join(blocks) == expected
+        assert max(len(block) for block in blocks) == 256
+        assert encoder.content_length == len(expected)
+        assert encoder.tell() == len(expected)
+
+    def test_real_file(self):
+        with tempfile.TemporaryFile() as fp:
+            fp.write(b"file data")
+            fp.seek(0)
+            encoder = MultipartEncoder({"f": ("f.txt", fp)}, boundary=BOUNDARY)
+            expected, _ = encode_multipart_formdata(
+                {"f": ("f.txt", b"file data")}, boundary=BOUNDARY
+            )
+            assert encoder.content_length == len(expected)
+            assert encoder.read() == expected
+
+    def test_seek(self):
+        encoder = MultipartEncoder(
+            [("a", ("a.bin", io.BytesIO(b"x" * 100)))], boundary=BOUNDARY, blocksize=8
+        )
+        expected = encoder.read()
+
+        assert encoder.seek(0) == 0
+        assert encoder.read(10) + encoder.read(100) == expected[:110]
+        assert encoder.tell() == 110
+        encoder.seek(50)
+        assert encoder.read() == expected[50:]
+        with pytest.raises(io.UnsupportedOperation):
+            encoder.seek(0, 2)
+
+    def test_unsized(self):
+        encoder = MultipartEncoder([("a", Unsized(b"data"))], boundary=BOUNDARY)
+        assert encoder.content_length is None
+        assert "Content-Length" not in encoder.headers
+
+        expected, _ = encode_multipart_formdata([("a", b"data")], boundary=BOUNDARY)
+        assert encoder.read() == expected
+        with pytest.raises(io.UnsupportedOperation):
+            encoder.seek(0)
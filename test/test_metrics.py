@@ -0,0 +1,115 @@
+import pytest
+
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+from urllib3.response import HTTPResponse
+from urllib3.util.metrics import HistogramSnapshot, Metrics
+from urllib3.util.retry import Retry
+from urllib3.util.timing import RequestTimings
+
+
+class TestMetrics(object):
+    def setup_method(self, method):
+        self.metrics = Metrics(buckets=(0.1, 1, 10))
+        self.pool = HTTPConnectionPool("localhost", 8080)
+        self.key = ("http", "localhost", 8080)
+
+    def test_counters(self):
+        other = HTTPSConnectionPool("example.com")
+        self.metrics.inc(self.pool, "connections_created")
+        self.metrics.inc(self.pool, "connections_created")
+        self.metrics.inc(self.pool, "bytes_sent", 100)
+        self.metrics.inc(other, "connections_reused")
+        self.metrics.inc(self.pool, "retries", label="read")
+        self.metrics.inc(self.pool, "retries", label="read")
+        self.metrics.inc(self.pool, "retries", label="status")
+
+        assert self.metrics.snapshot() == {
+            self.key: {
+                "connections_created": 2,
+                "bytes_sent": 100,
+                "retries": {"read": 2, "status": 1},
+            },
+            ("https", "example.com", None): {"connections_reused": 1},
+        }
+
+    def test_histograms(self):
+        for value in [0.05, 0.1, 0.5, 20]:
+            self.metrics.observe(self.pool, "ttfb_seconds", value)
+
+        histogram = self.metrics.snapshot()[self.key]["ttfb_seconds"]
+        assert histogram == HistogramSnapshot((0.1, 1, 10), (2, 3, 3), 4, 20.65)
+
+    def test_reset(self):
+        self.metrics.inc(self.pool, "connections_created")
+        self.metrics.observe(self.pool, "ttfb_seconds", 1)
+        self.metrics.reset()
+        assert self.metrics.snapshot() == {}
+        assert self.metrics.to_prometheus() == ""
+
+    def test_to_prometheus(self):
+        self.metrics.inc(self.pool, "connections_created", 3)
+        self.metrics.inc(self.pool, "redirects", label=301)
+        self.metrics.observe(self.pool, "pool_wait_seconds", 0.5)
+        self.metrics.observe(self.pool, "pool_wait_seconds", 0.25)
+
+        labels = 'scheme="http",host="localhost",port="8080"'
+        assert self.metrics.to_prometheus().splitlines() == [
+            "# HELP urllib3_connections_created_total New connections made.",
+            "# TYPE urllib3_connections_created_total counter",
+            "urllib3_connections_created_total{%s} 3" % labels,
+            "# HELP urllib3_redirects_total Redirects followed, by status.",
+            "# TYPE urllib3_redirects_total counter",
+            'urllib3_redirects_total{%s,status="301"} 1' % labels,
+            "# HELP urllib3_pool_wait_seconds "
+            "Time spent waiting for a connection from the pool.",
+            "# TYPE urllib3_pool_wait_seconds histogram",
+            'urllib3_pool_wait_seconds_bucket{%s,le="0.1"} 0' % labels,
+            'urllib3_pool_wait_seconds_bucket{%s,le="1"} 2' % labels,
+            'urllib3_pool_wait_seconds_bucket{%s,le="10"} 2' % labels,
+            'urllib3_pool_wait_seconds_bucket{%s,le="+Inf"} 2' % labels,
+            "urllib3_pool_wait_seconds_sum{%s} 0.75" % labels,
+            "urllib3_pool_wait_seconds_count{%s} 2" % labels,
+        ]
+
+    def test_to_prometheus_escapes_labels(self):
+        pool = HTTPConnectionPool("localhost", 8080)
+        pool.host = 'evil"\\host'
+        self.metrics.inc(pool, "connections_created")
+        assert 'host="evil\\"\\\\host"' in self.metrics.to_prometheus(prefix="client")
+
+    def test_record_timings(self):
+        timings = RequestTimings(pool_wait=0.01, dns=0.02, connect=0.5, ttfb=2)
+        self.metrics.record_timings(self.pool, timings)
+
+        metrics = self.metrics.snapshot()[self.key]
+        assert metrics["dns_seconds"].sum == 0.02
+        assert metrics["connect_seconds"].count == 1
+        assert metrics["ttfb_seconds"].counts == (0, 0, 1)
+        assert "tls_seconds" not in metrics
+        # The pool records how long it waited for a connection itself.
+        assert "pool_wait_seconds" not in metrics
+
+    def test_retries_by_cause(self):
+        self.pool.metrics = self.metrics
+        retry = Retry(total=10)
+        retry = retry.increment(
+            "GET", "/", error=ReadTimeoutError(None, "/", "timed out"), _pool=self.pool
+        )
+        retry = retry.increment(
+            "GET", "/", response=HTTPResponse(status=503), _pool=self.pool
+        )
+        retry = retry.increment(
+            "GET",
+            "/",
+            response=HTTPResponse(status=302, headers={"location": "/a"}),
+            _pool=self.pool,
+        )
+        with pytest.raises(MaxRetryError):
+            Retry(total=0).increment(
+                "GET", "/", response=HTTPResponse(status=503), _pool=self.pool
+            )
+
+        metrics = self.metrics.snapshot()[self.key]
+        assert metrics["retries"] == {"read": 1, "status": 1}
+        assert metrics["redirects"] == {302: 1}
@@ -1,5 +1,7 @@
+import pickle
 import socket
 
+import mock
 import pytest
 
 from urllib3.poolmanager import PoolKey, key_fn_by_scheme, PoolManager
@@ -267,6 +269,86 @@ class TestPoolManager(object):
         assert pool is other_pool
         assert all(isinstance(key, PoolKey) for key in p.pools.keys())
 
+    def test_pool_key_cached(self):
+        """Assert pool keys are only computed again when their inputs change."""
+        p = PoolManager(10)
+        calls = []
+
+        def key_fn(request_context):
+            calls.append(request_context["host"])
+            return key_fn_by_scheme["http"](request_context)
+
+        p.key_fn_by_scheme["http"] = key_fn
+        pool = p.connection_from_url("http://example.com/")
+        assert p.connection_from_url("http://example.com/a") is pool
+        assert p.connection_from_host("example.com", 80) is pool
+        assert p.connection_from_url("http://other.example.com/") is not pool
+        assert calls == ["example.com", "example.com", "other.example.com"]
+
+        # Changing the manager's pool kwargs changes the key.
+        p.connection_pool_kw["maxsize"] = 5
+        new_pool = p.connection_from_url("http://example.com/")
+        assert new_pool is not pool
+        assert new_pool.pool.maxsize == 5
+
+        # So does changing a pool_kwargs dict which has been used before.
+        pool_kwargs = {"block": False}
+        pool = p.connection_from_url("http://example.com/", pool_kwargs=pool_kwargs)
+        pool_kwargs["block"] = True
+        new_pool = p.connection_from_url("http://example.com/", pool_kwargs=pool_kwargs)
+        assert new_pool is not pool
+        assert new_pool.block
+
+        # And replacing the key function.
+        p.key_fn_by_scheme["http"] = key_fn_by_scheme["http"]
+        del calls[:]
+        p.connection_from_url("http://example.com/")
+        assert calls == []
+        assert len(p.pools) == 5
+
+    def test_connection_from_context_override(self):
+        contexts = []
+
+        class ContextPoolManager(PoolManager):
+            def connection_from_context(self, request_context):
+                contexts.append(request_context["host"])
+                return super(ContextPoolManager, self).connection_from_context(
+                    request_context
+                )
+
+        p = ContextPoolManager(10)
+        pool = p.connection_from_host("example.com", 80)
+        assert p.connection_from_host("example.com", 80) is pool
+        assert contexts == ["example.com", "example.com"]
+
+    def test_coalescer_default_timeout(self):
+        coalescer = mock.Mock()
+        p = PoolManager(timeout=3, coalescer=coalescer)
+        p.urlopen("GET", "http://example.com/")
+        assert coalescer.urlopen.call_args[1]["default_timeout"] == 3
+
+        p = PoolManager(coalescer=coalescer)
+        p.urlopen("GET", "http://example.com/")
+        default = coalescer.urlopen.call_args[1]["default_timeout"]
+        assert default is timeout.Timeout.DEFAULT_TIMEOUT
+
+    def test_pool_key_cache_size(self):
+        p = PoolManager(10)
+        p.pool_key_cache_size = 3
+        for i in range(10):
+            p.connection_from_host("example.com", 8000 + i)
+        assert len(p._pool_key_cache) <= 3
+
+    def test_pool_key_hash_pickle(self):
+        p = PoolManager()
+        p.connection_from_url("http://example.com/")
+        key = list(p.pools.keys())[0]
+
+        copy = pickle.loads(pickle.dumps(key))
+        assert copy == key
+        assert hash(copy) == hash(key)
+        assert isinstance(copy, PoolKey)
+
     def test_custom_pool_key(self):
         """Assert it is possible to define a custom key function."""
         p = PoolManager(10)
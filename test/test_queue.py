@@ -0,0 +1,161 @@
+import threading
+import time
+
+import mock
+import pytest
+
+from urllib3.packages.six.moves.queue import Empty, Full
+from urllib3.util.queue import LifoQueue
+
+
+class Waiter(threading.Thread):
+    def __init__(self, q, **kwargs):
+        super(Waiter, self).__init__()
+        self.q = q
+        self.kwargs = kwargs
+        self.item = None
+
+    def run(self):
+        self.item = self.q.get(**self.kwargs)
+
+
+def start_waiters(q, *kwargs_list):
+    waiters = []
+    for kwargs in kwargs_list:
+        kwargs.setdefault("timeout", 5)
+        waiter = Waiter(q, **kwargs)
+        waiter.start()
+        waiters.append(waiter)
+        # Wait for each one to queue up, so that they're in a known order.
+        while q.num_waiting < len(waiters):
+            time.sleep(0.001)
+    return waiters
+
+
+def hand_out(q, waiters):
+    for item in range(len(waiters)):
+        q.put(item)
+    for waiter in waiters:
+        waiter.join(5)
+    return [waiter.item for waiter in waiters]
+
+
+class TestLifoQueue(object):
+    def test_lifo(self):
+        q = LifoQueue(3)
+        for item in range(3):
+            q.put(item)
+        assert [q.get(), q.get(), q.get()] == [2, 1, 0]
+        with pytest.raises(Empty):
+            q.get(block=False)
+
+    def test_waiters_served_in_order(self):
+        q = LifoQueue(1)
+        waiters = start_waiters(q, {}, {}, {})
+        assert hand_out(q, waiters) == [0, 1, 2]
+
+    def test_waiters_served_by_priority(self):
+        q = LifoQueue(1)
+        waiters = start_waiters(
+            q, {"priority": 0}, {"priority": 5}, {"priority": 1}, {"priority": 5}
+        )
+        assert hand_out(q, waiters) == [3, 0, 2, 1]
+        assert q.num_waits == 4
+        assert q.max_waiting == 4
+        assert q.num_waiting == 0
+
+    def test_waiters_served_by_deadline(self):
+        q = LifoQueue(1)
+        now = time.time()
+        with mock.patch("urllib3.util.queue.current_time", time.time):
+            waiters = start_waiters(
+                q,
+                {"timeout": None},
+                {"timeout": None, "deadline": now + 20},
+                {"timeout": None, "deadline": now + 10},
+            )
+            assert hand_out(q, waiters) == [2, 1, 0]
+
+            # Waiting with a timeout sets a deadline too.
+            waiters = start_waiters(
+                q, {"timeout": None, "deadline": now + 20}, {"timeout": 10}
+            )
+            assert hand_out(q, waiters) == [1, 0]
+
+    def test_low_priority_not_starved(self):
+        q = LifoQueue(1)
+        now = [100.0]
+        with mock.patch("urllib3.util.queue.current_time", lambda: now[0]):
+            waiters = start_waiters(q, {"priority": 0})
+            now[0] += 3 * q.PRIORITY_AGING
+            waiters += start_waiters(q, {"priority": 2})
+            assert hand_out(q, waiters) == [0, 1]
+
+    def test_timeout(self):
+        q = LifoQueue(1)
+        with pytest.raises(Empty):
+            q.get(timeout=0.01)
+        assert q.num_waiting == 0
+
+        q.put(1)
+        assert q.get(timeout=0.01) == 1
+
+    def test_full(self):
+        q = LifoQueue(2)
+        q.put(1)
+        q.put(2, block=False)
+        with pytest.raises(Full):
+            q.put(3, block=False)
+        with pytest.raises(Full):
+            q.put(3, timeout=0.01)
+
+        assert q.get(block=False) == 2
+        q.put(3, block=False)
+        assert q.qsize() == 2
+
+    def test_put_waits_for_room(self):
+        q = LifoQueue(1)
+        q.put(1)
+        putter = threading.Thread(target=q.put, args=(2,))
+        putter.start()
+        while not q._putters:
+            time.sleep(0.001)
+
+        assert q.get() == 1
+        putter.join(5)
+        assert q.get(block=False) == 2
+
+    def test_unbounded(self):
+        q = LifoQueue()
+        for item in range(100):
+            q.put(item, block=False)
+        assert q.qsize() == 100
+        assert q.get(block=False) == 99
+
+    def test_nonblocking_threads(self):
+        q = LifoQueue(4)
+        for _ in range(4):
+            q.put(None)
+        errors = []
+
+        def check_out():
+            for _ in range(1000):
+                try:
+                    item = q.get(block=False)
+                except Empty:
+                    item = object()
+                try:
+                    q.put(item, block=False)
+                except Full:
+                    pass
+                if q.qsize() > q.maxsize:
+                    errors.append(q.qsize())
+
+        threads = [threading.Thread(target=check_out) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        assert errors == []
+        assert q.qsize() == 4
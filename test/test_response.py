@@ -9,6 +9,7 @@ import mock
 from urllib3.response import HTTPResponse, brotli
 from urllib3.exceptions import (
     DecodeError,
+    MaxRetryError,
     ResponseNotChunked,
     ProtocolError,
     InvalidHeader,
@@ -815,6 +816,242 @@ class TestResponse(object):
 
         assert b"foo\nbar" == data
 
+    def test_stream_to_file(self, tmpdir):
+        path = str(tmpdir.join("body"))
+        fp = BytesIO(b"x" * 1000)
+        resp = HTTPResponse(
+            fp, headers={"content-length": "1000"}, preload_content=False
+        )
+
+        result = resp.stream_to_file(path, amt=64)
+        assert result.bytes_written == 1000
+        assert result.rate >= 0
+        assert resp.tell() == 1000
+        assert resp.length_remaining == 0
+        with open(path, "rb") as f:
+            assert f.read() == b"x" * 1000
+
+    @pytest.mark.parametrize("use_mmap", [False, True])
+    def test_stream_to_file_short_body(self, tmpdir, use_mmap):
+        path = str(tmpdir.join("body"))
+        resp = HTTPResponse(
+            BytesIO(b"x" * 10),
+            headers={"content-length": "100"},
+            preload_content=False,
+            enforce_content_length=True,
+        )
+
+        with pytest.raises(ProtocolError):
+            resp.stream_to_file(path, use_mmap=use_mmap)
+        # The space set aside for the rest of the body is given back.
+        with open(path, "rb") as f:
+            assert f.read() == b"x" * 10
+
+    def test_stream_to_file_mmap_at_offset(self, tmpdir):
+        path = str(tmpdir.join("body"))
+        resp = HTTPResponse(
+            BytesIO(b"body" * 1000),
+            headers={"content-length": "4000"},
+            preload_content=False,
+        )
+
+        with open(path, "w+b") as f:
+            f.write(b"header")
+            result = resp.stream_to_file(f, amt=100, use_mmap=True)
+            assert f.tell() == 4006
+            f.write(b"trailer")
+
+        assert result.bytes_written == 4000
+        with open(path, "rb") as f:
+            assert f.read() == b"header" + b"body" * 1000 + b"trailer"
+
+    def test_stream_to_file_mmap_write_only(self, tmpdir):
+        path = str(tmpdir.join("body"))
+        resp = HTTPResponse(
+            BytesIO(b"body" * 1000),
+            headers={"content-length": "4000"},
+            preload_content=False,
+        )
+
+        # Mapping needs a readable file, so this is written without a map.
+        with open(path, "wb") as f:
+            result = resp.stream_to_file(f, use_mmap=True)
+
+        assert result.bytes_written == 4000
+        with open(path, "rb") as f:
+            assert f.read() == b"body" * 1000
+
+    def test_stream_to_file_decodes(self, tmpdir):
+        path = str(tmpdir.join("body"))
+        data = zlib.compress(b"foo" * 100)
+        resp = HTTPResponse(
+            BytesIO(data),
+            headers={"content-encoding": "deflate", "content-length": str(len(data))},
+            preload_content=False,
+        )
+
+        assert resp.stream_to_file(path).bytes_written == 300
+        with open(path, "rb") as f:
+            assert f.read() == b"foo" * 100
+
+    def test_stream_to_file_preloaded(self, tmpdir):
+        path = str(tmpdir.join("body"))
+        resp = HTTPResponse(BytesIO(b"foo"), preload_content=True)
+
+        assert resp.stream_to_file(path).bytes_written == 3
+        with open(path, "rb") as f:
+            assert f.read() == b"foo"
+
+
+class BrokenBody(BytesIO):
+    """ A body which breaks off with a socket error after ``limit`` bytes. """
+
+    def __init__(self, data, limit):
+        BytesIO.__init__(self, data)
+        self.limit = limit
+
+    def read(self, amt=None):
+        if amt is None or self.tell() >= self.limit:
+            # Reading the whole body loses what arrived before the error.
+            raise socket.error("Connection reset")
+        return BytesIO.read(self, min(amt, self.limit - self.tell()))
+
+
+class TestResumableResponse(object):
+    data = bytes(bytearray(range(256))) * 4
+    headers = {
+        "content-length": "1024",
+        "accept-ranges": "bytes",
+        "etag": '"v1"',
+    }
+
+    def make_response(self, body, retries=None, headers=None, **kw):
+        self.pool = mock.Mock()
+        return HTTPResponse(
+            body,
+            headers=headers or self.headers,
+            status=200,
+            preload_content=False,
+            pool=self.pool,
+            retries=retries or Retry(read=1),
+            request_method="GET",
+            resumable=True,
+            resume_request=("GET", "/file", {"accept": "*/*"}, 5),
+            **kw
+        )
+
+    def rest(self, offset, status=206, etag='"v1"'):
+        headers = {"etag": etag}
+        if status == 206:
+            headers["content-range"] = "bytes %d-1023/1024" % offset
+        return HTTPResponse(
+            BytesIO(self.data[offset:]),
+            headers=headers,
+            status=status,
+            preload_content=False,
+        )
+
+    @pytest.mark.parametrize(["amt", "offset"], [(None, 0), (100, 300)])
+    def test_resume(self, amt, offset):
+        resp = self.make_response(BrokenBody(self.data, 300))
+        self.pool.urlopen.return_value = rest = self.rest(offset)
+
+        if amt is None:
+            assert resp.read() == self.data
+        else:
+            assert b"".join(resp.stream(amt)) == self.data
+        assert resp.tell() == 1024
+        assert rest._fp is None
+
+        _, kwargs = self.pool.urlopen.call_args
+        assert self.pool.urlopen.call_args[0] == ("GET", "/file")
+        assert kwargs["headers"] == {
+            "accept": "*/*",
+            "Range": "bytes=%d-" % offset,
+            "If-Range": '"v1"',
+        }
+        assert kwargs["timeout"] == 5
+        assert kwargs["retries"].read == 0
+        (history,) = kwargs["retries"].history
+        assert isinstance(history.error, ProtocolError)
+
+    def test_resume_early_end(self):
+        # The body ends before its Content-Length, without an error.
+        resp = self.make_response(BytesIO(self.data[:300]))
+        self.pool.urlopen.return_value = self.rest(300)
+
+        assert b"".join(resp.stream(100)) == self.data
+
+    def test_resume_stream_to_file(self, tmpdir):
+        path = str(tmpdir.join("body"))
+        resp = self.make_response(BrokenBody(self.data, 300))
+        self.pool.urlopen.return_value = self.rest(300)
+
+        assert resp.stream_to_file(path, amt=64).bytes_written == 1024
+        with open(path, "rb") as f:
+            assert f.read() == self.data
+
+    def test_out_of_read_retries(self):
+        resp = self.make_response(BrokenBody(self.data, 300), retries=Retry(read=0))
+
+        with pytest.raises(MaxRetryError):
+            resp.read()
+        assert not self.pool.urlopen.called
+
+    @pytest.mark.parametrize(
+        "headers",
+        [
+            # No byte ranges.
+            {"content-length": "1024", "etag": '"v1"'},
+            # Only a weak validator.
+            {"content-length": "1024", "accept-ranges": "bytes", "etag": 'W/"v1"'},
+        ],
+    )
+    def test_not_resumable(self, headers):
+        resp = self.make_response(BrokenBody(self.data, 300), headers=headers)
+
+        with pytest.raises(ProtocolError):
+            resp.read()
+        assert not self.pool.urlopen.called
+
+    def test_not_resumed_when_changed(self):
+        resp = self.make_response(BrokenBody(self.data, 300))
+        # The If-Range didn't match, so the whole new resource was sent.
+        self.pool.urlopen.return_value = rest = self.rest(0, status=200, etag='"v2"')
+
+        with pytest.raises(ProtocolError):
+            b"".join(resp.stream(100))
+        assert rest.closed
+
+    def test_last_modified_validator(self):
+        headers = {
+            "content-length": "1024",
+            "accept-ranges": "bytes",
+            "last-modified": "Tue, 15 Nov 1994 12:45:26 GMT",
+            "date": "Tue, 15 Nov 1994 12:45:27 GMT",
+        }
+        resp = self.make_response(BrokenBody(self.data, 300), headers=headers)
+        self.pool.urlopen.return_value = HTTPResponse(
+            BytesIO(self.data[300:]),
+            headers={
+                "content-range": "bytes 300-1023/1024",
+                "last-modified": "Tue, 15 Nov 1994 12:45:26 GMT",
+                "date": "Tue, 15 Nov 1994 12:45:30 GMT",
+            },
+            status=206,
+            preload_content=False,
+        )
+
+        assert b"".join(resp.stream(100)) == self.data
+        _, kwargs = self.pool.urlopen.call_args
+        assert kwargs["headers"]["If-Range"] == "Tue, 15 Nov 1994 12:45:26 GMT"
+
+        # Modified within a second of the response, so it's a weak validator.
+        headers["date"] = "Tue, 15 Nov 1994 12:45:26 GMT"
+        resp = self.make_response(BrokenBody(self.data, 300), headers=headers)
+        with pytest.raises(ProtocolError):
+            resp.read()
+
 
 class MockChunkedEncodingResponse(object):
     def __init__(self, content):
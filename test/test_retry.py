@@ -6,13 +6,15 @@ import time
 from urllib3.response import HTTPResponse
 from urllib3.packages import six
 from urllib3.packages.six.moves import xrange
-from urllib3.util.retry import Retry, RequestHistory
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.util.retry import Retry, RequestHistory, RetryBudget, qt_sleep
 from urllib3.exceptions import (
     ConnectTimeoutError,
     InvalidHeader,
     MaxRetryError,
     ReadTimeoutError,
     ResponseError,
+    RetryBudgetExhaustedError,
 )
 
 
@@ -142,6 +144,80 @@ class TestRetry(object):
 
         assert retry.get_backoff_time() == max_backoff
 
+    def test_backoff_full_jitter(self):
+        retry = Retry(total=100, backoff_factor=0.2, backoff_jitter="full")
+        retry = retry.increment(method="GET")
+        assert retry.get_backoff_time() == 0
+
+        with mock.patch("random.uniform", return_value=0.3) as uniform:
+            retry = retry.increment(method="GET")
+            assert retry.get_backoff_time() == 0.3
+            assert retry.get_backoff_time() == 0.3
+            uniform.assert_called_once_with(0, 0.4)
+
+            for _ in xrange(10):
+                retry = retry.increment(method="GET")
+            assert retry.get_backoff_time() == 0.3
+            uniform.assert_called_with(0, Retry.BACKOFF_MAX)
+
+    def test_backoff_decorrelated_jitter(self):
+        retry = Retry(total=100, backoff_factor=0.2, backoff_jitter="decorrelated")
+        retry = retry.increment(method="GET")
+        assert retry.get_backoff_time() == 0
+
+        with mock.patch("random.uniform", side_effect=lambda a, b: b) as uniform:
+            retry = retry.increment(method="GET")
+            assert retry.get_backoff_time() == pytest.approx(0.6)
+            uniform.assert_called_once_with(0.2, pytest.approx(0.6))
+
+            retry = retry.increment(method="GET")
+            assert retry.get_backoff_time() == pytest.approx(1.8)
+
+            for _ in xrange(10):
+                retry = retry.increment(method="GET")
+                retry.get_backoff_time()
+            assert retry.get_backoff_time() == Retry.BACKOFF_MAX
+
+        with mock.patch("random.uniform", side_effect=lambda a, b: a):
+            assert retry.increment(method="GET").get_backoff_time() == 0.2
+
+    def test_backoff_jitter_invalid(self):
+        with pytest.raises(ValueError):
+            Retry(backoff_jitter="partial")
+
+    def test_sleeper(self):
+        sleeper = mock.Mock()
+        retry = Retry(total=100, backoff_factor=0.2, sleeper=sleeper)
+        retry = retry.increment(method="GET").increment(method="GET")
+        assert retry.sleeper is sleeper
+
+        with mock.patch("time.sleep") as sleep_mock:
+            retry.sleep()
+            response = HTTPResponse(status=503, headers={"Retry-After": "3"})
+            retry.sleep(response)
+        sleep_mock.assert_not_called()
+        assert sleeper.call_args_list == [mock.call(0.4), mock.call(3)]
+
+    def test_qt_sleep(self):
+        # Never create a QCoreApplication here: destroying it when the test
+        # returns deletes QObjects that later tests still rely on.
+        with mock.patch("urllib3.util.retry.QtCore") as qtcore:
+            qtcore.QCoreApplication.instance.return_value = None
+            with mock.patch("time.sleep") as sleep_mock:
+                qt_sleep(0.2)
+        sleep_mock.assert_called_once_with(0.2)
+        qtcore.QEventLoop.assert_not_called()
+
+    def test_qt_sleep_runs_event_loop(self):
+        with mock.patch("urllib3.util.retry.QtCore") as qtcore:
+            qtcore.QCoreApplication.instance.return_value = mock.Mock()
+            with mock.patch("time.sleep") as sleep_mock:
+                qt_sleep(0.05)
+        sleep_mock.assert_not_called()
+        loop = qtcore.QEventLoop.return_value
+        qtcore.QTimer.singleShot.assert_called_once_with(50, loop.quit)
+        loop.exec_.assert_called_once_with()
+
     def test_zero_backoff(self):
         retry = Retry()
         assert retry.get_backoff_time() == 0
@@ -261,6 +337,58 @@ class TestRetry(object):
         )
         assert retry.history == history
 
+    def test_history_shared_between_attempts(self):
+        retry = Retry(total=None, backoff_factor=0.5)
+        retries = [retry]
+        for i in range(100):
+            retries.append(retries[-1].increment("GET", "/%d" % i))
+
+        assert [h.url for h in retries[-1].history] == ["/%d" % i for i in range(100)]
+        assert retries[50].history == retries[-1].history[:50]
+        assert all(r._config is retry._config for r in retries)
+
+    def test_new_keeps_config(self):
+        retry = Retry(
+            total=3, backoff_factor=0.5, remove_headers_on_redirect=["X-Secret"]
+        )
+        new_retry = retry.new(total=2)
+        assert new_retry.total == 2
+        assert new_retry.backoff_factor == 0.5
+        assert new_retry.remove_headers_on_redirect == frozenset(["x-secret"])
+
+        new_retry = retry.new(backoff_factor=2)
+        assert new_retry.total == 3
+        assert new_retry.backoff_factor == 2
+        assert retry.backoff_factor == 0.5
+
+    def test_config_assignment(self):
+        retry = Retry(total=3)
+        new_retry = retry.increment("GET", "/")
+        retry.backoff_factor = 3
+        assert retry.backoff_factor == 3
+        assert new_retry.backoff_factor == 0
+        assert retry.increment("GET", "/").backoff_factor == 3
+
+    @pytest.mark.skipif(six.PY2, reason="Exceptions don't hold tracebacks")
+    def test_retried_error_traceback_released(self):
+        def make_error():
+            try:
+                raise ReadTimeoutError(None, "/", "read timed out")
+            except ReadTimeoutError as e:
+                return e
+
+        error = make_error()
+        assert error.__traceback__ is not None
+        Retry(read=1).increment("GET", "/", error=error)
+        assert error.__traceback__ is None
+
+        # Errors which exhaust the retries are raised with their tracebacks.
+        error = make_error()
+        with pytest.raises(MaxRetryError) as e:
+            Retry(read=0).increment("GET", "/", error=error)
+        assert e.value.reason is error
+        assert error.__traceback__ is not None
+
     def test_retry_method_not_in_whitelist(self):
         error = ReadTimeoutError(None, "/", "read timed out")
         retry = Retry()
@@ -341,3 +469,73 @@ class TestRetry(object):
                 sleep_mock.assert_called_with(sleep_duration)
             else:
                 sleep_mock.assert_not_called()
+
+
+class TestRetryBudget(object):
+    def test_min_retries(self):
+        budget = RetryBudget(ratio=0, min_retries_per_second=1, ttl=2)
+        assert budget.balance == 2
+        assert budget.withdraw()
+        assert budget.withdraw()
+        assert not budget.withdraw()
+        assert budget.balance == 0
+        assert (budget.requests, budget.retries, budget.exhausted) == (0, 2, 1)
+
+    def test_ratio(self):
+        budget = RetryBudget(ratio=0.5, min_retries_per_second=0)
+        assert not budget.withdraw()
+        budget.deposit(3)
+        assert budget.balance == 1
+        assert budget.withdraw()
+        assert not budget.withdraw()
+        budget.deposit()
+        assert budget.withdraw()
+        assert (budget.requests, budget.retries, budget.exhausted) == (4, 2, 2)
+
+    def test_expiry(self):
+        now = [100.0]
+        with mock.patch("urllib3.util.retry.current_time", lambda: now[0]):
+            budget = RetryBudget(ratio=1, min_retries_per_second=0, ttl=10)
+            budget.deposit(2)
+            now[0] = 105.5
+            budget.deposit()
+            assert budget.withdraw()
+            assert budget.balance == 2
+
+            # The first requests expire, but the retry made since still counts.
+            now[0] = 110.0
+            assert budget.balance == 0
+            assert not budget.withdraw()
+
+            now[0] = 116.0
+            assert budget.balance == 0
+            budget.deposit()
+            assert budget.balance == 1
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"ratio": -1}, {"min_retries_per_second": -1}, {"ttl": 0}],
+    )
+    def test_invalid(self, kwargs):
+        with pytest.raises(ValueError):
+            RetryBudget(**kwargs)
+
+    def test_increment(self):
+        budget = RetryBudget(ratio=0, min_retries_per_second=0.1, ttl=10)
+        pool = HTTPConnectionPool("localhost", retry_budget=budget)
+        retry = Retry(10).increment("GET", "/", error=ConnectTimeoutError(), _pool=pool)
+
+        with pytest.raises(RetryBudgetExhaustedError) as e:
+            retry.increment("GET", "/", error=ConnectTimeoutError(), _pool=pool)
+        assert isinstance(e.value, MaxRetryError)
+        assert isinstance(e.value.reason, ConnectTimeoutError)
+
+        response = HTTPResponse(status=503)
+        with pytest.raises(RetryBudgetExhaustedError) as e:
+            retry.increment("GET", "/", response=response, _pool=pool)
+        assert isinstance(e.value.reason, ResponseError)
+        assert budget.exhausted == 2
+
+        # Redirects don't use the budget.
+        response = HTTPResponse(status=302, headers={"location": "/"})
+        retry = retry.increment("GET", "/", response=response, _pool=pool)
+        assert retry.total == 8
@@ -0,0 +1,58 @@
+import pytest
+
+from urllib3.response import HTTPResponse
+from urllib3.util.retry import Retry
+from urllib3.util.timing import RequestTimings
+
+
+class TestRequestTimings(object):
+    def test_phases(self):
+        timings = RequestTimings(dns=0.25, connect=0.5)
+        assert timings.pool_wait is None
+        assert timings.setup == 0.75
+
+        timings.add("tls", 0.25)
+        timings.add("tls", 0.25)
+        timings.ttfb = 1
+        assert timings.setup == 1.25
+        assert timings.total == 2.25
+        assert repr(timings) == (
+            "RequestTimings(dns=0.250000, connect=0.500000, "
+            "tls=0.500000, ttfb=1.000000)"
+        )
+
+    def test_copy(self):
+        timings = RequestTimings(connect=0.5, download=1)
+        copy = timings.copy()
+        copy.add("download", 1)
+        assert copy.connect == 0.5
+        assert copy.download == 2
+        assert timings.download == 1
+
+    def test_unknown_phase(self):
+        with pytest.raises(TypeError):
+            RequestTimings(dns=1, wait=2)
+
+    def test_exceeded(self):
+        timings = RequestTimings(pool_wait=0.1, ttfb=2, download=3)
+        assert timings.exceeded({}) == []
+        assert timings.exceeded({"total": 5, "download": 1, "ttfb": 1, "dns": 0}) == [
+            "ttfb",
+            "download",
+            "total",
+        ]
+        assert timings.exceeded({"ttfb": 2, "total": 5.1}) == []
+
+    def test_history(self):
+        timings = RequestTimings(ttfb=1)
+        retry = Retry(total=3).increment(
+            "GET", "/", response=HTTPResponse(status=503, timings=timings)
+        )
+        retry = retry.increment("GET", "/", error=IOError(), _timings=timings)
+        retry = retry.increment("GET", "/", response=HTTPResponse(status=503))
+
+        first, second, third = retry.history
+        assert first.timings is timings
+        assert second.timings is timings
+        assert third.timings.ttfb is None
+        assert first == ("GET", "/", None, 503, None)
@@ -39,6 +39,19 @@ class TestChunkedTransfer(SocketDummyServerTestCase):
                 assert lines[i * 2] == hex(len(chunk))[2:].encode("utf-8")
                 assert lines[i * 2 + 1] == chunk.encode("utf-8")
 
+    def test_chunked_frame_size(self):
+        self.start_chunked_handler()
+        chunks = (b"x" * 10 for _ in range(100))
+        with HTTPConnectionPool(
+            self.host, self.port, retries=False, chunked_frame_size=256
+        ) as pool:
+            pool.urlopen("POST", "/", chunks, chunked=True)
+
+            body = self.buffer.split(b"\r\n\r\n", 1)[1]
+            assert body == (b"104\r\n" + b"x" * 260 + b"\r\n") * 3 + (
+                b"dc\r\n" + b"x" * 220 + b"\r\n0\r\n\r\n"
+            )
+
     def _test_body(self, data):
         self.start_chunked_handler()
         with HTTPConnectionPool(self.host, self.port, retries=False) as pool:
@@ -1,7 +1,9 @@
 import io
 import logging
+import os
 import socket
 import sys
+import tempfile
 import unittest
 import time
 import warnings
@@ -12,18 +14,22 @@ import mock
 from .. import TARPIT_HOST, VALID_SOURCE_ADDRESSES, INVALID_SOURCE_ADDRESSES
 from ..port_helpers import find_unused_port
 from urllib3 import encode_multipart_formdata, HTTPConnectionPool
+from urllib3.filepost import MultipartEncoder
 from urllib3.exceptions import (
     ConnectTimeoutError,
     EmptyPoolError,
     DecodeError,
     MaxRetryError,
+    ProtocolError,
     ReadTimeoutError,
     NewConnectionError,
+    RetryBudgetExhaustedError,
     UnrewindableBodyError,
 )
 from urllib3.packages.six import b, u
 from urllib3.packages.six.moves.urllib.parse import urlencode
-from urllib3.util.retry import Retry, RequestHistory
+from urllib3.util.metrics import Metrics
+from urllib3.util.retry import Retry, RequestHistory, RetryBudget
 from urllib3.util.timeout import Timeout
 
 from dummyserver.testcase import HTTPDummyServerTestCase, SocketDummyServerTestCase
@@ -274,6 +280,33 @@ class TestConnectionPool(HTTPDummyServerTestCase):
             r = pool.request("POST", "/upload", fields=fields)
             assert r.status == 200, r.data
 
+    def test_upload_multipart_encoder(self):
+        data = b"I'm in ur multipart form-data, hazing a cheezburgr" * 1000
+        uploaded_file = tempfile.TemporaryFile()
+        uploaded_file.write(data)
+        uploaded_file.seek(0)
+        encoder = MultipartEncoder(
+            {
+                "upload_param": "filefield",
+                "upload_filename": "lolcat.txt",
+                "upload_size": len(data),
+                "filefield": ("lolcat.txt", uploaded_file),
+            },
+            blocksize=4096,
+        )
+
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            r = pool.request("POST", "/upload", body=encoder)
+            assert r.status == 200, r.data
+
+            # Redirects rewind it.
+            encoder.seek(0)
+            r = pool.request(
+                "POST", "/redirect?target=/upload&status=307", body=encoder
+            )
+            assert r.status == 200, r.data
+        uploaded_file.close()
+
     def test_one_name_multiple_values(self):
         fields = [("foo", "a"), ("foo", "b")]
 
@@ -941,6 +974,139 @@ class TestRetry(HTTPDummyServerTestCase):
                 RequestHistory("GET", "/successful_retry", None, 418, None),
             )
 
+    def test_retry_history_elapsed(self):
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            headers = {"test-name": "test_retry_history_elapsed"}
+            retry = Retry(total=2, status_forcelist=[418])
+            resp = pool.request(
+                "GET", "/successful_retry", headers=headers, retries=retry
+            )
+            assert resp.status == 200
+            (history,) = resp.retries.history
+            assert history.status == 418
+            assert 0 <= history.elapsed < 5
+
+    def test_retry_budget(self):
+        budget = RetryBudget(ratio=0, min_retries_per_second=0)
+        with HTTPConnectionPool(self.host, self.port, retry_budget=budget) as pool:
+            headers = {"test-name": "test_retry_budget"}
+            retry = Retry(total=2, status_forcelist=[418])
+            with pytest.raises(RetryBudgetExhaustedError):
+                pool.request("GET", "/successful_retry", headers=headers, retries=retry)
+            assert (budget.requests, budget.retries, budget.exhausted) == (1, 0, 1)
+
+            budget.ratio = 1
+            headers = {"test-name": "test_retry_budget_ratio"}
+            resp = pool.request(
+                "GET", "/successful_retry", headers=headers, retries=retry
+            )
+            assert resp.status == 200
+
+            resp = pool.request("GET", "/redirect", fields={"target": "/"})
+            assert resp.status == 200
+            assert (budget.requests, budget.retries, budget.exhausted) == (3, 1, 1)
+
+    def test_metrics(self):
+        metrics = Metrics()
+        with HTTPConnectionPool(self.host, self.port, metrics=metrics) as pool:
+            resp = pool.request("POST", "/echo", body=b"hello")
+            assert resp.data == b"hello"
+            resp = pool.request("GET", "/redirect", fields={"target": "/"})
+            assert resp.status == 200
+
+        host = metrics.snapshot()[("http", pool.host, self.port)]
+        assert host["connections_created"] == 1
+        assert host["connections_reused"] == 2
+        assert host["bytes_sent"] > 5
+        assert host["bytes_received"] == len(b"hello") + len(b"Dummy server!")
+        assert host["redirects"] == {303: 1}
+        assert host["dns_seconds"].count == 1
+        assert host["connect_seconds"].count == 1
+        for name in ["pool_wait_seconds", "ttfb_seconds", "request_seconds"]:
+            assert host[name].count == 3
+        assert "urllib3_request_seconds_count" in metrics.to_prometheus()
+
+    def test_timings(self):
+        slow = []
+
+        def hook(pool, method, url, timings, exceeded):
+            slow.append((method, url, exceeded))
+
+        with HTTPConnectionPool(
+            self.host,
+            self.port,
+            slow_request_hook=hook,
+            slow_request_thresholds={"ttfb": 0, "tls": 0},
+        ) as pool:
+            resp = pool.request("GET", "/redirect", fields={"target": "/"})
+            assert resp.data == b"Dummy server!"
+
+        # The first attempt made a new connection, which the redirect reused.
+        first = resp.retries.history[0].timings
+        assert first.dns is not None and first.connect is not None
+        assert first.ttfb > 0 and first.tls is None
+
+        timings = resp.timings
+        assert timings is not first
+        assert timings.connect is None
+        assert timings.pool_wait >= 0 and timings.ttfb > 0
+        assert timings.download > 0
+        assert timings.total >= timings.ttfb + timings.download
+
+        assert slow == [
+            ("GET", "/redirect?target=%2F", ["ttfb"]),
+            ("GET", "/", ["ttfb"]),
+        ]
+
+    def test_timings_unknown_threshold(self):
+        with pytest.raises(ValueError):
+            HTTPConnectionPool(self.host, slow_request_thresholds={"dns": 1, "x": 2})
+
+    def test_stream_to_file(self):
+        body = os.urandom(300000)
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            with HTTPConnectionPool(self.host, self.port, maxsize=1) as pool:
+                for use_mmap in (False, True):
+                    resp = pool.request(
+                        "POST", "/echo", body=body, preload_content=False
+                    )
+                    result = resp.stream_to_file(path, use_mmap=use_mmap)
+                    assert result.bytes_written == len(body)
+                    assert resp.timings.download > 0
+                    # The whole body was read, so the connection went back.
+                    assert pool.pool.qsize() == 1
+
+                    with open(path, "rb") as f:
+                        assert f.read() == body
+        finally:
+            os.remove(path)
+
+    def test_resumable(self):
+        expected = bytes(bytearray(i % 251 for i in range(100000)))
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            for preload_content in (True, False):
+                # The first response stops halfway through.
+                url = "/range?length=100000&fail=resumable_%s" % preload_content
+                r = pool.request(
+                    "GET",
+                    url,
+                    preload_content=preload_content,
+                    resumable=True,
+                    retries=Retry(read=1),
+                )
+                data = r.data if preload_content else b"".join(r.stream(4096))
+                assert data == expected
+                (history,) = r.retries.history
+                assert isinstance(history.error, ProtocolError)
+
+            r = pool.request(
+                "GET", "/range?length=100000&fail=not_resumable", preload_content=False
+            )
+            with pytest.raises(ProtocolError):
+                r.read()
+
     def test_retry_redirect_history(self):
         with HTTPConnectionPool(self.host, self.port) as pool:
             resp = pool.request("GET", "/redirect", fields={"target": "/"})
@@ -1119,6 +1285,48 @@ class TestFileBodiesOnRetryOrRedirect(HTTPDummyServerTestCase):
             assert resp.status == 200
             assert resp.data == data
 
+    @pytest.mark.skipif(not hasattr(os, "sendfile"), reason="needs os.sendfile")
+    def test_redirect_put_real_file(self):
+        data = b"A" * 65535
+        uploaded_file = tempfile.TemporaryFile()
+        uploaded_file.write(b"skipped" + data)
+        uploaded_file.seek(len(b"skipped"))
+
+        sendfile = socket.socket.sendfile
+        with mock.patch.object(
+            socket.socket, "sendfile", autospec=True, side_effect=sendfile
+        ) as spy:
+            with HTTPConnectionPool(self.host, self.port, timeout=1) as pool:
+                resp = pool.urlopen(
+                    "PUT",
+                    "/redirect?target=/echo&status=307",
+                    body=uploaded_file,
+                    retries=Retry(total=3),
+                )
+        uploaded_file.close()
+
+        assert resp.status == 200
+        assert resp.data == data
+        assert spy.call_count == 2
+        assert len(resp.retries.history) == 1
+
+    @pytest.mark.skipif(not hasattr(os, "sendfile"), reason="needs os.sendfile")
+    def test_retries_put_real_file(self):
+        uploaded_file = tempfile.TemporaryFile()
+        uploaded_file.write(b"A" * 65535)
+        uploaded_file.seek(0)
+
+        with HTTPConnectionPool(self.host, self.port, timeout=1) as pool:
+            resp = pool.urlopen(
+                "PUT",
+                "/successful_retry",
+                headers={"test-name": "test_retries_put_real_file"},
+                retries=Retry(total=3, status_forcelist=[418]),
+                body=uploaded_file,
+            )
+        uploaded_file.close()
+        assert resp.status == 200
+
     def test_redirect_with_failed_tell(self):
         """Abort request if failed to get a position from tell()"""
 
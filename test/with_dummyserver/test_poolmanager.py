@@ -1,13 +1,28 @@
 import unittest
 import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
 
 import pytest
 
 from dummyserver.server import HAS_IPV6
 from dummyserver.testcase import HTTPDummyServerTestCase, IPv6HTTPDummyServerTestCase
-from urllib3.poolmanager import PoolManager
+from urllib3.cache import DiskCache, MemoryCache
+from urllib3.poolmanager import CachingPoolManager, PoolManager
 from urllib3.connectionpool import port_by_scheme
-from urllib3.exceptions import MaxRetryError
+from urllib3.exceptions import (
+    CircuitOpenError,
+    DownloadError,
+    MaxRetryError,
+    NewConnectionError,
+    ResourceChangedError,
+)
+from urllib3.util.circuit import CircuitBreaker
+from urllib3.util.coalesce import RequestCoalescer
 from urllib3.util.retry import Retry
 
 
@@ -107,6 +122,19 @@ class TestPoolManager(HTTPDummyServerTestCase):
 
             assert r._pool.host == self.host_alt
 
+    def test_long_redirect_chain(self):
+        with PoolManager() as http:
+            r = http.request(
+                "GET",
+                "%s/multi_redirect" % self.base_url,
+                fields={"redirect_codes": "302," * 50 + "200"},
+                retries=Retry(total=None, redirect=50),
+            )
+            assert r.status == 200
+            assert r.data == b"Done redirecting"
+            assert len(r.retries.history) == 50
+            assert all(h.elapsed is not None for h in r.retries.history)
+
     def test_too_many_redirects(self):
         with PoolManager() as http:
 
@@ -345,6 +373,347 @@ class TestPoolManager(HTTPDummyServerTestCase):
             r = http.request("GET", "http://%s:%s/" % (self.host, self.port))
             assert r.status == 200
 
+    def test_request_many(self):
+        requests = [
+            ("POST", "%s/echo" % self.base_url, {"body": str(i).encode("ascii")})
+            for i in range(6)
+        ]
+        requests.append(("POST", "%s/echo" % self.base_url_alt, {"body": b"hello"}))
+
+        with PoolManager(maxsize=2) as http:
+            batch = http.request_many(requests, max_concurrency=4, ordered=True)
+            results = list(batch)
+
+        assert [r.index for r in results] == list(range(7))
+        assert [r.response.data for r in results[:6]] == [
+            b"0",
+            b"1",
+            b"2",
+            b"3",
+            b"4",
+            b"5",
+        ]
+        assert results[6].response.data == b"hello"
+        assert all(r.error is None and r.elapsed >= 0 for r in results)
+
+        host = "http://%s:%d" % (self.host, self.port)
+        host_alt = "http://%s:%d" % (self.host_alt, self.port)
+        assert sorted(batch.summary) == sorted([host, host_alt])
+        assert batch.summary[host].requests == 6
+        assert batch.summary[host].errors == 0
+        assert batch.summary[host_alt].requests == 1
+        assert batch.summary[host].min_time <= batch.summary[host].mean_time
+
+    def test_request_many_unordered(self):
+        requests = [("GET", "%s/" % self.base_url)] * 5
+
+        with PoolManager() as http:
+            results = list(http.request_many(requests, max_concurrency=3))
+
+        assert sorted(r.index for r in results) == list(range(5))
+        assert all(r.response.data == b"Dummy server!" for r in results)
+
+    def test_request_many_errors(self):
+        # Nothing listens on a port which was just released.
+        sock = socket.socket()
+        sock.bind((self.host, 0))
+        closed_port = sock.getsockname()[1]
+        sock.close()
+
+        requests = [
+            ("GET", "http://%s:%d/" % (self.host, closed_port)),
+            ("GET", "%s/" % self.base_url),
+        ]
+
+        with PoolManager() as http:
+            batch = http.request_many(requests, ordered=True, retries=False)
+            failed, succeeded = list(batch)
+
+        assert failed.response is None
+        assert isinstance(failed.error, NewConnectionError)
+        assert succeeded.response.status == 200
+        assert batch.summary[failed.host].errors == 1
+        assert batch.summary[succeeded.host].errors == 0
+
+    def test_request_many_per_host_limited_by_maxsize(self):
+        with PoolManager(maxsize=2) as http:
+            assert http.request_many([], per_host=5).per_host == 2
+            assert http.request_many([], per_host=1).per_host == 1
+            assert http.request_many([]).per_host == 2
+
+            with pytest.raises(ValueError):
+                http.request_many([], max_concurrency=0)
+
+    def test_coalescer(self):
+        coalescer = RequestCoalescer()
+        url = "%s/sleep?seconds=0.2" % self.base_url
+        responses = []
+
+        def request():
+            responses.append(http.request("GET", url))
+
+        with PoolManager(coalescer=coalescer, maxsize=4) as http:
+            threads = [threading.Thread(target=request) for _ in range(4)]
+            threads[0].start()
+            while not coalescer._flights:
+                time.sleep(0.001)
+            for thread in threads[1:]:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert [r.status for r in responses] == [200] * 4
+            assert len(set(id(r) for r in responses)) == 4
+            assert http.connection_from_url(url).num_requests == 1
+
+    def test_circuit_breaker(self):
+        sock = socket.socket()
+        sock.bind((self.host, 0))
+        closed_port = sock.getsockname()[1]
+        sock.close()
+        down_url = "http://%s:%d/" % (self.host, closed_port)
+
+        breaker = CircuitBreaker(failure_threshold=2)
+        with PoolManager(circuit_breaker=breaker) as http:
+            # Both attempts fail, and the second opens the circuit.
+            with pytest.raises(MaxRetryError) as e:
+                http.request("GET", down_url, retries=Retry(connect=1))
+            assert isinstance(e.value.reason, NewConnectionError)
+            assert breaker.state("http", self.host, closed_port) == "open"
+
+            with pytest.raises(CircuitOpenError):
+                http.request("GET", down_url, retries=Retry(connect=1))
+
+            r = http.request("GET", "%s/" % self.base_url)
+            assert r.status == 200
+
+
+class TestDownload(HTTPDummyServerTestCase):
+    def setUp(self):
+        self.base_url = "http://%s:%d" % (self.host, self.port)
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, "download")
+        self.data = bytes(bytearray(i % 251 for i in range(100000)))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def read_file(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def test_download_segments(self):
+        url = "%s/range?length=100000" % self.base_url
+        with PoolManager(maxsize=4) as http:
+            result = http.download(url, self.path, min_segment_size=1000)
+            # One HEAD request, and one GET for each segment.
+            assert http.connection_from_url(url).num_requests == 5
+
+        assert result.bytes_written == 100000
+        assert self.read_file() == self.data
+
+    def test_download_retries_broken_segments(self):
+        url = "%s/range?length=100000&fail=download_retries" % self.base_url
+        with PoolManager(maxsize=4) as http:
+            result = http.download(url, self.path, min_segment_size=1000)
+            # Every segment broke off once, and was asked for again.
+            assert http.connection_from_url(url).num_requests == 9
+
+        assert result.bytes_written == 100000
+        assert self.read_file() == self.data
+
+    def test_download_segments_out_of_retries(self):
+        url = "%s/range?length=100000&fail=download_no_retries" % self.base_url
+        with PoolManager(maxsize=4) as http:
+            with pytest.raises(MaxRetryError):
+                http.download(
+                    url, self.path, min_segment_size=1000, retries=Retry(read=0)
+                )
+
+    def test_download_resource_changed(self):
+        url = "%s/range?length=100000&change=1" % self.base_url
+        with PoolManager(maxsize=4) as http:
+            with pytest.raises(ResourceChangedError):
+                http.download(url, self.path, min_segment_size=1000)
+
+            # The connections weren't left with unread bodies.
+            r = http.request("GET", "%s/" % self.base_url)
+            assert r.data == b"Dummy server!"
+
+    def test_download_single_request(self):
+        with PoolManager(maxsize=4) as http:
+            # Too small to split.
+            url = "%s/range?length=100000" % self.base_url
+            assert http.download(url, self.path).bytes_written == 100000
+            assert http.connection_from_url(url).num_requests == 2
+            assert self.read_file() == self.data
+
+            # Byte ranges aren't accepted.
+            url = "%s/nbytes?length=5000" % self.base_url
+            result = http.download(url, self.path, min_segment_size=1000)
+            assert result.bytes_written == 5000
+            assert self.read_file() == b"1" * 5000
+
+        # Segments can't be fetched at once over a pool of one connection.
+        with PoolManager() as http:
+            url = "%s/range?length=100000" % self.base_url
+            http.download(url, self.path, min_segment_size=1000)
+            assert http.connection_from_url(url).num_requests == 2
+            assert self.read_file() == self.data
+
+    def test_download_single_request_resumes(self):
+        url = "%s/range?length=100000&fail=download_single" % self.base_url
+        with PoolManager() as http:
+            assert http.download(url, self.path).bytes_written == 100000
+            # The HEAD, the GET which broke off, and the rest of it.
+            assert http.connection_from_url(url).num_requests == 3
+        assert self.read_file() == self.data
+
+    def test_download_error_status(self):
+        url = "%s/not_found" % self.base_url
+        with PoolManager() as http:
+            with pytest.raises(DownloadError) as e:
+                http.download(url, self.path)
+        assert e.value.response.status == 404
+
+        with pytest.raises(ValueError):
+            PoolManager().download(url, self.path, segments=0)
+
+
+class TestCachingPoolManager(HTTPDummyServerTestCase):
+    def setUp(self):
+        self.base_url = "http://%s:%d" % (self.host, self.port)
+
+    def num_requests(self, http):
+        return http.connection_from_url(self.base_url).num_requests
+
+    def test_fresh_response(self):
+        url = "%s/cache_control?value=max-age=60" % self.base_url
+        with CachingPoolManager() as http:
+            r = http.request("GET", url)
+            assert r.data == b"Cached!"
+            assert "Age" not in r.headers
+
+            r = http.request("GET", url)
+            assert r.status == 200
+            assert r.data == b"Cached!"
+            assert r.headers["Age"] == "0"
+            assert self.num_requests(http) == 1
+
+            r = http.request("GET", url, preload_content=False)
+            assert r.read() == b"Cached!"
+            assert self.num_requests(http) == 1
+
+            r = http.request("GET", url, headers={"Cache-Control": "no-cache"})
+            assert r.data == b"Cached!"
+            assert self.num_requests(http) == 2
+
+    def test_revalidation(self):
+        # Tornado adds an ETag, and answers If-None-Match with a 304.
+        url = "%s/" % self.base_url
+        with CachingPoolManager() as http:
+            assert http.request("GET", url).data == b"Dummy server!"
+            assert len(http.cache) == 1
+
+            r = http.request("GET", url)
+            assert r.status == 200
+            assert r.data == b"Dummy server!"
+            assert self.num_requests(http) == 2
+
+            # The connection was released after the 304.
+            pool = http.connection_from_url(url)
+            assert pool.pool.qsize() == pool.pool.maxsize
+
+    def test_not_stored(self):
+        url = "%s/cache_control?value=no-store" % self.base_url
+        with CachingPoolManager() as http:
+            assert http.request("GET", url).data == b"Cached!"
+            assert http.request("GET", url).data == b"Cached!"
+            assert len(http.cache) == 0
+            assert self.num_requests(http) == 2
+
+            # Too large.
+            http.cache = MemoryCache(max_size=100, max_entry_size=5)
+            url = "%s/cache_control?value=max-age=60" % self.base_url
+            r = http.request("GET", url, preload_content=False)
+            assert r.read() == b"Cached!"
+            assert len(http.cache) == 0
+
+    def test_kept_as_read(self):
+        url = "%s/range?length=100000" % self.base_url
+        data = bytes(bytearray(i % 251 for i in range(100000)))
+        with CachingPoolManager() as http:
+            r = http.request("GET", url, preload_content=False)
+            assert r.read(1000) == data[:1000]
+            assert len(http.cache) == 0
+            r.close()
+            r.release_conn()
+            assert len(http.cache) == 0
+
+            r = http.request("GET", url, preload_content=False)
+            assert b"".join(r.stream(4096)) == data
+            r.release_conn()
+            assert len(http.cache) == 1
+
+            r = http.request("GET", url, preload_content=False)
+            assert "Age" in r.headers
+            assert b"".join(r.stream(4096)) == data
+            assert self.num_requests(http) == 2
+
+    def test_disk_cache(self):
+        tempdir = tempfile.mkdtemp()
+        url = "%s/range?length=100000" % self.base_url
+        data = bytes(bytearray(i % 251 for i in range(100000)))
+        try:
+            with CachingPoolManager(cache=DiskCache(tempdir)) as http:
+                r = http.request("GET", url, preload_content=False)
+                assert r.read() == data
+                r.release_conn()
+
+            # Another process, or a restart, finds it.
+            with CachingPoolManager(cache=DiskCache(tempdir)) as http:
+                r = http.request("GET", url, preload_content=False)
+                assert r.headers["ETag"] == '"v1"'
+                path = os.path.join(tempdir, "download")
+                assert r.stream_to_file(path).bytes_written == 100000
+                with open(path, "rb") as f:
+                    assert f.read() == data
+                assert self.num_requests(http) == 0
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_bypass(self):
+        url = "%s/cache_control?value=max-age=60" % self.base_url
+        with CachingPoolManager() as http:
+            http.request("GET", url)
+            r = http.request("GET", url, headers={"Range": "bytes=0-1"})
+            assert "Age" not in r.headers
+            r = http.request("HEAD", url)
+            assert "Age" not in r.headers
+            assert self.num_requests(http) == 3
+            assert len(http.cache) == 1
+
+    def test_unsafe_method_invalidates(self):
+        url = "%s/cache_control?value=max-age=60" % self.base_url
+        with CachingPoolManager() as http:
+            http.request("GET", url)
+            http.request("POST", url)
+            assert len(http.cache) == 0
+            http.request("GET", url)
+            assert self.num_requests(http) == 3
+
+    def test_redirect_hops_are_cached(self):
+        with CachingPoolManager() as http:
+            r = http.request(
+                "GET",
+                "%s/redirect" % self.base_url,
+                fields={"target": "/cache_control?value=max-age=60"},
+            )
+            assert r.data == b"Cached!"
+            r = http.request("GET", "%s/cache_control?value=max-age=60" % self.base_url)
+            assert r.data == b"Cached!"
+            assert self.num_requests(http) == 2
+
 
 @pytest.mark.skipif(not HAS_IPV6, reason="IPv6 is not supported on this system")
 class TestIPv6PoolManager(IPv6HTTPDummyServerTestCase):
@@ -2,7 +2,7 @@
 # rather than the socket level-ness of it.
 
 from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
-from urllib3.poolmanager import proxy_from_url
+from urllib3.poolmanager import PoolManager, proxy_from_url
 from urllib3.exceptions import (
     MaxRetryError,
     ProxyError,
@@ -37,10 +37,11 @@ except ImportError:
 
 
 from collections import OrderedDict
-from threading import Event
+from threading import Event, Thread
 import select
 import socket
 import ssl
+import time
 import mock
 
 import pytest
@@ -1800,3 +1801,142 @@ class TestRetryPoolSizeDrainFail(SocketDummyServerTestCase):
 
             pool.urlopen("GET", "/not_found", preload_content=False)
             assert pool.num_connections == 1
+
+
+def pipelining_handler(connections):
+    """
+    Build a socket handler that reads all of the requests pipelined on each
+    connection before answering them in order. ``connections`` holds a
+    ``(requests, answered)`` pair for every connection the server accepts;
+    when fewer requests are answered than were sent the server hangs up
+    early.
+    """
+    received = []
+
+    def socket_handler(listener):
+        for num_requests, num_answered in connections:
+            sock = listener.accept()[0]
+
+            buf = b""
+            while buf.count(b"\r\n\r\n") < num_requests:
+                buf += sock.recv(65536)
+            requests = buf.split(b"\r\n\r\n")[:num_requests]
+            received.append(requests)
+
+            for i, request in enumerate(requests[:num_answered]):
+                body = request.split(b" ")[1]
+                headers = b"Content-Length: %d\r\n" % len(body)
+                if i + 1 == num_answered < num_requests:
+                    headers += b"Connection: close\r\n"
+                sock.send(b"HTTP/1.1 200 OK\r\n" + headers + b"\r\n" + body)
+            sock.close()
+
+    return socket_handler, received
+
+
+class TestPipelining(SocketDummyServerTestCase):
+    def test_responses_returned_in_order(self):
+        handler, received = pipelining_handler([(3, 3)])
+        self._start_server(handler)
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            responses = pool.pipeline(
+                [("GET", "/a"), ("GET", "/b"), ("HEAD", "/c")], retries=0
+            )
+
+            assert [r.status for r in responses] == [200, 200, 200]
+            assert [r.data for r in responses] == [b"/a", b"/b", b""]
+            assert pool.num_connections == 1
+            assert len(received) == 1
+            assert received[0][0].startswith(b"GET /a HTTP/1.1\r\n")
+            assert received[0][2].startswith(b"HEAD /c HTTP/1.1\r\n")
+
+    def test_remaining_requests_resent_when_server_closes(self):
+        handler, received = pipelining_handler([(3, 1), (2, 1), (1, 1)])
+        self._start_server(handler)
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            responses = pool.pipeline(
+                [("GET", "/a"), ("GET", "/b"), ("GET", "/c")], retries=0
+            )
+
+            assert [r.data for r in responses] == [b"/a", b"/b", b"/c"]
+            assert pool.num_connections == 3
+            assert [len(requests) for requests in received] == [3, 2, 1]
+
+    def test_depth_limits_requests_in_flight(self):
+        handler, received = pipelining_handler([(2, 2), (1, 1)])
+        self._start_server(handler)
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            responses = pool.pipeline(
+                [("GET", "/a"), ("GET", "/b"), ("GET", "/c")], depth=2, retries=0
+            )
+
+            assert [r.data for r in responses] == [b"/a", b"/b", b"/c"]
+
+    def test_connection_without_responses_counts_as_retry(self):
+        handler, received = pipelining_handler([(2, 0), (2, 2)])
+        self._start_server(handler)
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            with pytest.raises(MaxRetryError):
+                pool.pipeline([("GET", "/a"), ("GET", "/b")], retries=0)
+
+            responses = pool.pipeline([("GET", "/a"), ("GET", "/b")], retries=1)
+            assert [r.data for r in responses] == [b"/a", b"/b"]
+
+    def test_non_idempotent_method_rejected(self):
+        with HTTPConnectionPool("localhost", 80) as pool:
+            with pytest.raises(ValueError):
+                pool.pipeline([("GET", "/"), ("POST", "/")])
+
+    def test_control_characters_rejected(self):
+        requests = [
+            ("GET", "/ HTTP/1.1\r\nX-Injected: 1\r\n\r\nGET /a"),
+            ("GET", "/a b"),
+            ("GET\r\n", "/"),
+            ("GET", "/", {"X-Foo": "bar\r\nX-Injected: 1"}),
+            ("GET", "/", {"X-Foo\r\nX-Injected": "1"}),
+        ]
+        with HTTPConnectionPool("localhost", 80) as pool:
+            for request in requests:
+                with pytest.raises(ValueError):
+                    pool.pipeline([request])
+
+
+class TestRequestMany(SocketDummyServerTestCase):
+    def test_ordered_bounds_held_results(self):
+        seen = []
+
+        def answer(sock):
+            buf = b""
+            while b"\r\n\r\n" not in buf:
+                buf += sock.recv(65536)
+            path = buf.split(b" ")[1]
+            seen.append(path)
+            if path == b"/slow":
+                time.sleep(0.2)
+            sock.send(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Length: 0\r\n"
+                b"Connection: close\r\n"
+                b"\r\n"
+            )
+            sock.close()
+
+        def socket_handler(listener):
+            for _ in range(21):
+                sock = listener.accept()[0]
+                Thread(target=answer, args=(sock,)).start()
+
+        self._start_server(socket_handler)
+        url = "http://%s:%d" % (self.host, self.port)
+
+        # The slow first request holds back the results of all the others.
+        requests = [("GET", url + "/slow")] + [("GET", url + "/")] * 20
+        held = []
+        with PoolManager(maxsize=4) as http:
+            batch = http.request_many(requests, max_concurrency=3, ordered=True)
+            for yielded, result in enumerate(batch, 1):
+                assert result.response.status == 200
+                held.append(len(seen) - yielded)
+
+        assert len(held) == 21
+        assert max(held) <= 3